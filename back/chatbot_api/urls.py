@@ -1,5 +1,5 @@
 from django.urls import path
-from .views import ChatbotChatView, QuestionGenerationView, health_check
+from .views import ChatbotChatView, QuestionGenerationView, KnowledgeBaseRebuildView, health_check
 
 app_name = 'chatbot_api'
 
@@ -12,4 +12,7 @@ urlpatterns = [
     
     # Question generation endpoint
     path('generate-question/', QuestionGenerationView.as_view(), name='generate_question'),
+    
+    # Knowledge base rebuild endpoint (explicit trigger)
+    path('rebuild-knowledge-base/', KnowledgeBaseRebuildView.as_view(), name='rebuild_knowledge_base'),
 ] 
\ No newline at end of file
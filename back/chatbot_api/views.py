@@ -5,6 +5,7 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.decorators import api_view
+from rest_framework.permissions import IsAdminUser
 from .serializers import (
     ChatMessageSerializer, 
     ChatResponseSerializer,
@@ -22,10 +23,14 @@ os.chdir(project_root)
 
 try:
     from rag_pipeline.pipeline import RAGPipeline
+    from rag_pipeline.registry import get_pipeline, get_pipeline_status, start_rebuild_pipeline
 except ImportError as e:
     print(f"Error importing RAGPipeline: {e}")
     RAGPipeline = None
 
+# Smaller document set served by the API
+test_docs_path = "/app/chatbot/app/data/sefaz_documents/general_content"
+
 
 class ChatbotChatView(APIView):
     """API endpoint for chatting with the RAG chatbot"""
@@ -65,28 +70,20 @@ class ChatbotChatView(APIView):
             # Test with RAGPipeline using only a small subset of documents
             user_message = serializer.validated_data['message']
             
-            # Initialize the RAG pipeline with a smaller document set
-            test_docs_path = "/app/chatbot/app/data/sefaz_documents/general_content"
-            
             # Check if test folder exists and has PDFs
-            if os.path.exists(test_docs_path):
-                print(f"Using documents from: {test_docs_path}")
-                pipeline = RAGPipeline(documents_path=test_docs_path)
-            else:
+            if not os.path.exists(test_docs_path):
                 print(f"Test path not found: {test_docs_path}")
                 # Fallback to simple response
                 response = f"Erro ao processar. Mensagem automática para teste."
                 return Response({'response': response, 'confidence': 0.8}, status=status.HTTP_200_OK)
             
-            # Initialize knowledge base with the smaller document set
-            try:
-                pipeline.build_knowledge_base(True)
-                print("Knowledge base built successfully with test documents")
-            except Exception as e:
-                print(f"Warning: Could not build knowledge base: {e}")
-                # Fallback response
-                response = f"Teste com documentos limitados. Você disse: '{user_message}'"
-                return Response({'response': response, 'confidence': 0.8}, status=status.HTTP_200_OK)
+            # Shared pipeline, the knowledge base is loaded once per process in the background
+            pipeline = get_pipeline(documents_path=test_docs_path)
+            if pipeline is None:
+                return Response(
+                    {"error": "Knowledge base not available", **get_pipeline_status(documents_path=test_docs_path)}, 
+                    status=status.HTTP_503_SERVICE_UNAVAILABLE
+                )
             
             # Get response from chatbot
             response = pipeline.chat(user_message)
@@ -153,13 +150,10 @@ class QuestionGenerationView(APIView):
             return Response(mock_question_data, status=status.HTTP_200_OK)
         
         try:
-            # Initialize the RAG pipeline with a smaller document set
-            test_docs_path = "/app/chatbot/app/data/sefaz_documents/general_content"
-            
             # Check if test folder exists and has PDFs
             if os.path.exists(test_docs_path):
-                print(f"Using documents from: {test_docs_path}")
-                pipeline = RAGPipeline(documents_path=test_docs_path)
+                # Shared pipeline, the knowledge base is loaded once per process in the background
+                pipeline = get_pipeline(documents_path=test_docs_path)
             else:
                 print(f"Test path not found: {test_docs_path}")
                 # Fallback to mock response
@@ -187,11 +181,11 @@ class QuestionGenerationView(APIView):
                 
                 return Response(mock_question_data, status=status.HTTP_200_OK)
             
-            # Initialize knowledge base if needed
-            try:
-                pipeline.build_knowledge_base(True)
-            except Exception as e:
-                print(f"Warning: Could not build knowledge base: {e}")
+            if pipeline is None:
+                return Response(
+                    {"error": "Knowledge base not available", **get_pipeline_status(documents_path=test_docs_path)}, 
+                    status=status.HTTP_503_SERVICE_UNAVAILABLE
+                )
             
             # Get topic and difficulty
             topic = serializer.validated_data['topic']
@@ -233,6 +227,55 @@ class QuestionGenerationView(APIView):
             )
 
 
+class KnowledgeBaseRebuildView(APIView):
+    """API endpoint for explicitly rebuilding the chatbot knowledge base"""
+    
+    permission_classes = [IsAdminUser]
+    
+    def get(self, request):
+        """Return the status of the shared pipeline and of its last rebuild"""
+        if RAGPipeline is None:
+            return Response(
+                {"error": "RAGPipeline is not available in this environment"}, 
+                status=status.HTTP_503_SERVICE_UNAVAILABLE
+            )
+        
+        return Response(get_pipeline_status(documents_path=test_docs_path), status=status.HTTP_200_OK)
+    
+    def post(self, request):
+        """Start rebuilding the knowledge base of the shared pipeline in the background"""
+        if RAGPipeline is None:
+            return Response(
+                {"error": "RAGPipeline is not available in this environment"}, 
+                status=status.HTTP_503_SERVICE_UNAVAILABLE
+            )
+        
+        if not os.path.exists(test_docs_path):
+            return Response(
+                {"error": f"Documents path not found: {test_docs_path}"}, 
+                status=status.HTTP_404_NOT_FOUND
+            )
+        
+        try:
+            # The build takes minutes: the request only starts it, GET follows its progress
+            if not start_rebuild_pipeline(documents_path=test_docs_path):
+                return Response(
+                    {"error": "A rebuild is already running", **get_pipeline_status(documents_path=test_docs_path)}, 
+                    status=status.HTTP_409_CONFLICT
+                )
+            
+            return Response(
+                {"documents_path": test_docs_path, **get_pipeline_status(documents_path=test_docs_path)}, 
+                status=status.HTTP_202_ACCEPTED
+            )
+            
+        except Exception as e:
+            return Response(
+                {"error": f"Error starting knowledge base rebuild: {str(e)}"}, 
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+
 @api_view(['GET'])
 def health_check(request):
     """Health check endpoint"""
@@ -0,0 +1,59 @@
+"""
+Embedding Throughput Benchmark - Compares a single embed_documents call with length-sorted batching on the sefaz_documents corpus
+
+Usage (from chatbot/app):
+    python -m benchmarks.embedding_throughput --documents-path data/sefaz_documents --batch-size 32 --backend torch
+"""
+
+from rag_pipeline.step1_extraction import DocumentExtractor
+from rag_pipeline.step2_chunking import DocumentChunker
+from rag_pipeline.embedding_backends import LengthSortedEmbeddings
+from rag_pipeline.model_registry import get_embedding_model
+
+import argparse
+import time
+
+def main():
+    """
+    Run the benchmark and print chunks/second for both strategies
+
+    The baseline is the path used before length-sorted batching: the whole corpus
+    passed to one embed_documents call. sentence-transformers sorts the texts of a
+    call by length itself, the ONNX backend batches them in input order.
+    """
+    parser = argparse.ArgumentParser(description="Embedding batching benchmark")
+    parser.add_argument("--documents-path", default="data/sefaz_documents")
+    parser.add_argument("--model", default="neuralmind/bert-base-portuguese-cased")
+    parser.add_argument("--backend", choices=["torch", "onnx"], default="torch")
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--chunk-size", type=int, default=1500)
+    parser.add_argument("--chunk-overlap", type=int, default=200)
+    parser.add_argument("--limit", type=int, default=None, help="Maximum number of chunks")
+    args = parser.parse_args()
+
+    extractor = DocumentExtractor(args.documents_path, max_workers=None)
+    chunker = DocumentChunker(args.chunk_size, args.chunk_overlap)
+    texts = [chunk.page_content for chunk in chunker.iter_chunks(extractor.iter_documents())]
+    if args.limit:
+        texts = texts[:args.limit]
+
+    print(f"Chunks: {len(texts)}, batch size: {args.batch_size}, model: {args.model} ({args.backend})")
+
+    # The shared model is loaded and warmed up here, so initialization is not measured
+    embeddings = get_embedding_model(args.model, args.backend, args.batch_size)
+    sorted_embeddings = LengthSortedEmbeddings(embeddings, args.batch_size)
+
+    start_time = time.perf_counter()
+    embeddings.embed_documents(texts)
+    single_call_seconds = time.perf_counter() - start_time
+
+    start_time = time.perf_counter()
+    sorted_embeddings.embed_documents(texts)
+    length_sorted_seconds = time.perf_counter() - start_time
+
+    print(f"Single call:   {len(texts) / single_call_seconds:8.2f} chunks/s ({single_call_seconds:.1f}s)")
+    print(f"Length sorted: {len(texts) / length_sorted_seconds:8.2f} chunks/s ({length_sorted_seconds:.1f}s)")
+    print(f"Speedup:       {single_call_seconds / length_sorted_seconds:8.2f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+HNSW Recall Benchmark - Reports recall@k and latency of the HNSW index against exact NumPy search
+
+Vectors are drawn around random cluster centers (closer to real embeddings than
+uniform noise), so no model or corpus is needed. Requires hnswlib.
+
+Usage (from chatbot/app):
+    python -m benchmarks.hnsw_recall --size 100000 --M 16 --ef-construction 200 --ef-search 16 32 64 128 256
+"""
+
+from rag_pipeline.vector_backends import HnswVectorIndex, NumpyVectorIndex
+
+from typing import List
+import argparse
+import time
+
+import numpy as np
+
+def make_vectors(rng: np.random.Generator, size: int, dimension: int, clusters: int) -> np.ndarray:
+    """
+    Draw vectors around random cluster centers
+
+    Args:
+        rng (np.random.Generator): Random generator
+        size (int): Number of vectors
+        dimension (int): Dimension of the vectors
+        clusters (int): Number of cluster centers
+
+    Returns:
+        np.ndarray: (size, dimension) float32 vectors
+    """
+    centers = rng.standard_normal((clusters, dimension), dtype=np.float32)
+    assignments = rng.integers(0, clusters, size)
+    return centers[assignments] + 0.5 * rng.standard_normal((size, dimension), dtype=np.float32)
+
+def recall_at_k(approximate: List[List[int]], exact: List[List[int]]) -> float:
+    """
+    Return the fraction of exact neighbours found by the approximate search
+
+    Args:
+        approximate (List[List[int]]): Rows returned for each query
+        exact (List[List[int]]): Exact rows of each query
+
+    Returns:
+        float: Recall between 0 and 1
+    """
+    found = sum(len(set(a) & set(e)) for a, e in zip(approximate, exact))
+    return found / sum(len(e) for e in exact)
+
+def run_queries(index, queries: np.ndarray, k: int):
+    """
+    Search every query and measure the latencies
+
+    Args:
+        index: NumpyVectorIndex or HnswVectorIndex
+        queries (np.ndarray): (n, dimension) query vectors
+        k (int): Number of neighbours
+
+    Returns:
+        Tuple[List[List[int]], np.ndarray]: Rows of each query and latencies in milliseconds
+    """
+    rows, latencies = [], []
+    for query in queries:
+        vector = query.tolist()
+        start_time = time.perf_counter()
+        results = index.search_by_vector(vector, k)
+        latencies.append((time.perf_counter() - start_time) * 1000)
+        rows.append([row for row, _ in results])
+    return rows, np.asarray(latencies)
+
+def main():
+    """
+    Build both indexes and print recall@k and latency for each ef_search
+    """
+    parser = argparse.ArgumentParser(description="HNSW recall/latency benchmark")
+    parser.add_argument("--size", type=int, default=100000)
+    parser.add_argument("--dimension", type=int, default=768)
+    parser.add_argument("--clusters", type=int, default=200)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--space", default="l2", choices=["l2", "cosine", "ip"])
+    parser.add_argument("--M", type=int, default=16)
+    parser.add_argument("--ef-construction", type=int, default=200)
+    parser.add_argument("--ef-search", type=int, nargs="+", default=[16, 32, 64, 128, 256])
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    vectors = make_vectors(rng, args.size, args.dimension, args.clusters)
+    queries = make_vectors(rng, args.queries, args.dimension, args.clusters)
+    ids = [f"chunk-{i}" for i in range(args.size)]
+    texts = [""] * args.size
+    metadatas = [{} for _ in range(args.size)]
+
+    exact_index = NumpyVectorIndex(vectors, ids, texts, metadatas, space=args.space)
+
+    start_time = time.perf_counter()
+    hnsw_index = HnswVectorIndex(args.dimension, args.space, args.M, args.ef_construction, max_elements=args.size)
+    hnsw_index.add(ids, texts, metadatas, vectors)
+    build_seconds = time.perf_counter() - start_time
+
+    print(f"Vectors: {args.size}, dimension: {args.dimension}, k: {args.k}, space: {args.space}")
+    print(f"HNSW M={args.M} ef_construction={args.ef_construction} built in {build_seconds:.1f}s")
+
+    exact_rows, exact_latencies = run_queries(exact_index, queries, args.k)
+    print(f"{'backend':>14} {'recall@k':>9} {'p50 ms':>9} {'p99 ms':>9}")
+    print(f"{'exact':>14} {1.0:>9.4f} {np.percentile(exact_latencies, 50):>9.3f} {np.percentile(exact_latencies, 99):>9.3f}")
+
+    for ef_search in args.ef_search:
+        hnsw_index.set_ef_search(max(ef_search, args.k))
+        rows, latencies = run_queries(hnsw_index, queries, args.k)
+        name = f"hnsw ef={ef_search}"
+        print(f"{name:>14} {recall_at_k(rows, exact_rows):>9.4f} {np.percentile(latencies, 50):>9.3f} {np.percentile(latencies, 99):>9.3f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Lexical Search Benchmark - Reports BM25 query latency over a synthetic corpus
+
+Chunks are drawn from a Zipf-distributed vocabulary with legal references mixed in,
+so no model or corpus is needed.
+
+Usage (from chatbot/app):
+    python -m benchmarks.lexical_search --size 50000 --queries 1000 --k 20
+"""
+
+from rag_pipeline.lexical_index import BM25Index
+
+import argparse
+import time
+
+import numpy as np
+
+def main():
+    """
+    Build the index and print p50/p99 query latency with and without a metadata filter
+    """
+    parser = argparse.ArgumentParser(description="BM25 lexical search benchmark")
+    parser.add_argument("--size", type=int, default=50000)
+    parser.add_argument("--words", type=int, default=250)
+    parser.add_argument("--vocabulary", type=int, default=30000)
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--k", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    vocabulary = [f"termo{i}" for i in range(args.vocabulary)]
+    texts = []
+    for i in range(args.size):
+        words = [vocabulary[w % args.vocabulary] for w in rng.zipf(1.2, args.words)]
+        words.append(f"Lei {rng.integers(10, 20)}.{rng.integers(100, 999)}, art. {rng.integers(1, 60)}º")
+        texts.append(" ".join(words))
+    ids = [f"chunk-{i}" for i in range(args.size)]
+    metadatas = [{"source": f"file-{i % 50}.pdf"} for i in range(args.size)]
+
+    start_time = time.perf_counter()
+    index = BM25Index()
+    index.add(ids, texts, metadatas)
+    print(f"Chunks: {args.size}, terms: {len(index.postings)}, built in {time.perf_counter() - start_time:.1f}s")
+
+    queries = []
+    for _ in range(args.queries):
+        terms = [vocabulary[w % args.vocabulary] for w in rng.zipf(1.2, 3)]
+        queries.append(f"{' '.join(terms)} Lei {rng.integers(10, 20)}.{rng.integers(100, 999)}")
+
+    # Warm-up so that the per-term weight arrays are not measured
+    for query in queries:
+        index.search(query, args.k)
+
+    print(f"{'filter':>8} {'p50 ms':>9} {'p99 ms':>9}")
+    for name, where in [("none", None), ("source", {"source": "file-7.pdf"})]:
+        latencies = []
+        for query in queries:
+            query_start = time.perf_counter()
+            index.search(query, args.k, where)
+            latencies.append((time.perf_counter() - query_start) * 1000)
+        print(f"{name:>8} {np.percentile(latencies, 50):>9.3f} {np.percentile(latencies, 99):>9.3f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+ONNX Parity Benchmark - Checks the int8 ONNX embeddings against the fp32 torch model and compares latency
+
+Exits with status 1 when any chunk falls below the minimum cosine similarity.
+
+Usage (from chatbot/app):
+    python -m benchmarks.onnx_parity --documents-path data/sefaz_documents/general_content --min-cosine 0.98
+"""
+
+from langchain_huggingface import HuggingFaceEmbeddings
+from rag_pipeline.step1_extraction import DocumentExtractor
+from rag_pipeline.step2_chunking import DocumentChunker
+from rag_pipeline.embedding_backends import OnnxEmbeddings
+
+from typing import Callable, List
+import argparse
+import statistics
+import sys
+import time
+
+import numpy as np
+
+QUERIES = [
+    "O que é ICMS?",
+    "O que é o FEEF?",
+    "Quais são os incentivos fiscais do PRODEPE?",
+    "Como funciona o crédito presumido?",
+]
+
+def measure_latency(function: Callable[[], object], runs: int) -> List[float]:
+    """
+    Measure the latency of a function in milliseconds
+    
+    Args:
+        function (Callable[[], object]): Function to measure
+        runs (int): Number of measured runs
+        
+    Returns:
+        List[float]: Latency of each run in milliseconds
+    """
+    latencies = []
+    for _ in range(runs):
+        start_time = time.perf_counter()
+        function()
+        latencies.append((time.perf_counter() - start_time) * 1000)
+    return latencies
+
+def main():
+    """
+    Run the parity check and the latency comparison
+    """
+    parser = argparse.ArgumentParser(description="ONNX int8 embedding parity and latency")
+    parser.add_argument("--documents-path", default="data/sefaz_documents/general_content")
+    parser.add_argument("--model", default="neuralmind/bert-base-portuguese-cased")
+    parser.add_argument("--limit", type=int, default=200, help="Number of chunks compared")
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--min-cosine", type=float, default=0.98)
+    args = parser.parse_args()
+    
+    extractor = DocumentExtractor(args.documents_path)
+    chunker = DocumentChunker()
+    texts = [chunk.page_content for chunk in chunker.iter_chunks(extractor.iter_documents())][:args.limit]
+    texts.extend(QUERIES)
+    
+    torch_embeddings = HuggingFaceEmbeddings(
+        model_name=args.model,
+        model_kwargs={'device': 'cpu'},
+        encode_kwargs={'batch_size': args.batch_size}
+    )
+    onnx_embeddings = OnnxEmbeddings(args.model, batch_size=args.batch_size)
+    
+    # Parity
+    reference = np.asarray(torch_embeddings.embed_documents(texts), dtype=np.float32)
+    quantized = np.asarray(onnx_embeddings.embed_documents(texts), dtype=np.float32)
+    cosines = (reference * quantized).sum(axis=1) / (
+        np.linalg.norm(reference, axis=1) * np.linalg.norm(quantized, axis=1)
+    )
+    print(f"Cosine similarity over {len(texts)} texts: min {cosines.min():.4f}, mean {cosines.mean():.4f}")
+    
+    # Latency
+    batch = texts[:args.batch_size]
+    for name, embeddings in (("torch fp32", torch_embeddings), ("onnx int8", onnx_embeddings)):
+        embeddings.embed_query(QUERIES[0])
+        query_latencies = measure_latency(lambda: embeddings.embed_query(QUERIES[0]), args.runs)
+        batch_latencies = measure_latency(lambda: embeddings.embed_documents(batch), max(1, args.runs // 4))
+        print(
+            f"{name:10s}  query p50 {statistics.median(query_latencies):7.1f} ms  "
+            f"batch of {len(batch)} p50 {statistics.median(batch_latencies):8.1f} ms"
+        )
+    
+    if cosines.min() < args.min_cosine:
+        print(f"FAILED: minimum cosine {cosines.min():.4f} < {args.min_cosine}")
+        sys.exit(1)
+    
+    print("OK")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Search Backends Benchmark - Compares top-k query latency of the Chroma store and the NumPy exact index
+
+Random vectors with the dimension of the BERT model are used, so no model or corpus is needed.
+
+Usage (from chatbot/app):
+    python -m benchmarks.search_backends --sizes 1000 10000 100000 --queries 200 --k 4
+"""
+
+from langchain_chroma import Chroma
+from rag_pipeline.vector_backends import NumpyVectorIndex
+
+from typing import Callable, Dict, List
+import argparse
+import tempfile
+import time
+
+import numpy as np
+
+def measure_latencies(search: Callable[[List[float]], object], queries: np.ndarray) -> Dict[str, float]:
+    """
+    Run one search per query and return the latency percentiles
+
+    Args:
+        search (Callable[[List[float]], object]): Search function taking a query vector
+        queries (np.ndarray): (n, dimension) query vectors
+
+    Returns:
+        Dict[str, float]: p50 and p99 latency in milliseconds
+    """
+    latencies = []
+    for query in queries:
+        vector = query.tolist()
+        start_time = time.perf_counter()
+        search(vector)
+        latencies.append((time.perf_counter() - start_time) * 1000)
+
+    return {
+        "p50": float(np.percentile(latencies, 50)),
+        "p99": float(np.percentile(latencies, 99))
+    }
+
+def build_chroma(vectors: np.ndarray, directory: str) -> Chroma:
+    """
+    Create a persisted Chroma collection holding the vectors
+
+    Args:
+        vectors (np.ndarray): (n, dimension) vectors
+        directory (str): Persistence directory
+
+    Returns:
+        Chroma: Vector store with one chunk per vector
+    """
+    vector_store = Chroma(collection_name=f"benchmark_{len(vectors)}", persist_directory=directory)
+    max_batch_size = vector_store._client.get_max_batch_size()
+
+    for start in range(0, len(vectors), max_batch_size):
+        end = min(start + max_batch_size, len(vectors))
+        vector_store._collection.add(
+            ids=[f"chunk-{i}" for i in range(start, end)],
+            embeddings=vectors[start:end].tolist(),
+            documents=[f"chunk {i}" for i in range(start, end)],
+            metadatas=[{"source": f"file-{i % 50}.pdf"} for i in range(start, end)]
+        )
+    return vector_store
+
+def main():
+    """
+    Run the benchmark and print p50/p99 latency for each size and backend
+    """
+    parser = argparse.ArgumentParser(description="Vector search backends benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--dimension", type=int, default=768)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    print(f"{'chunks':>8} {'backend':>8} {'p50 ms':>9} {'p99 ms':>9}")
+
+    for size in args.sizes:
+        vectors = rng.standard_normal((size, args.dimension), dtype=np.float32)
+        queries = rng.standard_normal((args.queries, args.dimension), dtype=np.float32)
+
+        with tempfile.TemporaryDirectory() as directory:
+            vector_store = build_chroma(vectors, directory)
+            numpy_index = NumpyVectorIndex.from_chroma(vector_store)
+
+            backends = {
+                "chroma": lambda query: vector_store.similarity_search_by_vector_with_relevance_scores(query, k=args.k),
+                "numpy": lambda query: numpy_index.similarity_search_by_vector_with_relevance_scores(query, k=args.k)
+            }
+            for name, search in backends.items():
+                # Warm-up so that lazy initialization is not measured
+                search(queries[0].tolist())
+                latency = measure_latencies(search, queries)
+                print(f"{size:>8} {name:>8} {latency['p50']:>9.3f} {latency['p99']:>9.3f}")
+
+if __name__ == "__main__":
+    main()
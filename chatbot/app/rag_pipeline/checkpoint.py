@@ -0,0 +1,206 @@
+"""
+Checkpoint Module - Responsible for resuming interrupted knowledge base builds and reporting their progress
+"""
+
+from datetime import datetime, timezone
+from typing import List, Dict, Any, Optional
+import json
+import logging
+import os
+import time
+
+logger = logging.getLogger(__name__)
+
+class BuildCheckpoint:
+    """Class to persist which files of a running build are already committed to the vector store
+
+    A file is recorded once every one of its chunks has been written, so a
+    restarted build with the same settings can skip it.
+    """
+
+    def __init__(self, checkpoint_path: str):
+        """
+        Initialize the build checkpoint
+
+        Args:
+            checkpoint_path (str): Path of the JSON file where the checkpoint is persisted
+        """
+        self.checkpoint_path = checkpoint_path
+        self.data: Dict[str, Any] = {}
+        self.load()
+
+    def load(self) -> None:
+        """
+        Load the checkpoint from disk (an absent or invalid file means no build is pending)
+        """
+        self.data = {}
+
+        if not os.path.exists(self.checkpoint_path):
+            return
+
+        try:
+            with open(self.checkpoint_path, 'r', encoding='utf-8') as file:
+                self.data = json.load(file)
+        except Exception as e:
+            logger.error(f"Error loading build checkpoint {self.checkpoint_path}: {e}")
+
+    def save(self) -> None:
+        """
+        Persist the checkpoint to disk atomically
+        """
+        directory = os.path.dirname(self.checkpoint_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        temp_path = f"{self.checkpoint_path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as file:
+            json.dump(self.data, file, ensure_ascii=False)
+        os.replace(temp_path, self.checkpoint_path)
+
+    def exists(self) -> bool:
+        """
+        Return whether an interrupted build is pending
+
+        Returns:
+            bool: True if a checkpoint was recorded
+        """
+        return bool(self.data)
+
+    def resume(self, settings: Dict[str, Any]) -> Optional[str]:
+        """
+        Return the collection of a pending build started with the same settings
+
+        Args:
+            settings (Dict[str, Any]): Settings of the build about to start
+
+        Returns:
+            Optional[str]: Collection the pending build was writing to, or None
+        """
+        if not self.data:
+            return None
+
+        if self.data.get('settings') != settings:
+            logger.info("Build checkpoint was recorded with other settings, starting from scratch")
+            return None
+
+        return self.data.get('collection_name')
+
+    def start(self, collection_name: str, settings: Dict[str, Any]) -> None:
+        """
+        Record the start of a new build
+
+        Args:
+            collection_name (str): Collection the build writes to
+            settings (Dict[str, Any]): Settings of the build
+        """
+        self.data = {
+            'collection_name': collection_name,
+            'settings': settings,
+            'started_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'files': {}
+        }
+        self.save()
+
+    def get_completed_files(self) -> Dict[str, List[str]]:
+        """
+        Return the files whose chunks are committed and that did not change since
+
+        Returns:
+            Dict[str, List[str]]: File path -> chunk IDs
+        """
+        completed = {}
+        for file_path, entry in self.data.get('files', {}).items():
+            try:
+                stat = os.stat(file_path)
+            except OSError:
+                continue
+            if stat.st_size == entry['size'] and stat.st_mtime == entry['mtime']:
+                completed[file_path] = entry['chunk_ids']
+        return completed
+
+    def mark_files(self, chunk_ids_by_file: Dict[str, List[str]]) -> None:
+        """
+        Record files whose chunks are all committed and persist the checkpoint
+
+        Args:
+            chunk_ids_by_file (Dict[str, List[str]]): File path -> chunk IDs
+        """
+        for file_path, chunk_ids in chunk_ids_by_file.items():
+            stat = os.stat(file_path)
+            self.data['files'][file_path] = {
+                'size': stat.st_size,
+                'mtime': stat.st_mtime,
+                'chunk_ids': list(chunk_ids)
+            }
+        self.save()
+
+    def clear(self) -> None:
+        """
+        Forget the pending build and delete the checkpoint file
+        """
+        self.data = {}
+        if os.path.exists(self.checkpoint_path):
+            os.remove(self.checkpoint_path)
+
+class BuildProgress:
+    """Class to measure the throughput of a build and estimate its remaining time"""
+
+    def __init__(self, total_files: int, total_bytes: int):
+        """
+        Initialize the progress tracker
+
+        Args:
+            total_files (int): Number of files to process in this run
+            total_bytes (int): Size of those files, used for the ETA
+        """
+        self.total_files = total_files
+        self.total_bytes = total_bytes
+        self.files_done = 0
+        self.bytes_done = 0
+        self.chunks_done = 0
+        self.start_time = time.perf_counter()
+
+    def update(self, chunks: int = 0, files: int = 0, size: int = 0) -> None:
+        """
+        Account for newly committed chunks and completed files
+
+        Args:
+            chunks (int): Chunks committed since the last update
+            files (int): Files completed since the last update
+            size (int): Bytes of the files completed since the last update
+        """
+        self.chunks_done += chunks
+        self.files_done += files
+        self.bytes_done += size
+
+    def get_info(self) -> Dict[str, Any]:
+        """
+        Return the current progress
+
+        Returns:
+            Dict[str, Any]: Counts, chunks per second and estimated seconds remaining
+        """
+        elapsed = time.perf_counter() - self.start_time
+        eta_seconds = None
+        if self.bytes_done > 0:
+            eta_seconds = elapsed * (self.total_bytes - self.bytes_done) / self.bytes_done
+
+        return {
+            "files_done": self.files_done,
+            "total_files": self.total_files,
+            "chunks_done": self.chunks_done,
+            "elapsed_seconds": round(elapsed, 1),
+            "chunks_per_second": round(self.chunks_done / elapsed, 2) if elapsed > 0 else 0.0,
+            "eta_seconds": round(eta_seconds, 1) if eta_seconds is not None else None
+        }
+
+    def log(self) -> None:
+        """
+        Log the current progress
+        """
+        info = self.get_info()
+        eta = f"{info['eta_seconds']:.0f}s" if info['eta_seconds'] is not None else "unknown"
+        logger.info(
+            f"Progress: {info['files_done']}/{info['total_files']} files, {info['chunks_done']} chunks "
+            f"({info['chunks_per_second']} chunks/s), ETA {eta}"
+        )
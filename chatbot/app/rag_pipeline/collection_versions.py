@@ -0,0 +1,162 @@
+"""
+Collection Versions Module - Responsible for the pointer to the live version of a collection
+"""
+
+from datetime import datetime, timezone
+from typing import List, Dict, Any, Optional
+import json
+import logging
+import os
+import tempfile
+import time
+
+logger = logging.getLogger(__name__)
+
+def make_version_name(collection_name: str) -> str:
+    """
+    Return a new versioned collection name for a blue/green build
+
+    Args:
+        collection_name (str): Logical name of the collection
+
+    Returns:
+        str: Collection name with a UTC timestamp suffix
+    """
+    return f"{collection_name}-v{datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S%f')}"
+
+class CollectionPointer:
+    """Class to persist which versioned collection currently serves a logical collection
+
+    The pointer is a small JSON file replaced atomically with os.replace, so
+    readers always see either the previous or the new version. Versions that
+    stop being served are kept with their retirement time until they are
+    garbage-collected.
+    """
+
+    def __init__(self, persist_directory: str, collection_name: str):
+        """
+        Initialize the collection pointer
+
+        Args:
+            persist_directory (str): Directory of the vector store
+            collection_name (str): Logical name of the collection
+        """
+        self.collection_name = collection_name
+        self.pointer_path = os.path.join(persist_directory, f"{collection_name}_current.json")
+
+    def _load(self) -> Dict[str, Any]:
+        """
+        Load the pointer file (an absent or invalid file is an empty pointer)
+
+        Returns:
+            Dict[str, Any]: Pointer data
+        """
+        if not os.path.exists(self.pointer_path):
+            return {}
+
+        try:
+            with open(self.pointer_path, 'r', encoding='utf-8') as file:
+                return json.load(file)
+        except Exception as e:
+            logger.error(f"Error loading collection pointer {self.pointer_path}: {e}")
+            return {}
+
+    def _save(self, data: Dict[str, Any]) -> None:
+        """
+        Persist the pointer file atomically
+
+        Args:
+            data (Dict[str, Any]): Pointer data
+        """
+        directory = os.path.dirname(self.pointer_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        # A unique temporary file: several processes may flip the pointer at the same time
+        file_descriptor, temp_path = tempfile.mkstemp(
+            dir=directory or ".", prefix=f"{os.path.basename(self.pointer_path)}.", suffix=".tmp"
+        )
+        try:
+            with os.fdopen(file_descriptor, 'w', encoding='utf-8') as file:
+                json.dump(data, file, ensure_ascii=False, indent=2)
+            os.replace(temp_path, self.pointer_path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+    def get_mtime(self) -> Optional[int]:
+        """
+        Return the modification time of the pointer, used to detect flips cheaply
+
+        Returns:
+            Optional[int]: Modification time in nanoseconds or None if there is no pointer
+        """
+        try:
+            return os.stat(self.pointer_path).st_mtime_ns
+        except OSError:
+            return None
+
+    def read(self) -> Optional[str]:
+        """
+        Return the versioned collection currently serving the logical collection
+
+        Returns:
+            Optional[str]: Collection name or None if no version was activated
+        """
+        return self._load().get('current')
+
+    def activate(self, version_name: str, previous: Optional[str] = None) -> Optional[str]:
+        """
+        Atomically make a versioned collection the live one
+
+        Args:
+            version_name (str): Collection to activate
+            previous (Optional[str]): Collection live before (defaults to the pointer target),
+                                      used for the unversioned collection of the first flip
+
+        Returns:
+            Optional[str]: Collection that was live before, if any
+        """
+        data = self._load()
+        previous = data.get('current') or previous
+        retired = [entry for entry in data.get('retired', []) if entry['collection_name'] != version_name]
+        if previous and previous != version_name:
+            retired.append({'collection_name': previous, 'retired_at': time.time()})
+
+        self._save({
+            'current': version_name,
+            'activated_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'retired': retired
+        })
+        logger.info(f"Collection '{self.collection_name}' now served by '{version_name}'")
+        return previous
+
+    def get_expired_versions(self, grace_seconds: float) -> List[str]:
+        """
+        Return the retired versions whose grace period is over
+
+        Args:
+            grace_seconds (float): Time a retired version is kept for readers still using it
+
+        Returns:
+            List[str]: Collection names that can be deleted
+        """
+        now = time.time()
+        return [
+            entry['collection_name'] for entry in self._load().get('retired', [])
+            if now - entry['retired_at'] >= grace_seconds
+        ]
+
+    def forget(self, version_name: str) -> None:
+        """
+        Remove a deleted version from the retired list
+
+        Args:
+            version_name (str): Collection that was deleted
+        """
+        data = self._load()
+        if not data:
+            return
+        data['retired'] = [entry for entry in data.get('retired', []) if entry['collection_name'] != version_name]
+        self._save(data)
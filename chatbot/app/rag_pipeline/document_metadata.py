@@ -0,0 +1,109 @@
+"""
+Document Metadata Module - Responsible for deriving the incentive program and kind of a document
+"""
+
+from .text_utils import fold_accents
+
+from typing import Any, Dict, List, Optional
+import os
+import re
+
+# Incentive programs, one sefaz_documents subfolder each
+PROGRAMS = ["FEEF", "PRODEPE", "PRODEAUTO", "PROIND", "PROINFRA", "PEAP", "INOVAR"]
+
+# Program of the documents outside a program folder (general_content, general_norms)
+GENERAL_PROGRAM = "GERAL"
+
+# First matching pattern of the normalized file name gives the document kind ("LC" is a lei complementar)
+DOC_KIND_PATTERNS = [
+    ("lei", re.compile(r"^(lei|lc)\b")),
+    ("decreto", re.compile(r"^decreto\b")),
+    ("portaria", re.compile(r"^portaria\b")),
+    ("apostila", re.compile(r"\bapostila\b"))
+]
+OTHER_DOC_KIND = "outro"
+
+# Bump whenever the derived fields change, so indexes built with older metadata are rebuilt
+METADATA_VERSION = 1
+
+def get_folder_program(folder_name: str) -> str:
+    """
+    Return the incentive program a folder holds
+
+    Args:
+        folder_name (str): Folder name, e.g. "prodepe"
+
+    Returns:
+        str: Program code (e.g. "PRODEPE"), or GENERAL_PROGRAM for other folders
+    """
+    program = fold_accents(folder_name).upper()
+    return program if program in PROGRAMS else GENERAL_PROGRAM
+
+def get_program(file_path: str, base_directory: str) -> str:
+    """
+    Return the incentive program of a document from the folder it is stored in
+
+    The innermost folder naming a program wins, from the file up to the base
+    directory itself, so a program folder can also be extracted on its own.
+
+    Args:
+        file_path (str): Path to the document
+        base_directory (str): Root directory of the documents
+
+    Returns:
+        str: Program code (e.g. "PRODEPE"), or GENERAL_PROGRAM outside a program folder
+    """
+    base_parent = os.path.dirname(os.path.abspath(base_directory))
+    folders = os.path.relpath(os.path.dirname(os.path.abspath(file_path)), base_parent).split(os.sep)
+    for folder in reversed(folders):
+        program = get_folder_program(folder)
+        if program != GENERAL_PROGRAM:
+            return program
+    return GENERAL_PROGRAM
+
+def get_doc_kind(file_name: str) -> str:
+    """
+    Return the kind of a document from its file name
+
+    Args:
+        file_name (str): File name, e.g. "Decreto 44.650 - Anexo 27.pdf"
+
+    Returns:
+        str: "lei", "decreto", "portaria", "apostila" or OTHER_DOC_KIND
+    """
+    name = fold_accents(os.path.splitext(file_name)[0]).strip()
+    for doc_kind, pattern in DOC_KIND_PATTERNS:
+        if pattern.search(name):
+            return doc_kind
+    return OTHER_DOC_KIND
+
+def detect_programs(query: str) -> List[str]:
+    """
+    Return the programs a query names explicitly
+
+    Args:
+        query (str): Query text
+
+    Returns:
+        List[str]: Program codes in the order of PROGRAMS
+    """
+    words = set(re.findall(r"[a-z0-9]+", fold_accents(query)))
+    return [program for program in PROGRAMS if program.lower() in words]
+
+def get_program_filter(query: str) -> Optional[Dict[str, Any]]:
+    """
+    Return the metadata filter restricting a search to the programs named in the query
+
+    Documents of GENERAL_PROGRAM (summaries, general norms) cover every program
+    and always pass the filter.
+
+    Args:
+        query (str): Query text
+
+    Returns:
+        Optional[Dict[str, Any]]: Chroma style filter on 'program', or None when no program is named
+    """
+    programs = detect_programs(query)
+    if not programs:
+        return None
+    return {"program": {"$in": programs + [GENERAL_PROGRAM]}}
@@ -0,0 +1,428 @@
+"""
+Embedding Backends Module - Responsible for how chunk embeddings are computed in batches
+"""
+
+from langchain_core.embeddings import Embeddings
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, List, Optional
+import logging
+import multiprocessing
+import os
+import re
+import threading
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Model held by each embedding worker process
+_worker_embeddings = None
+
+def get_token_length_function(embeddings: Embeddings) -> Callable[[List[str]], List[int]]:
+    """
+    Return a function that measures texts in tokens of the embedding model
+
+    Falls back to the number of characters when the model tokenizer is not reachable.
+
+    Args:
+        embeddings (Embeddings): Embeddings whose tokenizer should be used
+
+    Returns:
+        Callable[[List[str]], List[int]]: Function returning the length of each text
+    """
+    client = getattr(embeddings, '_client', None) or getattr(embeddings, 'client', None)
+    tokenizer = getattr(client, 'tokenizer', None) or getattr(embeddings, 'tokenizer', None)
+
+    if tokenizer is None:
+        return lambda texts: [len(text) for text in texts]
+
+    # The model truncates longer texts, so lengths are measured the same way
+    max_length = getattr(client, 'max_seq_length', None) or getattr(embeddings, 'max_length', None)
+
+    def token_lengths(texts: List[str]) -> List[int]:
+        encoded = tokenizer(texts, add_special_tokens=False, truncation=True, max_length=max_length)
+        return [len(input_ids) for input_ids in encoded['input_ids']]
+
+    return token_lengths
+
+class LengthSortedEmbeddings(Embeddings):
+    """LangChain embeddings that embed documents in length-sorted batches
+
+    Texts of similar length share a batch, so almost no padding is computed.
+    Results are returned in the original order of the texts.
+    """
+
+    def __init__(self,
+                 embeddings: Embeddings,
+                 batch_size: int = 32,
+                 length_function: Optional[Callable[[List[str]], List[int]]] = None):
+        """
+        Initialize the length-sorted embeddings
+
+        Args:
+            embeddings (Embeddings): Embeddings that compute each batch
+            batch_size (int): Number of texts per forward pass
+            length_function (Optional[Callable]): Length of each text (defaults to model tokens)
+        """
+        self.embeddings = embeddings
+        self.batch_size = batch_size
+        self.length_function = length_function or get_token_length_function(embeddings)
+
+    def get_sorted_batches(self, texts: List[str]) -> List[List[int]]:
+        """
+        Group the indexes of the texts in batches of similar length, longest first
+
+        Args:
+            texts (List[str]): Texts to group
+
+        Returns:
+            List[List[int]]: Indexes of the texts of each batch
+        """
+        lengths = self.length_function(texts)
+        order = sorted(range(len(texts)), key=lambda i: lengths[i], reverse=True)
+        return [order[start:start + self.batch_size] for start in range(0, len(order), self.batch_size)]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """
+        Embed documents in length-sorted batches
+
+        Args:
+            texts (List[str]): Texts to embed
+
+        Returns:
+            List[List[float]]: Embedding of each text, in the original order
+        """
+        if not texts:
+            return []
+
+        results: List[Optional[List[float]]] = [None] * len(texts)
+
+        for batch in self.get_sorted_batches(texts):
+            batch_embeddings = self.embeddings.embed_documents([texts[i] for i in batch])
+            for i, embedding in zip(batch, batch_embeddings):
+                results[i] = list(embedding)
+
+        return results
+
+    def embed_query(self, text: str) -> List[float]:
+        """
+        Embed a query
+
+        Args:
+            text (str): Query to embed
+
+        Returns:
+            List[float]: Embedding of the query
+        """
+        return self.embeddings.embed_query(text)
+
+def _init_embedding_worker(model_name: str, batch_size: int, threads_per_worker: int) -> None:
+    """
+    Load the embedding model once in a worker process
+
+    Args:
+        model_name (str): HuggingFace model to load
+        batch_size (int): Number of texts per forward pass
+        threads_per_worker (int): Torch intra-op threads of the worker
+    """
+    global _worker_embeddings
+
+    import torch
+    from langchain_huggingface import HuggingFaceEmbeddings
+
+    # Workers share the cores instead of each one using all of them
+    torch.set_num_threads(threads_per_worker)
+
+    _worker_embeddings = HuggingFaceEmbeddings(
+        model_name=model_name,
+        model_kwargs={'device': 'cpu'},
+        encode_kwargs={'batch_size': batch_size}
+    )
+
+def _embed_in_worker(texts: List[str]) -> List[List[float]]:
+    """
+    Embed a batch of texts with the model of the worker process
+
+    Args:
+        texts (List[str]): Texts to embed
+
+    Returns:
+        List[List[float]]: Embedding of each text
+    """
+    return _worker_embeddings.embed_documents(texts)
+
+class ProcessPoolEmbeddings(LengthSortedEmbeddings):
+    """LangChain embeddings that shard length-sorted batches across worker processes
+
+    Each worker holds its own copy of the model. Queries, small inputs and any
+    failure of the pool are served by the in-process embeddings.
+    """
+
+    def __init__(self,
+                 embeddings: Embeddings,
+                 model_name: str,
+                 workers: int,
+                 batch_size: int = 32):
+        """
+        Initialize the process pool embeddings
+
+        Args:
+            embeddings (Embeddings): In-process embeddings (queries and fallback)
+            model_name (str): HuggingFace model loaded by each worker
+            workers (int): Number of worker processes
+            batch_size (int): Number of texts per forward pass
+        """
+        super().__init__(embeddings, batch_size)
+        self.model_name = model_name
+        self.workers = workers
+
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+        self._pool_failed = False
+
+    def _get_executor(self) -> Optional[ProcessPoolExecutor]:
+        """
+        Return the worker pool, starting it on first use
+
+        Returns:
+            Optional[ProcessPoolExecutor]: Worker pool or None if it is not usable
+        """
+        with self._executor_lock:
+            if self._executor is None and not self._pool_failed:
+                try:
+                    threads_per_worker = max(1, (os.cpu_count() or 1) // self.workers)
+                    # spawn: forking a process that already loaded torch is unsafe
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.workers,
+                        mp_context=multiprocessing.get_context('spawn'),
+                        initializer=_init_embedding_worker,
+                        initargs=(self.model_name, self.batch_size, threads_per_worker)
+                    )
+                    logger.info(f"Started {self.workers} embedding worker processes ({threads_per_worker} threads each)")
+                except Exception as e:
+                    logger.error(f"Could not start embedding workers, embedding in-process: {e}")
+                    self._pool_failed = True
+
+            return self._executor
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """
+        Embed documents across the worker processes
+
+        Args:
+            texts (List[str]): Texts to embed
+
+        Returns:
+            List[List[float]]: Embedding of each text, in the original order
+        """
+        batches = self.get_sorted_batches(texts) if texts else []
+
+        # A single batch is not worth the inter-process round trip
+        executor = self._get_executor() if len(batches) > 1 else None
+        if executor is None:
+            return super().embed_documents(texts)
+
+        try:
+            results: List[Optional[List[float]]] = [None] * len(texts)
+            batch_texts = [[texts[i] for i in batch] for batch in batches]
+
+            # executor.map returns the batches in submission order
+            for batch, batch_embeddings in zip(batches, executor.map(_embed_in_worker, batch_texts)):
+                for i, embedding in zip(batch, batch_embeddings):
+                    results[i] = list(embedding)
+
+            return results
+
+        except Exception as e:
+            logger.error(f"Embedding workers failed, falling back to in-process embedding: {e}")
+            self.close()
+            self._pool_failed = True
+            return super().embed_documents(texts)
+
+    def close(self) -> None:
+        """
+        Stop the worker processes
+        """
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+class OnnxEmbeddings(Embeddings):
+    """LangChain embeddings served by an ONNX Runtime export of a HuggingFace model
+
+    The model is exported once (optionally with dynamic int8 quantization) and
+    cached on disk. Vectors are mean-pooled like sentence-transformers does for
+    plain BERT checkpoints, so they are comparable with HuggingFaceEmbeddings.
+    Requires the optional onnxruntime package (torch/transformers only for the export).
+    """
+
+    def __init__(self,
+                 model_name: str,
+                 cache_directory: str = "data/onnx_models",
+                 quantize: bool = True,
+                 batch_size: int = 32,
+                 max_length: int = 512):
+        """
+        Initialize the ONNX embeddings, exporting the model if it is not cached yet
+
+        Args:
+            model_name (str): HuggingFace model to export
+            cache_directory (str): Directory where exported models are stored
+            quantize (bool): Use the dynamic int8 quantized model
+            batch_size (int): Number of texts per inference call
+            max_length (int): Maximum number of tokens per text
+        """
+        import onnxruntime
+        from transformers import AutoTokenizer
+
+        self.model_name = model_name
+        self.quantize = quantize
+        self.batch_size = batch_size
+        self.max_length = max_length
+        self.model_directory = os.path.join(cache_directory, re.sub(r'[^\w.-]+', '__', model_name))
+
+        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+        model_path = self._ensure_exported_model()
+
+        session_options = onnxruntime.SessionOptions()
+        session_options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = onnxruntime.InferenceSession(
+            model_path, session_options, providers=['CPUExecutionProvider']
+        )
+        self.input_names = [model_input.name for model_input in self.session.get_inputs()]
+
+        logger.info(f"ONNX embedding model loaded: {model_path}")
+
+    def _ensure_exported_model(self) -> str:
+        """
+        Export (and quantize) the model unless it is already cached
+
+        Returns:
+            str: Path of the ONNX model to use
+        """
+        fp32_path = os.path.join(self.model_directory, "model.onnx")
+        int8_path = os.path.join(self.model_directory, "model.int8.onnx")
+
+        if not os.path.exists(fp32_path):
+            self._export_model(fp32_path)
+
+        if not self.quantize:
+            return fp32_path
+
+        if not os.path.exists(int8_path):
+            from onnxruntime.quantization import QuantType, quantize_dynamic
+
+            logger.info(f"Quantizing {fp32_path} to int8")
+            temp_path = f"{int8_path}.tmp"
+            quantize_dynamic(fp32_path, temp_path, weight_type=QuantType.QInt8)
+            os.replace(temp_path, int8_path)
+
+        return int8_path
+
+    def _export_model(self, onnx_path: str) -> None:
+        """
+        Export the HuggingFace model to ONNX with dynamic batch and sequence axes
+
+        Args:
+            onnx_path (str): Destination of the exported model
+        """
+        import inspect
+        import torch
+        from transformers import AutoModel
+
+        logger.info(f"Exporting {self.model_name} to ONNX")
+        os.makedirs(self.model_directory, exist_ok=True)
+
+        model = AutoModel.from_pretrained(self.model_name)
+        model.eval()
+
+        sample = self.tokenizer(["Exemplo de texto para exportação"], return_tensors='pt')
+        input_names = [name for name in ('input_ids', 'attention_mask', 'token_type_ids') if name in sample]
+        dynamic_axes = {name: {0: 'batch', 1: 'sequence'} for name in input_names + ['last_hidden_state']}
+
+        class LastHiddenState(torch.nn.Module):
+            """Expose only the token embeddings, with positional inputs"""
+
+            def __init__(self, wrapped_model):
+                super().__init__()
+                self.wrapped_model = wrapped_model
+
+            def forward(self, *inputs):
+                return self.wrapped_model(**dict(zip(input_names, inputs))).last_hidden_state
+
+        export_kwargs = dict(
+            input_names=input_names,
+            output_names=['last_hidden_state'],
+            dynamic_axes=dynamic_axes,
+            opset_version=14,
+            do_constant_folding=True
+        )
+        # Recent torch versions default to the dynamo exporter
+        if 'dynamo' in inspect.signature(torch.onnx.export).parameters:
+            export_kwargs['dynamo'] = False
+
+        temp_path = f"{onnx_path}.tmp"
+        with torch.no_grad():
+            torch.onnx.export(
+                LastHiddenState(model), tuple(sample[name] for name in input_names), temp_path, **export_kwargs
+            )
+        os.replace(temp_path, onnx_path)
+
+    def _embed_batch(self, texts: List[str]) -> np.ndarray:
+        """
+        Embed a batch of texts with mean pooling over the attention mask
+
+        Args:
+            texts (List[str]): Texts to embed
+
+        Returns:
+            np.ndarray: (len(texts), dimension) float32 matrix
+        """
+        encoded = self.tokenizer(
+            texts, padding=True, truncation=True, max_length=self.max_length, return_tensors='np'
+        )
+        inputs = {name: encoded[name].astype(np.int64) for name in self.input_names}
+        token_embeddings = self.session.run(None, inputs)[0]
+
+        mask = encoded['attention_mask'][..., None].astype(np.float32)
+        return (token_embeddings * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """
+        Embed documents
+
+        Args:
+            texts (List[str]): Texts to embed
+
+        Returns:
+            List[List[float]]: Embedding of each text
+        """
+        results = []
+        for start in range(0, len(texts), self.batch_size):
+            results.extend(self._embed_batch(texts[start:start + self.batch_size]).tolist())
+        return results
+
+    def embed_query(self, text: str) -> List[float]:
+        """
+        Embed a query
+
+        Args:
+            text (str): Query to embed
+
+        Returns:
+            List[float]: Embedding of the query
+        """
+        return self._embed_batch([text])[0].tolist()
+
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        """
+        Embed several queries in batches (queries are embedded like documents, without prompts)
+
+        Args:
+            texts (List[str]): Queries to embed
+
+        Returns:
+            List[List[float]]: Embedding of each query
+        """
+        return self.embed_documents(texts)
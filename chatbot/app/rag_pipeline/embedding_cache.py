@@ -0,0 +1,254 @@
+"""
+Embedding Cache Module - Responsible for persisting computed embeddings on local disk
+"""
+
+from langchain_core.embeddings import Embeddings
+from typing import List, Optional
+import hashlib
+import logging
+import os
+import re
+import sqlite3
+import threading
+import unicodedata
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+def normalize_cache_text(text: str) -> str:
+    """
+    Normalize a text before hashing it as a cache key
+
+    Args:
+        text (str): Text to normalize
+
+    Returns:
+        str: NFC normalized text without surrounding whitespace
+    """
+    return unicodedata.normalize('NFC', text).strip()
+
+class EmbeddingCache:
+    """Class to store embeddings keyed by (model name, normalized text hash)
+
+    Row numbers live in a SQLite index and the vectors in a float32 file that is
+    read through a memory map, so lookups never load the whole cache in memory.
+    """
+
+    def __init__(self, cache_directory: str, model_name: str):
+        """
+        Initialize the embedding cache
+
+        Args:
+            cache_directory (str): Base directory of the cache (one subdirectory per model)
+            model_name (str): Name of the embedding model the vectors come from
+        """
+        self.model_name = model_name
+        self.cache_directory = os.path.join(cache_directory, re.sub(r'[^\w.-]+', '__', model_name))
+        self.vectors_path = os.path.join(self.cache_directory, "vectors.f32")
+
+        os.makedirs(self.cache_directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(
+            os.path.join(self.cache_directory, "index.sqlite"),
+            check_same_thread=False,
+            timeout=60
+        )
+        self._connection.execute("CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, row INTEGER NOT NULL)")
+        self._connection.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        self._connection.commit()
+
+        self.dimension = self._get_dimension()
+        self._vectors: Optional[np.memmap] = None
+
+    def _get_dimension(self) -> Optional[int]:
+        """
+        Return the vector dimension stored in the cache, if any
+
+        Returns:
+            Optional[int]: Dimension or None for an empty cache
+        """
+        row = self._connection.execute("SELECT value FROM meta WHERE name = 'dimension'").fetchone()
+        return int(row[0]) if row else None
+
+    def _get_row_count(self) -> int:
+        """
+        Return the number of complete vectors in the vectors file
+
+        Returns:
+            int: Number of rows
+        """
+        if not self.dimension or not os.path.exists(self.vectors_path):
+            return 0
+        return os.path.getsize(self.vectors_path) // (self.dimension * 4)
+
+    def _get_vectors(self, min_rows: int) -> np.memmap:
+        """
+        Return a memory map of the vectors file covering at least min_rows rows
+
+        Args:
+            min_rows (int): Number of rows that must be mapped
+
+        Returns:
+            np.memmap: Read-only (rows, dimension) float32 matrix
+        """
+        if self._vectors is None or self._vectors.shape[0] < min_rows:
+            self._vectors = np.memmap(
+                self.vectors_path,
+                dtype=np.float32,
+                mode='r',
+                shape=(self._get_row_count(), self.dimension)
+            )
+        return self._vectors
+
+    def get_key(self, text: str) -> str:
+        """
+        Return the cache key of a text
+
+        Args:
+            text (str): Text that was embedded
+
+        Returns:
+            str: Hexadecimal key
+        """
+        return hashlib.sha256(f"{self.model_name}\x1f{normalize_cache_text(text)}".encode('utf-8')).hexdigest()
+
+    def get_many(self, texts: List[str]) -> List[Optional[List[float]]]:
+        """
+        Look up the embeddings of several texts
+
+        Args:
+            texts (List[str]): Texts to look up
+
+        Returns:
+            List[Optional[List[float]]]: Embedding of each text or None on a miss
+        """
+        if not texts or self.dimension is None:
+            return [None] * len(texts)
+
+        keys = [self.get_key(text) for text in texts]
+
+        with self._lock:
+            rows = {}
+            # SQLite limits the number of parameters of a single statement
+            for start in range(0, len(keys), 500):
+                batch = keys[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows.update(self._connection.execute(
+                    f"SELECT key, row FROM embeddings WHERE key IN ({placeholders})", batch
+                ).fetchall())
+
+            if not rows:
+                return [None] * len(texts)
+
+            vectors = self._get_vectors(max(rows.values()) + 1)
+            return [vectors[rows[key]].tolist() if key in rows else None for key in keys]
+
+    def put_many(self, texts: List[str], embeddings: List[List[float]]) -> None:
+        """
+        Store the embeddings of several texts
+
+        Args:
+            texts (List[str]): Texts that were embedded
+            embeddings (List[List[float]]): Embedding of each text
+        """
+        if not texts:
+            return
+
+        matrix = np.asarray(embeddings, dtype=np.float32)
+
+        with self._lock:
+            try:
+                # BEGIN IMMEDIATE serializes writers across processes sharing the cache
+                self._connection.execute("BEGIN IMMEDIATE")
+
+                if self.dimension is None:
+                    self.dimension = self._get_dimension() or matrix.shape[1]
+                    self._connection.execute(
+                        "INSERT OR IGNORE INTO meta (name, value) VALUES ('dimension', ?)", (str(self.dimension),)
+                    )
+                if matrix.shape[1] != self.dimension:
+                    raise ValueError(f"Embedding dimension {matrix.shape[1]} does not match cache dimension {self.dimension}")
+
+                # Drop a partially written trailing vector left by a crash
+                start_row = self._get_row_count()
+                if os.path.exists(self.vectors_path):
+                    with open(self.vectors_path, 'r+b') as file:
+                        file.truncate(start_row * self.dimension * 4)
+
+                with open(self.vectors_path, 'ab') as file:
+                    file.write(matrix.tobytes())
+
+                self._connection.executemany(
+                    "INSERT OR REPLACE INTO embeddings (key, row) VALUES (?, ?)",
+                    [(self.get_key(text), start_row + i) for i, text in enumerate(texts)]
+                )
+                self._connection.commit()
+
+            except Exception as e:
+                self._connection.rollback()
+                logger.warning(f"Could not store embeddings in cache: {e}")
+
+    def count(self) -> int:
+        """
+        Return the number of cached embeddings
+
+        Returns:
+            int: Number of cached embeddings
+        """
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+class CachedEmbeddings(Embeddings):
+    """LangChain embeddings that serve document embeddings from an EmbeddingCache"""
+
+    def __init__(self, embeddings: Embeddings, cache: EmbeddingCache):
+        """
+        Initialize the cached embeddings
+
+        Args:
+            embeddings (Embeddings): Embeddings used on cache misses
+            cache (EmbeddingCache): Persistent cache
+        """
+        self.embeddings = embeddings
+        self.cache = cache
+        self.hits = 0
+        self.misses = 0
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """
+        Embed documents, computing only the ones that are not cached
+
+        Args:
+            texts (List[str]): Texts to embed
+
+        Returns:
+            List[List[float]]: Embedding of each text
+        """
+        results = self.cache.get_many(texts)
+        missing = [i for i, embedding in enumerate(results) if embedding is None]
+
+        self.hits += len(texts) - len(missing)
+        self.misses += len(missing)
+
+        if missing:
+            missing_texts = [texts[i] for i in missing]
+            missing_embeddings = self.embeddings.embed_documents(missing_texts)
+            self.cache.put_many(missing_texts, missing_embeddings)
+            for i, embedding in zip(missing, missing_embeddings):
+                results[i] = list(embedding)
+
+        return results
+
+    def embed_query(self, text: str) -> List[float]:
+        """
+        Embed a query (queries are not stored in the document cache)
+
+        Args:
+            text (str): Query to embed
+
+        Returns:
+            List[float]: Embedding of the query
+        """
+        return self.embeddings.embed_query(text)
@@ -0,0 +1,123 @@
+"""
+Extraction Cache Module - Responsible for caching extracted PDF pages on disk
+"""
+
+from langchain_core.documents import Document
+from typing import List, Optional
+import gzip
+import hashlib
+import json
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+def hash_file(file_path: str, block_size: int = 1024 * 1024) -> str:
+    """
+    Compute the sha256 of a file content
+
+    Args:
+        file_path (str): Path to the file
+        block_size (int): Size of the blocks read from the file
+
+    Returns:
+        str: Hexadecimal sha256 digest
+    """
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as file:
+        for block in iter(lambda: file.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+class ExtractionCache:
+    """Class to store extracted pages keyed by file content and extractor version"""
+
+    def __init__(self, cache_directory: str, extractor_version: str):
+        """
+        Initialize the extraction cache
+
+        Args:
+            cache_directory (str): Directory where the cache entries are stored
+            extractor_version (str): Version of the extraction logic, part of every key
+        """
+        self.cache_directory = cache_directory
+        self.extractor_version = extractor_version
+
+        os.makedirs(self.cache_directory, exist_ok=True)
+
+    def get_key(self, file_hash: str) -> str:
+        """
+        Return the cache key of a file
+
+        Args:
+            file_hash (str): sha256 of the file content
+
+        Returns:
+            str: Cache key
+        """
+        return hashlib.sha256(f"{self.extractor_version}:{file_hash}".encode('utf-8')).hexdigest()
+
+    def _get_entry_path(self, key: str) -> str:
+        """
+        Return the path of a cache entry (sharded by the first two characters of the key)
+
+        Args:
+            key (str): Cache key
+
+        Returns:
+            str: Path of the compressed JSONL file
+        """
+        return os.path.join(self.cache_directory, key[:2], f"{key}.jsonl.gz")
+
+    def load(self, file_hash: str) -> Optional[List[Document]]:
+        """
+        Load the pages of a file from the cache
+
+        Args:
+            file_hash (str): sha256 of the file content
+
+        Returns:
+            Optional[List[Document]]: Cached pages or None on a cache miss
+        """
+        entry_path = self._get_entry_path(self.get_key(file_hash))
+
+        if not os.path.exists(entry_path):
+            return None
+
+        try:
+            documents = []
+            with gzip.open(entry_path, 'rt', encoding='utf-8') as file:
+                for line in file:
+                    record = json.loads(line)
+                    documents.append(Document(page_content=record['page_content'], metadata=record['metadata']))
+            return documents
+
+        except Exception as e:
+            logger.warning(f"Invalid extraction cache entry {entry_path}: {e}")
+            return None
+
+    def store(self, file_hash: str, documents: List[Document]) -> None:
+        """
+        Store the pages of a file in the cache
+
+        Args:
+            file_hash (str): sha256 of the file content
+            documents (List[Document]): Pages extracted from the file
+        """
+        entry_path = self._get_entry_path(self.get_key(file_hash))
+        temp_path = f"{entry_path}.{os.getpid()}.tmp"
+
+        try:
+            os.makedirs(os.path.dirname(entry_path), exist_ok=True)
+            with gzip.open(temp_path, 'wt', encoding='utf-8') as file:
+                for doc in documents:
+                    record = {'page_content': doc.page_content, 'metadata': doc.metadata}
+                    file.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+
+            # Atomic rename so concurrent readers never see a partial entry
+            os.replace(temp_path, entry_path)
+
+        except Exception as e:
+            logger.warning(f"Could not store extraction cache entry {entry_path}: {e}")
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
@@ -0,0 +1,500 @@
+"""
+Lexical Index Module - Responsible for BM25 keyword search over the chunks of a collection
+"""
+
+from langchain_core.documents import Document
+from .query_cache import LRUCache
+from .text_utils import fold_accents
+from .vector_backends import matches_filter, write_json_atomic
+
+from collections import Counter
+from functools import lru_cache
+from typing import List, Dict, Any, Optional, Tuple
+import gzip
+import json
+import logging
+import os
+import re
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+STOPWORDS = {
+    "a", "ao", "aos", "as", "com", "como", "da", "das", "de", "do", "dos", "e", "em", "entre",
+    "lhe", "mais", "mas", "na", "nas", "no", "nos", "o", "os", "ou", "para", "pela", "pelas",
+    "pelo", "pelos", "por", "qual", "quais", "que", "se", "sem", "sobre", "sua", "suas", "seu",
+    "seus", "um", "uma", "umas", "uns"
+}
+
+# (suffix, replacement) applied to plurals, then derivational suffixes removed, longest first
+PLURAL_SUFFIXES = [("oes", "ao"), ("aes", "ao"), ("ais", "al"), ("eis", "el"), ("ois", "ol"), ("ns", "m"), ("res", "r")]
+DERIVATIONAL_SUFFIXES = [
+    "amentos", "imentos", "amento", "imento", "mente", "idades", "idade", "acoes", "acao",
+    "icao", "ancia", "encia", "adora", "ador", "avel", "ivel", "ismo", "ista", "ante", "oso", "osa", "ivo", "iva"
+]
+MIN_STEM_LENGTH = 3
+
+# Terms found in more than this fraction of the chunks are scored with a dense weight vector
+DENSE_TERM_FRACTION = 0.125
+
+@lru_cache(maxsize=65536)
+def stem(token: str) -> str:
+    """
+    Reduce a folded Portuguese token to a light stem (plural, common suffixes and final vowel)
+
+    Args:
+        token (str): Folded token
+
+    Returns:
+        str: Stem of the token (numbers are kept as they are)
+    """
+    if token.isdigit() or len(token) <= MIN_STEM_LENGTH:
+        return token
+
+    for suffix, replacement in PLURAL_SUFFIXES:
+        if token.endswith(suffix) and len(token) - len(suffix) > 1:
+            token = token[:-len(suffix)] + replacement
+            break
+    else:
+        if token.endswith("s") and not token.endswith(("ss", "us", "is")):
+            token = token[:-1]
+
+    for suffix in DERIVATIONAL_SUFFIXES:
+        if token.endswith(suffix) and len(token) - len(suffix) >= MIN_STEM_LENGTH:
+            token = token[:-len(suffix)]
+            break
+
+    if token[-1] in "aeo" and len(token) > MIN_STEM_LENGTH:
+        token = token[:-1]
+    return token
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split a text into BM25 terms
+
+    Accents are folded, separators inside numbers are dropped so legal references
+    match however they are written ("15.865" and "15865"), stopwords are removed
+    and words are stemmed.
+
+    Args:
+        text (str): Text to tokenize
+
+    Returns:
+        List[str]: Terms of the text
+    """
+    text = re.sub(r'(?<=\d)[.,](?=\d)', '', fold_accents(text))
+    return [stem(token) for token in re.findall(r'[a-z0-9]+', text) if token not in STOPWORDS]
+
+class BM25Index:
+    """Class to search chunks by keywords with Okapi BM25
+
+    Postings are kept per term and turned into (rows, weights) arrays on first
+    use, so a query costs one vectorized accumulation per query term. add and
+    delete must not run while the index is searched: pipelines update a copy
+    loaded from disk and swap it in.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        """
+        Initialize an empty index
+
+        Args:
+            k1 (float): Term frequency saturation
+            b (float): Document length normalization
+        """
+        self.k1 = k1
+        self.b = b
+        self.ids: List[str] = []
+        self.texts: List[Optional[str]] = []
+        self.metadatas: List[Optional[Dict[str, Any]]] = []
+        self.term_frequencies: List[Optional[Dict[str, int]]] = []
+        self.doc_lengths: List[int] = []
+        self.rows: Dict[str, int] = {}
+        self.postings: Dict[str, Dict[int, int]] = {}
+        self.total_length = 0
+        self.live_count = 0
+        self.version = None
+        self.directory = None
+        self._term_weights: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        self._filter_masks = LRUCache(64)
+
+    def _invalidate(self) -> None:
+        """
+        Drop the cached term weights and filter masks after a change
+        """
+        self._term_weights = {}
+        self._filter_masks.clear()
+
+    def _remove_row(self, row: int) -> None:
+        """
+        Remove the postings of a row
+
+        Args:
+            row (int): Row to remove
+        """
+        term_frequencies = self.term_frequencies[row]
+        if term_frequencies is None:
+            return
+
+        for term in term_frequencies:
+            postings = self.postings.get(term)
+            if postings is not None:
+                postings.pop(row, None)
+                if not postings:
+                    del self.postings[term]
+
+        self.total_length -= self.doc_lengths[row]
+        self.live_count -= 1
+        self.term_frequencies[row] = None
+        self.texts[row] = None
+        self.metadatas[row] = None
+
+    def add(self,
+            ids: List[str],
+            texts: List[str],
+            metadatas: List[Dict[str, Any]],
+            term_frequencies: Optional[List[Dict[str, int]]] = None) -> None:
+        """
+        Add chunks, replacing chunks already in the index
+
+        Args:
+            ids (List[str]): Chunk IDs
+            texts (List[str]): Chunk texts
+            metadatas (List[Dict[str, Any]]): Chunk metadata
+            term_frequencies (Optional[List[Dict[str, int]]]): Precomputed terms of each text
+        """
+        for i, (chunk_id, text, metadata) in enumerate(zip(ids, texts, metadatas)):
+            row = self.rows.get(chunk_id)
+            if row is None:
+                row = len(self.ids)
+                self.rows[chunk_id] = row
+                self.ids.append(chunk_id)
+                self.texts.append(None)
+                self.metadatas.append(None)
+                self.term_frequencies.append(None)
+                self.doc_lengths.append(0)
+            else:
+                self._remove_row(row)
+
+            frequencies = term_frequencies[i] if term_frequencies else dict(Counter(tokenize(text)))
+            for term, frequency in frequencies.items():
+                self.postings.setdefault(term, {})[row] = frequency
+
+            self.texts[row] = text
+            self.metadatas[row] = metadata
+            self.term_frequencies[row] = frequencies
+            self.doc_lengths[row] = sum(frequencies.values())
+            self.total_length += self.doc_lengths[row]
+            self.live_count += 1
+
+        self._invalidate()
+
+    def add_from_chroma(self, vector_store, ids: Optional[List[str]] = None, batch_size: int = 1000) -> None:
+        """
+        Index chunks of a Chroma collection
+
+        Args:
+            vector_store: Chroma vector store
+            ids (Optional[List[str]]): Chunks to index (defaults to the whole collection)
+            batch_size (int): Number of chunks read per request
+        """
+        collection = vector_store._collection
+        if ids is None:
+            batches = (
+                collection.get(include=["documents", "metadatas"], limit=batch_size, offset=offset)
+                for offset in range(0, collection.count(), batch_size)
+            )
+        else:
+            batches = (
+                collection.get(ids=ids[start:start + batch_size], include=["documents", "metadatas"])
+                for start in range(0, len(ids), batch_size)
+            )
+
+        for result in batches:
+            self.add(result["ids"], result["documents"], [metadata or {} for metadata in result["metadatas"]])
+
+    def delete(self, ids: List[str]) -> None:
+        """
+        Remove chunks from the index
+
+        Args:
+            ids (List[str]): Chunk IDs
+        """
+        for chunk_id in ids:
+            row = self.rows.get(chunk_id)
+            if row is not None:
+                self._remove_row(row)
+        self._invalidate()
+
+    def count(self) -> int:
+        """
+        Return the number of indexed chunks
+
+        Returns:
+            int: Number of chunks
+        """
+        return self.live_count
+
+    def _get_idf(self, term: str) -> float:
+        """
+        Return the inverse document frequency of a term
+
+        Args:
+            term (str): Index term
+
+        Returns:
+            float: BM25 IDF (highest for terms absent from the index)
+        """
+        document_frequency = len(self.postings.get(term, ()))
+        return float(np.log(1.0 + (self.live_count - document_frequency + 0.5) / (document_frequency + 0.5)))
+
+    def get_reference_score(self, query: str) -> float:
+        """
+        Return the score of a chunk of average length containing every query term once
+
+        Dividing a BM25 score by it gives the share of the query a chunk matches,
+        weighted by how rare each term is (about 1 when every term matches).
+
+        Args:
+            query (str): Query text
+
+        Returns:
+            float: Reference score (0 for a query without index terms)
+        """
+        return sum(query_frequency * self._get_idf(term) for term, query_frequency in Counter(tokenize(query)).items())
+
+    def _get_term_weights(self, term: str) -> Tuple[Optional[np.ndarray], np.ndarray]:
+        """
+        Return the rows containing a term and their BM25 weight for it
+
+        Scattering weights into many rows costs more than adding a vector over
+        all rows, so the weights of common terms are expanded to every row.
+
+        Args:
+            term (str): Index term
+
+        Returns:
+            Tuple[Optional[np.ndarray], np.ndarray]: Rows and weights, or None and the weight of every row
+        """
+        cached = self._term_weights.get(term)
+        if cached is not None:
+            return cached
+
+        postings = self.postings.get(term, {})
+        rows = np.fromiter(postings.keys(), dtype=np.int64, count=len(postings))
+        frequencies = np.fromiter(postings.values(), dtype=np.float32, count=len(postings))
+        lengths = np.asarray(self.doc_lengths, dtype=np.float32)[rows]
+
+        average_length = self.total_length / self.live_count if self.live_count else 1.0
+        idf = self._get_idf(term)
+        weights = idf * frequencies * (self.k1 + 1) / (frequencies + self.k1 * (1 - self.b + self.b * lengths / average_length))
+
+        weights = weights.astype(np.float32)
+        if len(rows) > DENSE_TERM_FRACTION * len(self.ids):
+            dense_weights = np.zeros(len(self.ids), dtype=np.float32)
+            dense_weights[rows] = weights
+            rows, weights = None, dense_weights
+
+        self._term_weights[term] = (rows, weights)
+        return self._term_weights[term]
+
+    def _get_filter_mask(self, where: Dict[str, Any]) -> np.ndarray:
+        """
+        Return the rows that pass a metadata filter (masks are cached per filter)
+
+        Args:
+            where (Dict[str, Any]): Chroma style metadata filter
+
+        Returns:
+            np.ndarray: Boolean mask over the rows
+        """
+        key = json.dumps(where, sort_keys=True, default=str)
+        mask = self._filter_masks.get(key)
+        if mask is None:
+            mask = np.fromiter(
+                (metadata is not None and matches_filter(metadata, where) for metadata in self.metadatas),
+                dtype=bool, count=len(self.metadatas)
+            )
+            self._filter_masks.put(key, mask)
+        return mask
+
+    def search(self, query: str, k: int = 4, filter: Optional[Dict[str, Any]] = None) -> List[Tuple[int, float]]:
+        """
+        Return the rows with the highest BM25 score for a query
+
+        Args:
+            query (str): Query text
+            k (int): Maximum number of results
+            filter (Optional[Dict[str, Any]]): Chroma style metadata filter
+
+        Returns:
+            List[Tuple[int, float]]: (row, score) pairs sorted by decreasing score
+        """
+        terms = Counter(tokenize(query))
+        if not terms or not self.live_count or k <= 0:
+            return []
+
+        scores = np.zeros(len(self.ids), dtype=np.float32)
+        matched_rows = []
+        matched_count = 0
+        for term, query_frequency in terms.items():
+            rows, weights = self._get_term_weights(term)
+            if query_frequency > 1:
+                weights = query_frequency * weights
+            if rows is None:
+                scores += weights
+                matched_count = len(scores)
+            elif len(rows):
+                scores[rows] += weights
+                matched_rows.append(rows)
+                matched_count += len(rows)
+
+        if not matched_count:
+            return []
+
+        if filter:
+            scores[~self._get_filter_mask(filter)] = 0.0
+
+        # Rank only the matched rows when they are few, otherwise every row
+        if matched_count > DENSE_TERM_FRACTION * len(scores):
+            candidates, candidate_scores = None, scores
+        else:
+            candidates = np.unique(np.concatenate(matched_rows))
+            candidate_scores = scores[candidates]
+
+        k = min(k, len(candidate_scores))
+        top = np.argpartition(-candidate_scores, k - 1)[:k]
+        top = top[np.argsort(-candidate_scores[top])]
+        return [
+            (int(i if candidates is None else candidates[i]), float(candidate_scores[i]))
+            for i in top if candidate_scores[i] > 0
+        ]
+
+    def similarity_search_with_score(self,
+                                     query: str,
+                                     k: int = 4,
+                                     filter: Optional[Dict[str, Any]] = None) -> List[Tuple[Document, float]]:
+        """
+        Return the chunks with the highest BM25 score for a query
+
+        Args:
+            query (str): Query text
+            k (int): Maximum number of results
+            filter (Optional[Dict[str, Any]]): Chroma style metadata filter
+
+        Returns:
+            List[Tuple[Document, float]]: Chunks and BM25 scores, higher is more relevant
+        """
+        return [
+            (Document(page_content=self.texts[row], metadata=dict(self.metadatas[row]), id=self.ids[row]), score)
+            for row, score in self.search(query, k, filter)
+        ]
+
+    @classmethod
+    def from_chroma(cls, vector_store, **options: Any) -> "BM25Index":
+        """
+        Build the index from the content of a Chroma collection
+
+        Args:
+            vector_store: Chroma vector store
+            **options: k1 and b
+
+        Returns:
+            BM25Index: Index with the content of the collection
+        """
+        index = cls(**options)
+        index.add_from_chroma(vector_store)
+        logger.info(f"BM25 index built from collection '{vector_store._collection.name}' with {index.count()} chunks")
+        return index
+
+    def save(self, directory: str, version: Optional[str] = None) -> None:
+        """
+        Persist the live chunks and their terms, writing info.json last to mark the files as complete
+
+        Args:
+            directory (str): Directory of the index files
+            version (Optional[str]): Version of the source index, checked by load_if_current
+        """
+        os.makedirs(directory, exist_ok=True)
+
+        info_path = os.path.join(directory, "info.json")
+        if os.path.exists(info_path):
+            os.remove(info_path)
+
+        live_rows = [row for row, frequencies in enumerate(self.term_frequencies) if frequencies is not None]
+        records = {
+            "ids": [self.ids[row] for row in live_rows],
+            "texts": [self.texts[row] for row in live_rows],
+            "metadatas": [self.metadatas[row] for row in live_rows],
+            "term_frequencies": [self.term_frequencies[row] for row in live_rows]
+        }
+
+        temp_path = os.path.join(directory, "records.json.gz.tmp")
+        with gzip.open(temp_path, 'wt', encoding='utf-8') as file:
+            json.dump(records, file, ensure_ascii=False)
+        os.replace(temp_path, os.path.join(directory, "records.json.gz"))
+
+        write_json_atomic(info_path, {"count": len(live_rows), "k1": self.k1, "b": self.b, "version": version})
+        self.directory = directory
+        self.version = version
+
+    @classmethod
+    def load(cls, directory: str, **options: Any) -> Optional["BM25Index"]:
+        """
+        Load a persisted index
+
+        Args:
+            directory (str): Directory of the index files
+            **options: k1 and b (a different value than the persisted one rebuilds the index)
+
+        Returns:
+            Optional[BM25Index]: Loaded index or None if it is absent, incomplete or built with other options
+        """
+        info_path = os.path.join(directory, "info.json")
+        if not os.path.exists(info_path):
+            return None
+
+        try:
+            with open(info_path, 'r', encoding='utf-8') as file:
+                info = json.load(file)
+
+            index = cls(**options)
+            if info["k1"] != index.k1 or info["b"] != index.b:
+                return None
+
+            with gzip.open(os.path.join(directory, "records.json.gz"), 'rt', encoding='utf-8') as file:
+                records = json.load(file)
+
+            index.add(records["ids"], records["texts"], records["metadatas"], records["term_frequencies"])
+            index.version = info.get("version")
+            index.directory = directory
+            return index
+
+        except Exception as e:
+            logger.error(f"Error loading BM25 index from {directory}: {e}")
+            return None
+
+    @classmethod
+    def load_if_current(cls, vector_store, directory: str, version: Optional[str], **options: Any) -> "BM25Index":
+        """
+        Load the persisted index if it matches the source version, otherwise rebuild and save it
+
+        Args:
+            vector_store: Chroma vector store the index mirrors
+            directory (str): Directory of the index files
+            version (Optional[str]): Version of the source index (None always rebuilds)
+            **options: k1 and b
+
+        Returns:
+            BM25Index: Index with the content of the collection
+        """
+        if version is not None:
+            index = cls.load(directory, **options)
+            if index is not None and index.version == version:
+                logger.info(f"BM25 index loaded from {directory} with {index.count()} chunks")
+                return index
+
+        index = cls.from_chroma(vector_store, **options)
+        index.save(directory, version)
+        return index
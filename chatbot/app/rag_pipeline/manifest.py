@@ -0,0 +1,227 @@
+"""
+Manifest Module - Responsible for tracking which files and chunks are in the knowledge base
+"""
+
+from .extraction_cache import hash_file
+
+from datetime import datetime, timezone
+from typing import List, Dict, Any, Optional
+import hashlib
+import json
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+class FileManifest:
+    """Class to persist (path, size, mtime, sha256) -> chunk IDs of the indexed files"""
+
+    def __init__(self, manifest_path: str):
+        """
+        Initialize the file manifest
+
+        Args:
+            manifest_path (str): Path of the JSON file where the manifest is persisted
+        """
+        self.manifest_path = manifest_path
+        self.files: Dict[str, Dict[str, Any]] = {}
+        self.load()
+
+    def load(self) -> None:
+        """
+        Load the manifest from disk (an absent or invalid file is an empty manifest)
+        """
+        self.files = {}
+
+        if not os.path.exists(self.manifest_path):
+            return
+
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as file:
+                self.files = json.load(file).get('files', {})
+        except Exception as e:
+            logger.error(f"Error loading file manifest {self.manifest_path}: {e}")
+
+    def save(self) -> None:
+        """
+        Persist the manifest to disk atomically
+        """
+        directory = os.path.dirname(self.manifest_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        temp_path = f"{self.manifest_path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as file:
+            json.dump({'files': self.files}, file, ensure_ascii=False, indent=2)
+        os.replace(temp_path, self.manifest_path)
+
+    def get(self, file_path: str) -> Optional[Dict[str, Any]]:
+        """
+        Return the manifest entry of a file
+
+        Args:
+            file_path (str): Path of the file
+
+        Returns:
+            Optional[Dict[str, Any]]: Entry with size, mtime, sha256 and chunk_ids, or None
+        """
+        return self.files.get(file_path)
+
+    def set(self, file_path: str, chunk_ids: List[str], sha256: Optional[str] = None) -> None:
+        """
+        Record the current state of a file and the IDs of its chunks
+
+        Args:
+            file_path (str): Path of the file
+            chunk_ids (List[str]): IDs of the chunks of the file in the vector store
+            sha256 (Optional[str]): Content hash if already known
+        """
+        stat = os.stat(file_path)
+        self.files[file_path] = {
+            'size': stat.st_size,
+            'mtime': stat.st_mtime,
+            'sha256': sha256 or hash_file(file_path),
+            'chunk_ids': list(chunk_ids)
+        }
+
+    def remove(self, file_path: str) -> None:
+        """
+        Remove a file from the manifest
+
+        Args:
+            file_path (str): Path of the file
+        """
+        self.files.pop(file_path, None)
+
+    def clear(self) -> None:
+        """
+        Remove every file from the manifest
+        """
+        self.files = {}
+
+    def get_corpus_hash(self) -> str:
+        """
+        Return a hash identifying the set of indexed files and their contents
+
+        Returns:
+            str: Hexadecimal sha256 of the sorted (path, sha256) pairs
+        """
+        digest = hashlib.sha256()
+        for file_path in sorted(self.files):
+            digest.update(f"{file_path}\x1f{self.files[file_path]['sha256']}\n".encode('utf-8'))
+        return digest.hexdigest()
+
+    def diff(self, file_paths: List[str], base_directory: str) -> Dict[str, List[str]]:
+        """
+        Compare the files currently on disk with the manifest
+
+        Files whose size and mtime did not change are not hashed again. Only files
+        recorded under base_directory can be reported as removed.
+
+        Args:
+            file_paths (List[str]): Files currently under base_directory
+            base_directory (str): Directory that was scanned
+
+        Returns:
+            Dict[str, List[str]]: Paths grouped in 'added', 'modified', 'removed' and 'unchanged'
+        """
+        changes = {'added': [], 'modified': [], 'removed': [], 'unchanged': []}
+
+        for file_path in file_paths:
+            entry = self.files.get(file_path)
+            if entry is None:
+                changes['added'].append(file_path)
+                continue
+
+            stat = os.stat(file_path)
+            if stat.st_size == entry['size'] and stat.st_mtime == entry['mtime']:
+                changes['unchanged'].append(file_path)
+                continue
+
+            sha256 = hash_file(file_path)
+            if sha256 == entry['sha256']:
+                # Only touched, keep the chunks and remember the new mtime
+                entry['mtime'] = stat.st_mtime
+                changes['unchanged'].append(file_path)
+            else:
+                changes['modified'].append(file_path)
+
+        current_paths = set(file_paths)
+        base_prefix = os.path.join(base_directory, '')
+        for file_path in self.files:
+            if file_path.startswith(base_prefix) and file_path not in current_paths:
+                changes['removed'].append(file_path)
+
+        return changes
+
+class IndexManifest:
+    """Class to persist a small summary of a built index (model, chunking, counts, corpus hash)
+
+    Status checks read this file instead of opening the vector store.
+    """
+
+    def __init__(self, manifest_path: str):
+        """
+        Initialize the index manifest
+
+        Args:
+            manifest_path (str): Path of the JSON file where the manifest is persisted
+        """
+        self.manifest_path = manifest_path
+        self.data: Dict[str, Any] = {}
+        self.load()
+
+    def load(self) -> None:
+        """
+        Load the manifest from disk (an absent or invalid file is an empty manifest)
+        """
+        self.data = {}
+
+        if not os.path.exists(self.manifest_path):
+            return
+
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as file:
+                self.data = json.load(file)
+        except Exception as e:
+            logger.error(f"Error loading index manifest {self.manifest_path}: {e}")
+
+    def exists(self) -> bool:
+        """
+        Return whether an index has been recorded
+
+        Returns:
+            bool: True if the manifest holds an index summary
+        """
+        return bool(self.data)
+
+    def record(self, **fields: Any) -> None:
+        """
+        Update the summary of the index and persist it atomically
+
+        built_at is set on the first record and updated_at on every record.
+
+        Args:
+            **fields: Values to store (document_count, chunk_size, corpus_hash...)
+        """
+        now = datetime.now(timezone.utc).isoformat(timespec='seconds')
+        self.data.update(fields)
+        self.data.setdefault('built_at', now)
+        self.data['updated_at'] = now
+
+        directory = os.path.dirname(self.manifest_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        temp_path = f"{self.manifest_path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as file:
+            json.dump(self.data, file, ensure_ascii=False, indent=2)
+        os.replace(temp_path, self.manifest_path)
+
+    def clear(self) -> None:
+        """
+        Forget the recorded index and delete the manifest file
+        """
+        self.data = {}
+        if os.path.exists(self.manifest_path):
+            os.remove(self.manifest_path)
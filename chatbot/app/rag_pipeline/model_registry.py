@@ -0,0 +1,176 @@
+"""
+Model Registry Module - Responsible for sharing embedding models across the components of the same process
+"""
+
+from langchain_core.embeddings import Embeddings
+from typing import Dict, Any, Optional, Tuple
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+WARM_UP_TEXT = "O que é o ICMS?"
+
+# (model_name, backend) -> loaded embeddings
+_models: Dict[Tuple[str, str], Embeddings] = {}
+# (model_name, backend) -> load time, warm-up time and resident memory
+_model_stats: Dict[Tuple[str, str], Dict[str, Any]] = {}
+# One lock per key so that loading one model does not block the others
+_model_locks: Dict[Tuple[str, str], threading.Lock] = {}
+_registry_lock = threading.Lock()
+
+
+def get_resident_memory_mb() -> Optional[float]:
+    """
+    Return the resident memory of the current process
+
+    Uses psutil when it is installed and /proc/self/statm otherwise.
+
+    Returns:
+        Optional[float]: Resident set size in MB, or None if it cannot be read
+    """
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss / (1024 * 1024)
+    except ImportError:
+        pass
+
+    try:
+        with open("/proc/self/statm", "r") as file:
+            resident_pages = int(file.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def _get_key_lock(key: Tuple[str, str]) -> threading.Lock:
+    """
+    Return the lock that guards the loading of a model key
+
+    Args:
+        key (Tuple[str, str]): Registry key
+
+    Returns:
+        threading.Lock: Lock for the key
+    """
+    with _registry_lock:
+        lock = _model_locks.get(key)
+        if lock is None:
+            lock = threading.Lock()
+            _model_locks[key] = lock
+        return lock
+
+
+def _load_model(model_name: str, backend: str, batch_size: int) -> Embeddings:
+    """
+    Load an embedding model
+
+    Args:
+        model_name (str): HuggingFace model name
+        backend (str): "torch" (sentence-transformers) or "onnx" (int8 ONNX Runtime export)
+        batch_size (int): Number of texts per model forward pass
+
+    Returns:
+        Embeddings: Loaded embeddings
+    """
+    if backend == "onnx":
+        from .embedding_backends import OnnxEmbeddings
+        return OnnxEmbeddings(model_name, batch_size=batch_size)
+
+    if backend == "torch":
+        from langchain_huggingface import HuggingFaceEmbeddings
+        return HuggingFaceEmbeddings(
+            model_name=model_name,
+            model_kwargs={'device': 'cpu'}, # Force CPU usage
+            encode_kwargs={'batch_size': batch_size}
+        )
+
+    raise ValueError(f"Unknown embedding backend: {backend}")
+
+
+def get_embedding_model(model_name: str,
+                        backend: str = "torch",
+                        batch_size: int = 32,
+                        warm_up: bool = True) -> Embeddings:
+    """
+    Return the shared embeddings of a model, loading it on first use
+
+    The first load runs a warm-up inference so that the first user query does not
+    pay for tokenizer and graph initialization. Errors are raised to the caller.
+
+    Args:
+        model_name (str): HuggingFace model name
+        backend (str): "torch" (sentence-transformers) or "onnx" (int8 ONNX Runtime export)
+        batch_size (int): Number of texts per model forward pass (only used by the first load)
+        warm_up (bool): Run a warm-up inference after loading
+
+    Returns:
+        Embeddings: Loaded embeddings shared by the whole process
+    """
+    key = (model_name, backend)
+
+    model = _models.get(key)
+    if model is not None:
+        return model
+
+    with _get_key_lock(key):
+        # Another thread may have finished loading while we waited
+        model = _models.get(key)
+        if model is not None:
+            return model
+
+        logger.info(f"Loading embedding model {model_name} ({backend})")
+        memory_before = get_resident_memory_mb()
+
+        start_time = time.perf_counter()
+        model = _load_model(model_name, backend, batch_size)
+        load_seconds = time.perf_counter() - start_time
+
+        warm_up_seconds = None
+        if warm_up:
+            start_time = time.perf_counter()
+            model.embed_query(WARM_UP_TEXT)
+            warm_up_seconds = time.perf_counter() - start_time
+
+        memory_after = get_resident_memory_mb()
+        stats = {
+            "model_name": model_name,
+            "backend": backend,
+            "load_seconds": round(load_seconds, 3),
+            "warm_up_seconds": round(warm_up_seconds, 3) if warm_up_seconds is not None else None,
+            "rss_after_load_mb": round(memory_after, 1) if memory_after is not None else None,
+            "rss_delta_mb": round(memory_after - memory_before, 1) if memory_before is not None and memory_after is not None else None
+        }
+
+        _models[key] = model
+        _model_stats[key] = stats
+        logger.info(f"Embedding model {model_name} ({backend}) loaded in {stats['load_seconds']}s, "
+                    f"warm-up {stats['warm_up_seconds']}s, RSS +{stats['rss_delta_mb']} MB")
+        return model
+
+
+def clear_models() -> None:
+    """
+    Drop every shared model (they will be lazily loaded again)
+    """
+    with _registry_lock:
+        _models.clear()
+        _model_stats.clear()
+        _model_locks.clear()
+
+
+def get_model_registry_info() -> Dict[str, Any]:
+    """
+    Return information about the embedding models loaded in this process
+
+    Returns:
+        Dict[str, Any]: Loaded models with their load statistics and the current resident memory
+    """
+    memory = get_resident_memory_mb()
+    return {
+        "loaded_models": len(_models),
+        "models": [dict(stats) for stats in list(_model_stats.values())],
+        "rss_mb": round(memory, 1) if memory is not None else None
+    }
@@ -7,13 +7,36 @@ from .step2_chunking import DocumentChunker
 from .step3_embedding import EmbeddingManager
 from .step4_search import SearchEngine
 from .step5_chat import RAGChatbot
+from .manifest import FileManifest
+from .collection_versions import CollectionPointer, make_version_name
+from .checkpoint import BuildCheckpoint, BuildProgress
+from .vector_backends import HnswVectorIndex, NumpyVectorIndex
+from .lexical_index import BM25Index
+from .reranker import CrossEncoderReranker
+from .document_metadata import METADATA_VERSION
+from .model_registry import get_model_registry_info
 
-from typing import List, Dict, Any, Optional
+from langchain_core.documents import Document
+from collections import deque
+from typing import List, Dict, Any, Callable, Iterator, Optional, Tuple
 import logging
 import os
+import shutil
 
 logger = logging.getLogger(__name__)
 
+# search_backend -> in-process index mirroring the Chroma collection
+SEARCH_INDEX_CLASSES = {
+    "numpy": NumpyVectorIndex,
+    "hnsw": HnswVectorIndex
+}
+
+# Directory suffix of the BM25 index of a collection
+LEXICAL_INDEX_NAME = "bm25"
+
+# Queries that must return results before a blue/green build goes live
+DEFAULT_SMOKE_QUERIES = ["O que é o ICMS?"]
+
 class RAGPipeline:
     """Main class that integrates all the steps of the RAG pipeline"""
     
@@ -22,7 +45,24 @@ class RAGPipeline:
                  collection_name: str = "sefaz_docs",
                  persist_directory: str = "data/chroma_db",
                  chunk_size: int = 1500,
-                 chunk_overlap: int = 200):
+                 chunk_overlap: int = 200,
+                 extraction_workers: Optional[int] = 1,
+                 extraction_cache_directory: Optional[str] = "data/extraction_cache",
+                 ingestion_batch_size: int = 256,
+                 embedding_workers: int = 1,
+                 embedding_backend: str = "torch",
+                 distance_space: str = "cosine",
+                 blue_green: bool = False,
+                 smoke_queries: Optional[List[str]] = None,
+                 version_grace_seconds: float = 3600,
+                 search_backend: str = "chroma",
+                 hnsw_params: Optional[Dict[str, int]] = None,
+                 lexical_search: bool = True,
+                 rerank: bool = False,
+                 reranker_params: Optional[Dict[str, Any]] = None,
+                 mmr_lambda: Optional[float] = None,
+                 merge_adjacent_chunks: bool = False,
+                 program_filter: bool = True):
         """
         Initializes the RAG pipeline
         
@@ -32,17 +72,70 @@ class RAGPipeline:
             persist_directory (str): Directory to persist the vector store
             chunk_size (int): Size of the chunks
             chunk_overlap (int): Overlap between chunks
+            extraction_workers (Optional[int]): Worker processes for PDF extraction (None uses all CPU cores)
+            extraction_cache_directory (Optional[str]): Directory of the extracted pages cache (None disables it)
+            ingestion_batch_size (int): Number of chunks embedded and written per batch (raised to
+                                        keep every embedding worker busy)
+            embedding_workers (int): Worker processes embedding chunks during builds (1 embeds in-process)
+            embedding_backend (str): "torch" (sentence-transformers) or "onnx" (int8 ONNX Runtime export)
+            distance_space (str): Distance function of the collection: "cosine", "l2" or "ip"
+            blue_green (bool): Rebuild into a new collection version and switch to it once validated
+            smoke_queries (Optional[List[str]]): Queries that must return results before a version goes live
+            version_grace_seconds (float): Time a replaced version is kept before being deleted
+            search_backend (str): "chroma", "numpy" (exact search over an in-process, memory-mapped matrix)
+                                  or "hnsw" (approximate search with hnswlib, optional dependency)
+            hnsw_params (Optional[Dict[str, int]]): M, ef_construction and ef_search of the "hnsw" backend
+            lexical_search (bool): Keep a BM25 index of the chunks and fuse it with similarity in hybrid searches
+            rerank (bool): Retrieve a wider candidate set and keep the top k by cross-encoder score
+            reranker_params (Optional[Dict[str, Any]]): Options of CrossEncoderReranker (model_name, batch_size,
+                                                        min_score, ...) and rerank_candidates
+            mmr_lambda (Optional[float]): Select results by maximal marginal relevance with this lambda
+                                          (1 = relevance only, 0 = diversity only, None disables it)
+            merge_adjacent_chunks (bool): Merge consecutive chunks of the same page, without their overlap,
+                                          in the chatbot context
+            program_filter (bool): Restrict searches to the incentive programs named in the query
         """
         self.documents_path = documents_path
         self.collection_name = collection_name
         self.persist_directory = persist_directory
         self.chunk_size = chunk_size
         self.chunk_overlap = chunk_overlap
+        self.extraction_workers = extraction_workers
+        self.extraction_cache_directory = extraction_cache_directory
+        self.ingestion_batch_size = ingestion_batch_size
+        self.embedding_workers = embedding_workers
+        self.embedding_backend = embedding_backend
+        self.distance_space = distance_space
+        self.blue_green = blue_green
+        self.smoke_queries = DEFAULT_SMOKE_QUERIES if smoke_queries is None else smoke_queries
+        self.version_grace_seconds = version_grace_seconds
+        self.search_backend = search_backend
+        self.hnsw_params = {"M": 16, "ef_construction": 200, "ef_search": 64, **(hnsw_params or {})}
+        self.lexical_search = lexical_search
+        
+        # The reranker (and its score cache) is shared by the search engines of every collection version
+        reranker_params = dict(reranker_params or {})
+        self.rerank_candidates = reranker_params.pop("rerank_candidates", 30)
+        self.reranker = CrossEncoderReranker(**reranker_params) if rerank else None
+        self.mmr_lambda = mmr_lambda
+        self.merge_adjacent_chunks = merge_adjacent_chunks
+        self.program_filter = program_filter
+        
+        # The collection actually served is the version the pointer designates, if any
+        self.collection_pointer = CollectionPointer(persist_directory, collection_name)
+        self.active_collection = self.collection_pointer.read() or collection_name
         
         # Initializes components
-        self.extractor = DocumentExtractor(documents_path)
+        self.extractor = DocumentExtractor(documents_path, extraction_workers, extraction_cache_directory)
         self.chunker = DocumentChunker(chunk_size, chunk_overlap)
-        self.embedding_manager = EmbeddingManager(collection_name, persist_directory)
+        self.embedding_manager = self._create_embedding_manager(self.active_collection)
+        self.file_manifest = self._create_file_manifest(self.active_collection)
+        
+        # Files already committed by an interrupted build, so that it can be resumed
+        self.build_checkpoint = BuildCheckpoint(
+            os.path.join(persist_directory, f"{collection_name}_build_checkpoint.json")
+        )
+        self.build_progress = None
         
         # Components that will be initialized after processing
         self.search_engine = None
@@ -50,12 +143,533 @@ class RAGPipeline:
         
         logger.info("RAG pipeline initialized")
     
-    def build_knowledge_base(self, force_rebuild: bool = False) -> bool:
+    def _create_embedding_manager(self, collection_name: str) -> EmbeddingManager:
+        """
+        Create the embedding manager of a (possibly versioned) collection
+        
+        Args:
+            collection_name (str): Name of the collection in the vector store
+            
+        Returns:
+            EmbeddingManager: Embedding manager with the pipeline settings
+        """
+        return EmbeddingManager(
+            collection_name, self.persist_directory,
+            ingestion_batch_size=self.ingestion_batch_size,
+            embedding_workers=self.embedding_workers,
+            embedding_backend=self.embedding_backend,
+            distance_space=self.distance_space
+        )
+    
+    def _create_file_manifest(self, collection_name: str) -> FileManifest:
+        """
+        Create the file manifest of a (possibly versioned) collection
+        
+        Args:
+            collection_name (str): Name of the collection in the vector store
+            
+        Returns:
+            FileManifest: File manifest of the collection
+        """
+        return FileManifest(os.path.join(self.persist_directory, f"{collection_name}_files.json"))
+    
+    def _get_search_index_directory(self, collection_name: str, search_backend: Optional[str] = None) -> str:
+        """
+        Return the directory of the in-process search index of a collection
+        
+        Args:
+            collection_name (str): Name of the collection in the vector store
+            search_backend (Optional[str]): Backend of the index (defaults to the pipeline setting)
+            
+        Returns:
+            str: Directory path, next to the index manifest
+        """
+        return os.path.join(self.persist_directory, f"{collection_name}_{search_backend or self.search_backend}")
+    
+    def _get_search_index_version(self, embedding_manager: EmbeddingManager) -> Optional[str]:
+        """
+        Return the version of a collection an in-process index must match
+        
+        Args:
+            embedding_manager (EmbeddingManager): Manager of the collection
+            
+        Returns:
+            Optional[str]: Version from the index manifest, or None if the collection has no manifest
+        """
+        index_info = embedding_manager.index_manifest.data
+        if not index_info:
+            return None
+        return f"{index_info['document_count']}@{index_info['updated_at']}@{index_info.get('corpus_hash')}"
+    
+    def _open_search_backend(self, vector_store, embedding_manager: Optional[EmbeddingManager] = None):
+        """
+        Return the store searches are run against for a loaded vector store
+        
+        Args:
+            vector_store: Loaded vector store (Chroma)
+            embedding_manager (Optional[EmbeddingManager]): Manager of the vector store (defaults to the live one)
+            
+        Returns:
+            The Chroma store itself or an in-process index mirroring it
+        """
+        index_class = SEARCH_INDEX_CLASSES.get(self.search_backend)
+        if index_class is None:
+            return vector_store
+        
+        embedding_manager = embedding_manager or self.embedding_manager
+        directory = self._get_search_index_directory(embedding_manager.collection_name)
+        version = self._get_search_index_version(embedding_manager)
+        
+        # The index of the running search engine may already be current (kept in sync by updates)
+        current_index = getattr(self.search_engine, 'vector_store', None)
+        if (isinstance(current_index, index_class) and version is not None
+                and current_index.directory == directory and current_index.version == version):
+            return current_index
+        
+        options = self.hnsw_params if self.search_backend == "hnsw" else {}
+        return index_class.load_if_current(vector_store, directory, version, **options)
+    
+    def _open_lexical_index(self, vector_store, embedding_manager: Optional[EmbeddingManager] = None) -> Optional[BM25Index]:
+        """
+        Return the BM25 index of a loaded vector store
+        
+        Args:
+            vector_store: Loaded vector store (Chroma)
+            embedding_manager (Optional[EmbeddingManager]): Manager of the vector store (defaults to the live one)
+            
+        Returns:
+            Optional[BM25Index]: BM25 index of the collection, or None if lexical search is disabled
+        """
+        if not self.lexical_search:
+            return None
+        
+        embedding_manager = embedding_manager or self.embedding_manager
+        directory = self._get_search_index_directory(embedding_manager.collection_name, LEXICAL_INDEX_NAME)
+        version = self._get_search_index_version(embedding_manager)
+        
+        # The index of the running search engine may already be current (kept in sync by updates)
+        current_index = getattr(self.search_engine, 'lexical_index', None)
+        if (current_index is not None and version is not None
+                and current_index.directory == directory and current_index.version == version):
+            return current_index
+        
+        return BM25Index.load_if_current(vector_store, directory, version)
+    
+    def _sync_search_index(self, vector_store, added_ids: List[str], deleted_ids: List[str]) -> Tuple[Optional[HnswVectorIndex], Optional[BM25Index]]:
+        """
+        Apply the chunks changed by an incremental update to the persisted HNSW and BM25 indexes
+        
+        Other backends are rebuilt from the vector store when they are opened. The indexes
+        of the running search engine are never changed in place (hnswlib does not support
+        resizing or adding while other threads search, and BM25 searches read postings and
+        document lengths that an update grows): the update is applied to copies loaded from
+        disk, which the caller swaps in with a new search engine.
+        
+        Args:
+            vector_store: Updated vector store (Chroma)
+            added_ids (List[str]): Chunks added or re-embedded by the update
+            deleted_ids (List[str]): Chunks deleted by the update
+            
+        Returns:
+            Tuple[Optional[HnswVectorIndex], Optional[BM25Index]]: Updated HNSW and BM25 indexes,
+                                                                  None when they are opened from the vector store
+        """
+        version = self._get_search_index_version(self.embedding_manager)
+        
+        lexical_index = None
+        if self.lexical_search:
+            directory = self._get_search_index_directory(self.embedding_manager.collection_name, LEXICAL_INDEX_NAME)
+            lexical_index = BM25Index.load(directory)
+            if lexical_index is not None:
+                lexical_index.delete(deleted_ids)
+                lexical_index.add_from_chroma(vector_store, added_ids)
+                lexical_index.save(directory, version)
+                logger.info(f"BM25 index updated: {len(added_ids)} chunks added, {len(deleted_ids)} deleted")
+        
+        if self.search_backend != "hnsw":
+            return None, lexical_index
+        
+        directory = self._get_search_index_directory(self.embedding_manager.collection_name)
+        index = HnswVectorIndex.load(directory, vector_store.embeddings, **self.hnsw_params)
+        if index is None:
+            return None, lexical_index
+        
+        index.delete(deleted_ids)
+        index.add_from_chroma(vector_store, added_ids)
+        index.save(directory, version)
+        logger.info(f"HNSW index updated: {len(added_ids)} chunks added, {len(deleted_ids)} deleted")
+        return index, lexical_index
+    
+    def _create_search_engine(self, vector_store, search_index=None, lexical_index: Optional[BM25Index] = None) -> SearchEngine:
+        """
+        Create a search engine that follows the collection pointer
+        
+        Args:
+            vector_store: Loaded vector store (Chroma)
+            search_index: In-process index already opened for the vector store (opened here when None)
+            lexical_index (Optional[BM25Index]): BM25 index already opened for the vector store (opened here when None)
+            
+        Returns:
+            SearchEngine: Search engine over the vector store
+        """
+        return SearchEngine(
+            search_index if search_index is not None else self._open_search_backend(vector_store),
+            collection_pointer=self.collection_pointer,
+            vector_store_loader=self._switch_collection,
+            lexical_index=lexical_index if lexical_index is not None else self._open_lexical_index(vector_store),
+            reranker=self.reranker,
+            rerank_candidates=self.rerank_candidates,
+            mmr_lambda=self.mmr_lambda,
+            program_filter=self.program_filter
+        )
+    
+    def _create_chatbot(self) -> RAGChatbot:
+        """
+        Create the chatbot answering over the current search engine
+        
+        Returns:
+            RAGChatbot: Chatbot with the pipeline context settings
+        """
+        return RAGChatbot(
+            self.search_engine,
+            merge_adjacent=self.merge_adjacent_chunks,
+            chunk_overlap=self.chunk_overlap
+        )
+    
+    def _switch_collection(self, collection_name: str):
+        """
+        Make the pipeline work on another collection version
+        
+        Called by the search engine when another process flipped the pointer.
+        
+        Args:
+            collection_name (str): Name of the collection in the vector store
+            
+        Returns:
+            Optional[Chroma]: Vector store of the collection or None if there is an error
+        """
+        embedding_manager = self._create_embedding_manager(collection_name)
+        vector_store = embedding_manager.load_vector_store()
+        if vector_store is None:
+            return None
+        
+        self.active_collection = collection_name
+        self.embedding_manager.close()
+        self.embedding_manager = embedding_manager
+        self.file_manifest = self._create_file_manifest(collection_name)
+        if self.search_engine:
+            self.search_engine.lexical_index = self._open_lexical_index(vector_store)
+        return self._open_search_backend(vector_store)
+    
+    def _iter_tracked_chunks(self, 
+                             chunk_ids_by_file: Dict[str, List[str]], 
+                             pdf_paths: Optional[List[str]] = None,
+                             on_file_done: Optional[Callable[[str], None]] = None) -> Iterator[Document]:
+        """
+        Stream the chunks of the documents, recording the chunk IDs of each file
+        
+        Args:
+            chunk_ids_by_file (Dict[str, List[str]]): Filled with file path -> chunk IDs
+            pdf_paths (Optional[List[str]]): PDFs to process (defaults to every PDF in documents_path)
+            on_file_done (Optional[Callable[[str], None]]): Called once every chunk of a file has been yielded
+            
+        Returns:
+            Iterator[Document]: Chunks of the documents
+        """
+        def iter_pages():
+            # Pages are chunked one at a time, so asking for the next file means
+            # that every chunk of the previous one was consumed
+            previous_file = None
+            for file_path, pdf_documents in self.extractor.iter_pdf_files(pdf_paths):
+                if previous_file and on_file_done:
+                    on_file_done(previous_file)
+                previous_file = file_path
+                chunk_ids_by_file.setdefault(file_path, [])
+                yield from pdf_documents
+            if previous_file and on_file_done:
+                on_file_done(previous_file)
+        
+        for chunk in self.chunker.iter_chunks(iter_pages()):
+            chunk_ids_by_file[chunk.metadata['source']].append(chunk.metadata['chunk_id'])
+            yield chunk
+    
+    def _record_files(self, 
+                      chunk_ids_by_file: Dict[str, List[str]], 
+                      file_manifest: Optional[FileManifest] = None) -> None:
+        """
+        Record the processed files and their chunk IDs in the file manifest
+        
+        Args:
+            chunk_ids_by_file (Dict[str, List[str]]): File path -> chunk IDs
+            file_manifest (Optional[FileManifest]): Manifest to update (defaults to the live one)
+        """
+        file_manifest = file_manifest or self.file_manifest
+        for file_path, chunk_ids in chunk_ids_by_file.items():
+            file_manifest.set(file_path, chunk_ids)
+        file_manifest.save()
+    
+    def _record_index(self, 
+                      embedding_manager: Optional[EmbeddingManager] = None, 
+                      file_manifest: Optional[FileManifest] = None,
+                      rebuilt: bool = False) -> None:
+        """
+        Record the build parameters and corpus of the current index in the index manifest
+        
+        Args:
+            embedding_manager (Optional[EmbeddingManager]): Manager of the index (defaults to the live one)
+            file_manifest (Optional[FileManifest]): Manifest of the index (defaults to the live one)
+            rebuilt (bool): Whether every chunk was just written, so all of them carry the current
+                            metadata fields (incremental updates keep the recorded version)
+        """
+        embedding_manager = embedding_manager or self.embedding_manager
+        file_manifest = file_manifest or self.file_manifest
+        fields = {"metadata_version": METADATA_VERSION} if rebuilt else {}
+        embedding_manager.record_index(
+            documents_path=self.documents_path,
+            chunk_size=self.chunk_size,
+            chunk_overlap=self.chunk_overlap,
+            file_count=len(file_manifest.files),
+            corpus_hash=file_manifest.get_corpus_hash(),
+            **fields
+        )
+    
+    def _get_build_settings(self, blue_green: bool) -> Dict[str, Any]:
+        """
+        Return the settings a resumed build must share with the interrupted one
+        
+        Args:
+            blue_green (bool): Whether the build writes to a new collection version
+            
+        Returns:
+            Dict[str, Any]: Build settings
+        """
+        return {
+            "documents_path": self.documents_path,
+            "chunk_size": self.chunk_size,
+            "chunk_overlap": self.chunk_overlap,
+            "embedding_model": self.embedding_manager.embedding_model,
+            "embedding_backend": self.embedding_manager.embedding_backend,
+            "distance_space": self.embedding_manager.distance_space,
+            "metadata_version": METADATA_VERSION,
+            "blue_green": blue_green
+        }
+    
+    def _run_checkpointed_build(self, 
+                                embedding_manager: EmbeddingManager, 
+                                completed_files: Dict[str, List[str]]) -> Tuple[Optional[Any], Dict[str, List[str]]]:
+        """
+        Stream every document into a collection, checkpointing the committed files
+        
+        Files of completed_files are skipped and their chunks kept. Progress is
+        logged as chunks per second with an ETA based on the bytes left to process.
+        
+        Args:
+            embedding_manager (EmbeddingManager): Manager of the collection being built
+            completed_files (Dict[str, List[str]]): File path -> chunk IDs committed by an interrupted build
+            
+        Returns:
+            Tuple[Optional[Chroma], Dict[str, List[str]]]: Vector store (None on error) and file path -> chunk IDs
+        """
+        pdf_paths = [file_path for file_path in self.extractor.list_pdf_paths() if file_path not in completed_files]
+        if completed_files:
+            logger.info(f"Resuming build: {len(completed_files)} files already committed, {len(pdf_paths)} remaining")
+        
+        progress = BuildProgress(len(pdf_paths), sum(os.path.getsize(file_path) for file_path in pdf_paths))
+        self.build_progress = progress
+        
+        chunk_ids_by_file = {}
+        # (file path, position in the chunk stream right after its last chunk)
+        finished_files = deque()
+        counters = {"produced": 0, "committed": 0}
+        
+        def on_file_done(file_path: str) -> None:
+            finished_files.append((file_path, counters["produced"]))
+        
+        def on_batch_committed(batch_size: int) -> None:
+            counters["committed"] += batch_size
+            committed_files = {}
+            while finished_files and finished_files[0][1] <= counters["committed"]:
+                file_path = finished_files.popleft()[0]
+                committed_files[file_path] = chunk_ids_by_file[file_path]
+            
+            if committed_files:
+                self.build_checkpoint.mark_files(committed_files)
+            progress.update(
+                chunks=batch_size,
+                files=len(committed_files),
+                size=sum(os.path.getsize(file_path) for file_path in committed_files)
+            )
+            progress.log()
+        
+        def iter_chunks():
+            for chunk in self._iter_tracked_chunks(chunk_ids_by_file, pdf_paths, on_file_done):
+                counters["produced"] += 1
+                yield chunk
+        
+        keep_ids = [chunk_id for chunk_ids in completed_files.values() for chunk_id in chunk_ids]
+        vector_store = embedding_manager.create_vector_store(iter_chunks(), keep_ids, on_batch_committed)
+        
+        chunk_ids_by_file.update(completed_files)
+        return vector_store, chunk_ids_by_file
+    
+    def _validate_collection(self, vector_store, expected_count: int) -> bool:
+        """
+        Check a freshly built collection before it goes live
+        
+        Args:
+            vector_store: Vector store of the collection (Chroma)
+            expected_count (int): Number of chunks that were produced
+            
+        Returns:
+            bool: True if the document count matches and every smoke query returns results
+        """
+        count = vector_store._collection.count()
+        if count != expected_count:
+            logger.error(f"Validation failed: collection has {count} chunks, {expected_count} expected")
+            return False
+        
+        for query in self.smoke_queries:
+            if not vector_store.similarity_search(query, k=1):
+                logger.error(f"Validation failed: no result for smoke query '{query}'")
+                return False
+        
+        logger.info(f"Validation passed: {count} chunks, {len(self.smoke_queries)} smoke queries")
+        return True
+    
+    def _build_new_version(self) -> bool:
+        """
+        Build the knowledge base into a new collection version and switch to it
+        
+        The live collection keeps serving searches during the build. The new
+        version only goes live, through an atomic flip of the collection pointer,
+        once it passed validation; a failed build is deleted.
+        
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        settings = self._get_build_settings(blue_green=True)
+        version_name = self.build_checkpoint.resume(settings)
+        completed_files = {}
+        if version_name:
+            completed_files = self.build_checkpoint.get_completed_files()
+        else:
+            version_name = make_version_name(self.collection_name)
+            self.build_checkpoint.start(version_name, settings)
+        logger.info(f"Steps 1-3: Building collection version '{version_name}'...")
+        
+        embedding_manager = self._create_embedding_manager(version_name)
+        file_manifest = self._create_file_manifest(version_name)
+        
+        try:
+            vector_store, chunk_ids_by_file = self._run_checkpointed_build(embedding_manager, completed_files)
+        finally:
+            # The worker processes are only needed while chunks are embedded
+            embedding_manager.close()
+        
+        expected_ids = set()
+        for chunk_ids in chunk_ids_by_file.values():
+            expected_ids.update(chunk_ids)
+        
+        if not vector_store:
+            # The checkpoint is kept so that the next build resumes this version
+            logger.error(f"Error building collection version '{version_name}', it can be resumed")
+            return False
+        
+        if not self._validate_collection(vector_store, len(expected_ids)):
+            logger.error(f"Collection version '{version_name}' was not activated")
+            embedding_manager.delete_collection()
+            self.build_checkpoint.clear()
+            return False
+        
+        self._record_files(chunk_ids_by_file, file_manifest)
+        self._record_index(embedding_manager, file_manifest, rebuilt=True)
+        
+        # Flip the pointer, then serve the new version from this process too
+        self.collection_pointer.activate(version_name, previous=self.active_collection)
+        self.active_collection = version_name
+        self.embedding_manager.close()
+        self.embedding_manager = embedding_manager
+        self.file_manifest = file_manifest
+        self.search_engine = self._create_search_engine(vector_store)
+        self.chatbot = self._create_chatbot()
+        self.build_checkpoint.clear()
+        
+        self.collect_old_versions()
+        return True
+    
+    def collect_old_versions(self) -> List[str]:
+        """
+        Delete the collection versions replaced for longer than the grace period
+        
+        Returns:
+            List[str]: Names of the deleted collections
+        """
+        deleted = []
+        for collection_name in self.collection_pointer.get_expired_versions(self.version_grace_seconds):
+            if collection_name != self.active_collection:
+                if not self._create_embedding_manager(collection_name).delete_collection():
+                    continue
+                
+                manifest_path = self._create_file_manifest(collection_name).manifest_path
+                if os.path.exists(manifest_path):
+                    os.remove(manifest_path)
+                for search_backend in [*SEARCH_INDEX_CLASSES, LEXICAL_INDEX_NAME]:
+                    shutil.rmtree(self._get_search_index_directory(collection_name, search_backend), ignore_errors=True)
+                deleted.append(collection_name)
+            
+            self.collection_pointer.forget(collection_name)
+        
+        if deleted:
+            logger.info(f"Deleted {len(deleted)} old collection versions: {deleted}")
+        return deleted
+    
+    def _index_matches_settings(self, vector_store_info: Dict[str, Any]) -> bool:
+        """
+        Check that a recorded index was built from the current documents, model, chunking and metadata
+        
+        Pipelines of different corpora may share a collection name, so an index
+        built from another documents_path is never reused.
+        
+        Indexes without a recorded value for a setting are accepted, except for the
+        metadata version: they predate the program and doc_kind fields.
+        
+        Args:
+            vector_store_info (Dict[str, Any]): Information returned by get_vector_store_info
+            
+        Returns:
+            bool: True if the index can be reused
+        """
+        settings = {
+            "documents_path": os.path.normpath(self.documents_path),
+            "embedding_model": self.embedding_manager.embedding_model,
+            "embedding_backend": self.embedding_manager.embedding_backend,
+            "distance_space": self.embedding_manager.distance_space,
+            "chunk_size": self.chunk_size,
+            "chunk_overlap": self.chunk_overlap
+        }
+        recorded = dict(vector_store_info)
+        if "documents_path" in recorded:
+            recorded["documents_path"] = os.path.normpath(recorded["documents_path"])
+        
+        for name, value in settings.items():
+            if name in recorded and recorded[name] != value:
+                logger.info(f"Index was built with {name}={recorded[name]}, rebuilding with {value}")
+                return False
+        
+        # Chunks written before the program/doc_kind fields existed cannot be pre-filtered
+        metadata_version = vector_store_info.get("metadata_version", 0)
+        if metadata_version != METADATA_VERSION:
+            logger.info(f"Index was built with metadata version {metadata_version}, rebuilding with {METADATA_VERSION}")
+            return False
+        return True
+    
+    def build_knowledge_base(self, force_rebuild: bool = False, blue_green: Optional[bool] = None) -> bool:
         """
         Builds the complete knowledge base
         
         Args:
             force_rebuild (bool): Forces rebuild even if it already exists
+            blue_green (Optional[bool]): Build into a new collection version (defaults to the pipeline setting)
             
         Returns:
             bool: True if successful, False otherwise
@@ -63,48 +677,57 @@ class RAGPipeline:
         try:
             logger.info("Starting knowledge base construction")
             
-            # Checks if vector store already exists
-            if not force_rebuild:
+            # Checks if vector store already exists (read from the index manifest)
+            # A pending checkpoint means the index on disk is incomplete: resume it
+            if not force_rebuild and not self.build_checkpoint.exists():
                 vector_store_info = self.embedding_manager.get_vector_store_info()
-                if vector_store_info.get("status") == "loaded":
+                if (vector_store_info.get("status") == "loaded" and vector_store_info.get("document_count", 0) > 0
+                        and self._index_matches_settings(vector_store_info)):
                     logger.info("Vector store already exists, loading...")
                     vector_store = self.embedding_manager.load_vector_store()
                     if vector_store:
-                        self.search_engine = SearchEngine(vector_store)
-                        self.chatbot = RAGChatbot(self.search_engine)
+                        self.search_engine = self._create_search_engine(vector_store)
+                        self.chatbot = self._create_chatbot()
                         logger.info("Knowledge base loaded successfully")
                         return True
             
-            # Step 1: Extraction
-            logger.info("Step 1: Extracting documents...")
-            documents = self.extractor.extract_documents()
-            if not documents:
-                logger.error("No documents found to process")
-                return False
-            
-            logger.info(f"Extracted {len(documents)} documents")
-            
-            # Step 2: Chunking
-            logger.info("Step 2: Chunking documents...")
-            chunks = self.chunker.chunk_documents(documents)
-            if not chunks:
-                logger.error("Error creating chunks of documents")
-                return False
+            if self.blue_green if blue_green is None else blue_green:
+                if not self._build_new_version():
+                    return False
+                logger.info("Knowledge base built successfully")
+                return True
             
-            logger.info(f"Created {len(chunks)} chunks")
+            # Steps 1-3 are streamed: pages are chunked and embedded in bounded batches
+            # as they are extracted, so the corpus is never held in memory at once
+            logger.info("Steps 1-3: Extracting, chunking and embedding documents...")
+            # An interrupted build must not leave a manifest describing the previous index
+            self.embedding_manager.clear_index()
+            settings = self._get_build_settings(blue_green=False)
+            completed_files = {}
+            if self.build_checkpoint.resume(settings) == self.active_collection:
+                completed_files = self.build_checkpoint.get_completed_files()
+            else:
+                self.build_checkpoint.start(self.active_collection, settings)
             
-            # Step 3: Embedding
-            logger.info("Step 3: Creating embeddings and vector store...")
-            vector_store = self.embedding_manager.create_vector_store(chunks)
+            try:
+                vector_store, chunk_ids_by_file = self._run_checkpointed_build(self.embedding_manager, completed_files)
+            finally:
+                self.embedding_manager.close()
             if not vector_store:
-                logger.error("Error creating vector store")
+                logger.error("Error creating vector store (no documents found or embedding failed)")
                 return False
             
+            # The collection now holds exactly the chunks of this build
+            self.file_manifest.clear()
+            self._record_files(chunk_ids_by_file)
+            self._record_index(rebuilt=True)
+            self.build_checkpoint.clear()
+            
             logger.info("Vector store created successfully")
             
             # Initializes search and chat components
-            self.search_engine = SearchEngine(vector_store)
-            self.chatbot = RAGChatbot(self.search_engine)
+            self.search_engine = self._create_search_engine(vector_store)
+            self.chatbot = self._create_chatbot()
             
             logger.info("Knowledge base built successfully")
             return True
@@ -128,8 +751,8 @@ class RAGPipeline:
                 logger.error("Vector store not found")
                 return False
             
-            self.search_engine = SearchEngine(vector_store)
-            self.chatbot = RAGChatbot(self.search_engine)
+            self.search_engine = self._create_search_engine(vector_store)
+            self.chatbot = self._create_chatbot()
             
             logger.info("Knowledge base loaded successfully")
             return True
@@ -188,6 +811,40 @@ class RAGPipeline:
         
         return results
     
+    def browse(self, 
+               metadata_filter: Optional[Dict[str, Any]] = None, 
+               limit: int = 100, 
+               offset: int = 0, 
+               fields: Optional[List[str]] = None, 
+               include_content: bool = True) -> Dict[str, Any]:
+        """
+        Pages through the chunks matching metadata filters (e.g. every chunk of a decree)
+        
+        Args:
+            metadata_filter (Optional[Dict[str, Any]]): Metadata filters, e.g. {"file_name": "Decreto 44.650.pdf"}
+            limit (int): Maximum number of chunks in the page
+            offset (int): Number of matching chunks to skip
+            fields (Optional[List[str]]): Metadata fields to return (None returns all of them)
+            include_content (bool): Return the chunk texts
+            
+        Returns:
+            Dict[str, Any]: Chunks of the page, offset, limit and next_offset (None on the last page)
+        """
+        if not self.search_engine:
+            logger.error("Search engine not initialized")
+            return {"chunks": [], "offset": offset, "limit": limit, "next_offset": None}
+        
+        page = self.search_engine.browse_by_metadata(metadata_filter, limit, offset, fields, include_content)
+        
+        chunks = []
+        for doc in page.pop("documents"):
+            chunk = {"id": doc.id, "metadata": doc.metadata}
+            if include_content:
+                chunk["content"] = doc.page_content
+            chunks.append(chunk)
+        
+        return {"chunks": chunks, **page}
+    
     def get_statistics(self) -> Dict[str, Any]:
         """
         Returns statistics of the pipeline
@@ -198,6 +855,7 @@ class RAGPipeline:
         stats = {
             "documents_path": self.documents_path,
             "collection_name": self.collection_name,
+            "active_collection": self.active_collection,
             "persist_directory": self.persist_directory,
             "chunk_size": self.chunk_size,
             "chunk_overlap": self.chunk_overlap
@@ -207,11 +865,25 @@ class RAGPipeline:
         vector_store_info = self.embedding_manager.get_vector_store_info()
         stats.update(vector_store_info)
         
+        if self.search_engine:
+            stats["query_cache"] = self.search_engine.get_query_cache_info()
+        
+        stats["embedding_models"] = get_model_registry_info()
+        
+        if self.reranker:
+            stats["reranker"] = self.reranker.get_info()
+        
+        if self.build_progress:
+            stats["build_progress"] = self.build_progress.get_info()
+        
         return stats
     
     def update_knowledge_base(self, new_documents_path: str = None) -> bool:
         """
-        Updates the knowledge base with new documents
+        Updates the knowledge base incrementally using the file manifest
+        
+        Only added or modified files are extracted and embedded. The chunks of
+        modified and removed files are deleted from the vector store.
         
         Args:
             new_documents_path (str): Path to new documents
@@ -222,26 +894,70 @@ class RAGPipeline:
         try:
             if new_documents_path:
                 self.documents_path = new_documents_path
-                self.extractor = DocumentExtractor(new_documents_path)
+                self.extractor = DocumentExtractor(
+                    new_documents_path, self.extraction_workers, self.extraction_cache_directory
+                )
             
-            # Extracts new documents
-            new_documents = self.extractor.extract_documents()
-            if not new_documents:
-                logger.warning("No new documents found")
-                return True
+            if not os.path.isdir(self.documents_path):
+                logger.error(f"Documents path not found: {self.documents_path}")
+                return False
             
-            # Chunks new documents
-            new_chunks = self.chunker.chunk_documents(new_documents)
+            # Compare the files on disk with the manifest
+            changes = self.file_manifest.diff(self.extractor.list_pdf_paths(), self.documents_path)
+            logger.info(
+                f"Files added: {len(changes['added'])}, modified: {len(changes['modified'])}, "
+                f"removed: {len(changes['removed'])}, unchanged: {len(changes['unchanged'])}"
+            )
             
-            # Updates vector store
-            vector_store = self.embedding_manager.update_vector_store(new_chunks)
-            if not vector_store:
-                logger.error("Error updating vector store")
+            files_to_embed = changes['added'] + changes['modified']
+            if not files_to_embed and not changes['removed']:
+                logger.info("Knowledge base is up to date")
+                self.file_manifest.save()
+                return self.search_engine is not None or self.load_knowledge_base()
+            
+            # Chunks of files missing from the manifest may exist from a build without it
+            for file_path in changes['added']:
+                self.embedding_manager.delete_source(file_path)
+            
+            # Embeds new and modified files
+            chunk_ids_by_file = {}
+            if files_to_embed:
+                vector_store = self.embedding_manager.update_vector_store(
+                    self._iter_tracked_chunks(chunk_ids_by_file, files_to_embed)
+                )
+                if not vector_store:
+                    logger.error("Error updating vector store")
+                    return False
+            
+            # Deletes the previous chunks of modified and removed files, except the
+            # ones whose content (and therefore ID) is still produced
+            current_chunk_ids = set()
+            for chunk_ids in chunk_ids_by_file.values():
+                current_chunk_ids.update(chunk_ids)
+            
+            stale_chunk_ids = set()
+            for file_path in changes['modified'] + changes['removed']:
+                stale_chunk_ids.update(self.file_manifest.get(file_path)['chunk_ids'])
+            stale_chunk_ids = list(stale_chunk_ids - current_chunk_ids)
+            if not self.embedding_manager.delete_chunks(stale_chunk_ids):
+                logger.error("Error deleting stale chunks")
                 return False
             
+            for file_path in changes['removed']:
+                self.file_manifest.remove(file_path)
+            self._record_files(chunk_ids_by_file)
+            self._record_index()
+            
             # Updates components
-            self.search_engine = SearchEngine(vector_store)
-            self.chatbot = RAGChatbot(self.search_engine)
+            vector_store = self.embedding_manager.load_vector_store()
+            if not vector_store:
+                logger.error("Vector store not found")
+                return False
+            
+            # Running searches keep the previous indexes until the new engine replaces it
+            search_index, lexical_index = self._sync_search_index(vector_store, list(current_chunk_ids), stale_chunk_ids)
+            self.search_engine = self._create_search_engine(vector_store, search_index, lexical_index)
+            self.chatbot = self._create_chatbot()
             
             logger.info("Knowledge base updated successfully")
             return True
@@ -0,0 +1,112 @@
+"""
+Query Cache Module - Responsible for bounded in-memory caches used at query time
+"""
+
+from langchain_core.documents import Document
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+import re
+import threading
+import unicodedata
+
+def normalize_query(query: str) -> str:
+    """
+    Normalize a query so that equivalent spellings share cache entries
+
+    Args:
+        query (str): Query typed by the user
+
+    Returns:
+        str: NFC normalized query with collapsed whitespace
+    """
+    return re.sub(r'\s+', ' ', unicodedata.normalize('NFC', query)).strip()
+
+def get_document_key(doc: Document) -> str:
+    """
+    Return the identity of a chunk returned by any search backend
+
+    Args:
+        doc (Document): Chunk returned by a search
+
+    Returns:
+        str: Content-hash chunk_id, falling back to the store ID or the content
+    """
+    return doc.metadata.get('chunk_id') or doc.id or doc.page_content
+
+class LRUCache:
+    """Thread-safe bounded cache that evicts the least recently used entry"""
+
+    def __init__(self, max_size: int = 1024):
+        """
+        Initialize the cache
+
+        Args:
+            max_size (int): Maximum number of entries
+        """
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """
+        Return a cached value and mark it as recently used
+
+        Args:
+            key (Hashable): Cache key
+
+        Returns:
+            Optional[Any]: Cached value or None on a miss
+        """
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+
+            self.misses += 1
+            return None
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """
+        Store a value, evicting the least recently used entry when full
+
+        Args:
+            key (Hashable): Cache key
+            value (Any): Value to store
+        """
+        if self.max_size <= 0:
+            return
+
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """
+        Remove every entry and reset the counters
+        """
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def get_info(self) -> Dict[str, Any]:
+        """
+        Return the cache counters
+
+        Returns:
+            Dict[str, Any]: Size, capacity, hits, misses and hit rate
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0
+            }
@@ -0,0 +1,338 @@
+"""
+Registry Module - Responsible for sharing RAG pipelines across requests of the same process
+"""
+
+from .pipeline import RAGPipeline
+
+from typing import Dict, Any, Optional, Tuple
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Time after which a failed load is attempted again (the index may have been restored meanwhile)
+RETRY_SECONDS = 60
+
+# (documents_path, collection_name, persist_directory) -> RAGPipeline
+_pipelines: Dict[Tuple[str, str, str], RAGPipeline] = {}
+# Keys whose initialization failed -> (time.monotonic() of the failure, error)
+_failures: Dict[Tuple[str, str, str], Tuple[float, str]] = {}
+# Keys being initialized in the background -> initialization thread
+_loading: Dict[Tuple[str, str, str], threading.Thread] = {}
+# Keys being rebuilt in the background -> rebuild thread
+_rebuild_threads: Dict[Tuple[str, str, str], threading.Thread] = {}
+# Keys being rebuilt -> pipeline whose knowledge base is being built (read for its progress)
+_rebuilding: Dict[Tuple[str, str, str], RAGPipeline] = {}
+# Keys whose last background rebuild finished -> error, or None if it succeeded
+_rebuild_results: Dict[Tuple[str, str, str], Optional[str]] = {}
+# One lock per key so that building one knowledge base does not block the others
+_pipeline_locks: Dict[Tuple[str, str, str], threading.Lock] = {}
+_registry_lock = threading.Lock()
+
+
+def _get_key_lock(key: Tuple[str, str, str]) -> threading.Lock:
+    """
+    Return the lock that guards the initialization of a pipeline key
+
+    Args:
+        key (Tuple[str, str, str]): Registry key
+
+    Returns:
+        threading.Lock: Lock for the key
+    """
+    with _registry_lock:
+        lock = _pipeline_locks.get(key)
+        if lock is None:
+            lock = threading.Lock()
+            _pipeline_locks[key] = lock
+        return lock
+
+
+def _initialize_pipeline(key: Tuple[str, str, str], pipeline_kwargs: Dict[str, Any]) -> None:
+    """
+    Load (or build, when no persisted index exists) the pipeline of a key and register it
+
+    Args:
+        key (Tuple[str, str, str]): Registry key
+        pipeline_kwargs (Dict[str, Any]): Additional arguments for RAGPipeline
+    """
+    documents_path, collection_name, persist_directory = key
+    try:
+        with _get_key_lock(key):
+            # A rebuild may have registered the pipeline while we waited
+            if key in _pipelines:
+                return
+
+            logger.info(f"Initializing shared RAG pipeline for: {key}")
+            pipeline = RAGPipeline(
+                documents_path=documents_path,
+                collection_name=collection_name,
+                persist_directory=persist_directory,
+                **pipeline_kwargs
+            )
+
+            if not pipeline.build_knowledge_base(force_rebuild=False):
+                logger.error(f"Could not initialize shared RAG pipeline for: {key}")
+                _failures[key] = (time.monotonic(), "Could not build the knowledge base")
+                return
+
+            _pipelines[key] = pipeline
+            _failures.pop(key, None)
+
+    except Exception as e:
+        logger.error(f"Error initializing shared RAG pipeline for {key}: {str(e)}")
+        _failures[key] = (time.monotonic(), str(e))
+
+    finally:
+        with _registry_lock:
+            _loading.pop(key, None)
+
+
+def get_pipeline(documents_path: str = "chatbot/app/data/sefaz_documents",
+                 collection_name: str = "sefaz_docs",
+                 persist_directory: str = "data/chroma_db",
+                 wait: bool = False,
+                 **pipeline_kwargs) -> Optional[RAGPipeline]:
+    """
+    Return the shared pipeline for the given documents/collection once it is ready
+
+    The first call starts loading the persisted vector store (or building the knowledge
+    base, when no persisted index exists yet) in a background thread and returns None,
+    so that callers can answer "unavailable" instead of blocking a request on a build.
+    A failed initialization is remembered and only attempted again once RETRY_SECONDS
+    have passed (or after rebuild_pipeline() or clear_pipelines()), so that a broken
+    index is not reloaded on every request; use get_pipeline_status() to tell the cases apart.
+
+    Args:
+        documents_path (str): Path to the documents
+        collection_name (str): Name of the collection in the vector store
+        persist_directory (str): Directory to persist the vector store
+        wait (bool): Block until the initialization finishes (scripts, startup warm-up)
+        **pipeline_kwargs: Additional arguments for RAGPipeline (chunk_size, chunk_overlap)
+
+    Returns:
+        Optional[RAGPipeline]: Ready pipeline, or None while loading or after a recent failed initialization
+    """
+    key = (documents_path, collection_name, persist_directory)
+
+    pipeline = _pipelines.get(key)
+    if pipeline is not None:
+        return pipeline
+
+    with _registry_lock:
+        thread = _loading.get(key)
+        if thread is None:
+            failure = _failures.get(key)
+            if failure is not None and time.monotonic() - failure[0] < RETRY_SECONDS:
+                return None
+
+            thread = threading.Thread(
+                target=_initialize_pipeline,
+                args=(key, pipeline_kwargs),
+                name=f"rag-pipeline-init-{collection_name}",
+                daemon=True
+            )
+            _loading[key] = thread
+            thread.start()
+
+    if wait:
+        thread.join()
+
+    return _pipelines.get(key)
+
+
+def get_pipeline_status(documents_path: str = "chatbot/app/data/sefaz_documents",
+                        collection_name: str = "sefaz_docs",
+                        persist_directory: str = "data/chroma_db") -> Dict[str, Any]:
+    """
+    Return the initialization status of a shared pipeline
+
+    A blue/green rebuild keeps serving the current pipeline, so a rebuild is reported
+    separately: 'rebuild' is "running" (with the 'build_progress' of the build once it
+    started), "succeeded" or "failed" (with 'rebuild_error') for the last background rebuild.
+
+    Args:
+        documents_path (str): Path to the documents
+        collection_name (str): Name of the collection in the vector store
+        persist_directory (str): Directory to persist the vector store
+
+    Returns:
+        Dict[str, Any]: 'status' ("ready", "rebuilding", "loading", "failed" or "not_loaded"),
+                        'error' and 'retry_in' (seconds before the next load attempt) when failed,
+                        and the rebuild information
+    """
+    key = (documents_path, collection_name, persist_directory)
+
+    with _registry_lock:
+        rebuild_info = {}
+        rebuilding_pipeline = _rebuilding.get(key)
+        if key in _rebuild_threads or rebuilding_pipeline is not None:
+            rebuild_info["rebuild"] = "running"
+            if rebuilding_pipeline is not None and rebuilding_pipeline.build_progress:
+                rebuild_info["build_progress"] = rebuilding_pipeline.build_progress.get_info()
+        elif key in _rebuild_results:
+            error = _rebuild_results[key]
+            rebuild_info["rebuild"] = "failed" if error else "succeeded"
+            if error:
+                rebuild_info["rebuild_error"] = error
+
+        if key in _pipelines:
+            return {"status": "ready", **rebuild_info}
+        if rebuild_info.get("rebuild") == "running":
+            return {"status": "rebuilding", **rebuild_info}
+        if key in _loading:
+            return {"status": "loading", **rebuild_info}
+        if key in _failures:
+            failed_at, error = _failures[key]
+            retry_in = max(0.0, RETRY_SECONDS - (time.monotonic() - failed_at))
+            return {"status": "failed", "error": error, "retry_in": round(retry_in), **rebuild_info}
+        return {"status": "not_loaded", **rebuild_info}
+
+
+def rebuild_pipeline(documents_path: str = "chatbot/app/data/sefaz_documents",
+                     collection_name: str = "sefaz_docs",
+                     persist_directory: str = "data/chroma_db",
+                     blue_green: bool = True,
+                     **pipeline_kwargs) -> bool:
+    """
+    Explicitly rebuild the knowledge base of a shared pipeline
+
+    With blue_green the new index is built in a new collection version and the current
+    pipeline keeps serving requests until the new version is validated and swapped in.
+    Without it the live collection is rebuilt in place, so searches running meanwhile
+    may see a partial index. A successful rebuild clears a cached initialization failure.
+
+    Args:
+        documents_path (str): Path to the documents
+        collection_name (str): Name of the collection in the vector store
+        persist_directory (str): Directory to persist the vector store
+        blue_green (bool): Build into a new collection version instead of the live collection
+        **pipeline_kwargs: Additional arguments for RAGPipeline (chunk_size, chunk_overlap)
+
+    Returns:
+        bool: True if successful, False otherwise
+    """
+    key = (documents_path, collection_name, persist_directory)
+
+    with _get_key_lock(key):
+        logger.info(f"Rebuilding shared RAG pipeline for: {key}")
+        pipeline = _pipelines.get(key) or RAGPipeline(
+            documents_path=documents_path,
+            collection_name=collection_name,
+            persist_directory=persist_directory,
+            **pipeline_kwargs
+        )
+
+        with _registry_lock:
+            _rebuilding[key] = pipeline
+        try:
+            if not pipeline.build_knowledge_base(force_rebuild=True, blue_green=blue_green):
+                logger.error(f"Error rebuilding shared RAG pipeline for: {key}")
+                return False
+        finally:
+            with _registry_lock:
+                _rebuilding.pop(key, None)
+
+        _pipelines[key] = pipeline
+        _failures.pop(key, None)
+        return True
+
+
+def _run_rebuild(key: Tuple[str, str, str], blue_green: bool, pipeline_kwargs: Dict[str, Any]) -> None:
+    """
+    Rebuild the pipeline of a key and record the outcome for get_pipeline_status()
+
+    Args:
+        key (Tuple[str, str, str]): Registry key
+        blue_green (bool): Build into a new collection version instead of the live collection
+        pipeline_kwargs (Dict[str, Any]): Additional arguments for RAGPipeline
+    """
+    documents_path, collection_name, persist_directory = key
+    error = None
+    try:
+        if not rebuild_pipeline(documents_path, collection_name, persist_directory, blue_green, **pipeline_kwargs):
+            error = "Could not rebuild the knowledge base"
+
+    except Exception as e:
+        logger.error(f"Error rebuilding shared RAG pipeline for {key}: {str(e)}")
+        error = str(e)
+
+    finally:
+        with _registry_lock:
+            _rebuild_results[key] = error
+            _rebuild_threads.pop(key, None)
+
+
+def start_rebuild_pipeline(documents_path: str = "chatbot/app/data/sefaz_documents",
+                           collection_name: str = "sefaz_docs",
+                           persist_directory: str = "data/chroma_db",
+                           blue_green: bool = True,
+                           **pipeline_kwargs) -> bool:
+    """
+    Start rebuild_pipeline() in a background thread
+
+    Requests are not blocked for the duration of a build: follow the rebuild
+    with get_pipeline_status().
+
+    Args:
+        documents_path (str): Path to the documents
+        collection_name (str): Name of the collection in the vector store
+        persist_directory (str): Directory to persist the vector store
+        blue_green (bool): Build into a new collection version instead of the live collection
+        **pipeline_kwargs: Additional arguments for RAGPipeline (chunk_size, chunk_overlap)
+
+    Returns:
+        bool: True if the rebuild was started, False if one is already running
+    """
+    key = (documents_path, collection_name, persist_directory)
+
+    with _registry_lock:
+        if key in _rebuild_threads or key in _rebuilding:
+            return False
+
+        thread = threading.Thread(
+            target=_run_rebuild,
+            args=(key, blue_green, pipeline_kwargs),
+            name=f"rag-pipeline-rebuild-{collection_name}",
+            daemon=True
+        )
+        _rebuild_threads[key] = thread
+        _rebuild_results.pop(key, None)
+        thread.start()
+
+    return True
+
+
+def clear_pipelines() -> None:
+    """
+    Drop every shared pipeline, cached failure and rebuild outcome (they will be lazily initialized again)
+    """
+    with _registry_lock:
+        _pipelines.clear()
+        _failures.clear()
+        _rebuild_results.clear()
+        _pipeline_locks.clear()
+
+
+def get_registry_info() -> Dict[str, Any]:
+    """
+    Return information about the pipelines loaded in this process
+
+    Returns:
+        Dict[str, Any]: Information about the registry
+    """
+    return {
+        "loaded_pipelines": len(_pipelines),
+        "loading_pipelines": len(_loading),
+        "failed_pipelines": len(_failures),
+        "rebuilding_pipelines": len(_rebuild_threads),
+        "keys": [
+            {
+                "documents_path": documents_path,
+                "collection_name": collection_name,
+                "persist_directory": persist_directory
+            }
+            for documents_path, collection_name, persist_directory in list(_pipelines.keys())
+        ]
+    }
@@ -0,0 +1,157 @@
+"""
+Reranker Module - Responsible for rescoring search candidates with a cross-encoder
+"""
+
+from .query_cache import LRUCache, get_document_key, normalize_query
+
+from langchain_core.documents import Document
+from typing import List, Dict, Any, Optional
+import hashlib
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Multilingual MiniLM cross-encoder trained on mMARCO (includes Portuguese), small enough for CPU
+DEFAULT_RERANKER_MODEL = "cross-encoder/mmarco-mMiniLMv2-L12-H384-v1"
+
+def hash_query(query: str) -> str:
+    """
+    Return a short stable hash of a normalized query, used in score cache keys
+
+    Args:
+        query (str): Query text
+
+    Returns:
+        str: Hex digest of the query
+    """
+    return hashlib.sha1(normalize_query(query).encode('utf-8')).hexdigest()[:16]
+
+class CrossEncoderReranker:
+    """Class to reorder search candidates by the relevance a cross-encoder gives to each (query, chunk) pair
+
+    The model is loaded on first use. Candidates are scored in one batched
+    inference and scores are cached per (query hash, chunk id), so repeated
+    questions and candidates shared between questions are not rescored.
+    """
+
+    def __init__(self,
+                 model_name: str = DEFAULT_RERANKER_MODEL,
+                 batch_size: int = 16,
+                 max_length: int = 512,
+                 cache_size: int = 4096,
+                 min_score: Optional[float] = None):
+        """
+        Initialize the reranker
+
+        Args:
+            model_name (str): HuggingFace cross-encoder model name
+            batch_size (int): Number of pairs per model forward pass
+            max_length (int): Maximum number of tokens of a (query, chunk) pair
+            cache_size (int): Maximum number of cached scores
+            min_score (Optional[float]): Candidates scoring below this value are dropped
+        """
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.max_length = max_length
+        self.min_score = min_score
+        self.score_cache = LRUCache(cache_size)
+        self.model = None
+        self.load_seconds = None
+        self.last_rerank_seconds = None
+        self._load_lock = threading.Lock()
+
+    def _get_model(self):
+        """
+        Return the cross-encoder, loading it on first use
+
+        Returns:
+            CrossEncoder: Loaded model
+        """
+        if self.model is not None:
+            return self.model
+
+        with self._load_lock:
+            if self.model is None:
+                from sentence_transformers import CrossEncoder
+
+                logger.info(f"Loading reranker model {self.model_name}")
+                start_time = time.perf_counter()
+                self.model = CrossEncoder(self.model_name, max_length=self.max_length, device='cpu')
+                self.load_seconds = time.perf_counter() - start_time
+                logger.info(f"Reranker model loaded in {self.load_seconds:.2f}s")
+        return self.model
+
+    def score(self, query: str, documents: List[Document]) -> List[float]:
+        """
+        Return the relevance of each document to the query
+
+        Args:
+            query (str): Query text
+            documents (List[Document]): Candidate chunks
+
+        Returns:
+            List[float]: One score per document, higher is more relevant
+        """
+        query_hash = hash_query(query)
+        keys = [(query_hash, get_document_key(doc)) for doc in documents]
+        scores = [self.score_cache.get(key) for key in keys]
+
+        missing = [i for i, score in enumerate(scores) if score is None]
+        if missing:
+            pairs = [(query, documents[i].page_content) for i in missing]
+            predictions = self._get_model().predict(pairs, batch_size=self.batch_size, show_progress_bar=False)
+            for i, prediction in zip(missing, predictions):
+                scores[i] = float(prediction)
+                self.score_cache.put(keys[i], scores[i])
+
+        return scores
+
+    def rerank(self, query: str, documents: List[Document], k: int = 4) -> List[Document]:
+        """
+        Return the k most relevant documents according to the cross-encoder
+
+        Args:
+            query (str): Query text
+            documents (List[Document]): Candidate chunks
+            k (int): Maximum number of results
+
+        Returns:
+            List[Document]: Best documents first, with the 'rerank_score' metadata
+        """
+        if not documents:
+            return []
+
+        start_time = time.perf_counter()
+        scores = self.score(query, documents)
+        # Stable sort: ties keep the retrieval order
+        ranked = sorted(range(len(documents)), key=lambda i: -scores[i])
+
+        results = []
+        for i in ranked:
+            if self.min_score is not None and scores[i] < self.min_score:
+                break
+            documents[i].metadata['rerank_score'] = scores[i]
+            results.append(documents[i])
+            if len(results) == k:
+                break
+
+        self.last_rerank_seconds = time.perf_counter() - start_time
+        logger.info(f"Reranked {len(documents)} candidates to {len(results)} in {self.last_rerank_seconds * 1000:.1f} ms")
+        return results
+
+    def get_info(self) -> Dict[str, Any]:
+        """
+        Return the reranker settings and counters
+
+        Returns:
+            Dict[str, Any]: Model, load time, last rerank latency and score cache counters
+        """
+        return {
+            "model_name": self.model_name,
+            "loaded": self.model is not None,
+            "load_seconds": round(self.load_seconds, 3) if self.load_seconds is not None else None,
+            "last_rerank_ms": round(self.last_rerank_seconds * 1000, 1) if self.last_rerank_seconds is not None else None,
+            "score_cache": self.score_cache.get_info()
+        }
@@ -0,0 +1,801 @@
+"""
+Sharding Module - Responsible for splitting the knowledge base into one index per program folder
+"""
+
+from .document_metadata import GENERAL_PROGRAM, detect_programs, get_folder_program
+from .pipeline import RAGPipeline
+from .query_cache import get_document_key
+from .reranker import CrossEncoderReranker
+from .step4_search import SearchEngine, maximal_marginal_relevance, reciprocal_rank_fusion
+from .step5_chat import RAGChatbot
+from .vector_backends import get_chunk_vectors
+
+from langchain_core.documents import Document
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Callable, Optional
+import heapq
+import logging
+import os
+import re
+import threading
+import time
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+def list_shard_names(documents_path: str) -> List[str]:
+    """
+    Return the subfolders of the documents directory, one shard each
+
+    Args:
+        documents_path (str): Root directory of the documents (sefaz_documents)
+
+    Returns:
+        List[str]: Folder names, sorted
+    """
+    if not os.path.isdir(documents_path):
+        return []
+    return sorted(
+        name for name in os.listdir(documents_path)
+        if os.path.isdir(os.path.join(documents_path, name)) and not name.startswith(('.', '__'))
+    )
+
+def get_shard_collection_name(collection_name: str, shard_name: str) -> str:
+    """
+    Return the collection name of a shard
+
+    Args:
+        collection_name (str): Base collection name
+        shard_name (str): Folder name of the shard
+
+    Returns:
+        str: Collection name accepted by Chroma, e.g. "sefaz_docs_prodepe"
+    """
+    return f"{collection_name}_{re.sub(r'[^a-zA-Z0-9_-]', '_', shard_name)}"
+
+def merge_top_k(rankings: List[List[Document]], k: int, score_key: str) -> List[Document]:
+    """
+    Merge the rankings of several shards into the k best documents
+
+    Args:
+        rankings (List[List[Document]]): Documents of each shard
+        k (int): Number of documents to keep
+        score_key (str): Metadata holding the score to rank by (higher is better)
+
+    Returns:
+        List[Document]: Best documents first, ties in shard order
+    """
+    return heapq.nlargest(k, (doc for ranking in rankings for doc in ranking), key=lambda doc: doc.metadata.get(score_key, 0))
+
+class ShardLatency:
+    """Class to keep the recent search latencies of a shard"""
+
+    def __init__(self, window: int = 1024):
+        """
+        Initialize the latency record
+
+        Args:
+            window (int): Number of recent searches the percentiles are computed on
+        """
+        self.latencies = deque(maxlen=window)
+        self.searches = 0
+        self.errors = 0
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float, error: bool = False) -> None:
+        """
+        Record one search of the shard
+
+        Args:
+            seconds (float): Duration of the search
+            error (bool): Whether the search failed
+        """
+        with self._lock:
+            self.latencies.append(seconds)
+            self.searches += 1
+            if error:
+                self.errors += 1
+
+    def get_info(self) -> Dict[str, Any]:
+        """
+        Return the search counters and latency percentiles
+
+        Returns:
+            Dict[str, Any]: Searches, errors, p50/p95/max and last latency in milliseconds
+        """
+        with self._lock:
+            latencies = np.asarray(self.latencies) * 1000
+            info = {"searches": self.searches, "errors": self.errors}
+
+        if not len(latencies):
+            return {**info, "p50_ms": None, "p95_ms": None, "max_ms": None, "last_ms": None}
+        return {
+            **info,
+            "p50_ms": round(float(np.percentile(latencies, 50)), 2),
+            "p95_ms": round(float(np.percentile(latencies, 95)), 2),
+            "max_ms": round(float(latencies.max()), 2),
+            "last_ms": round(float(latencies[-1]), 2)
+        }
+
+class ShardedSearchEngine:
+    """Class to search several shards concurrently and merge their results
+
+    Each shard is a SearchEngine over its own collection. The query is embedded
+    once, the shards are searched in a thread pool and their rankings are merged
+    with a top-k heap on the similarity score, then reranked and diversified by
+    MMR like a single SearchEngine. Queries naming programs are only sent to the
+    shards of those programs and to the general shards. Exposes the search
+    methods RAGChatbot uses.
+    """
+
+    def __init__(self,
+                 shards: Dict[str, SearchEngine],
+                 max_workers: Optional[int] = None,
+                 reranker: Optional[CrossEncoderReranker] = None,
+                 rerank_candidates: int = 30,
+                 mmr_lambda: Optional[float] = None,
+                 mmr_candidates: int = 20,
+                 rrf_k: int = 60,
+                 fusion_candidates: int = 20,
+                 program_routing: bool = True):
+        """
+        Initialize the sharded search engine
+
+        Args:
+            shards (Dict[str, SearchEngine]): Shard name (program folder) -> search engine
+            max_workers (Optional[int]): Threads searching shards concurrently (None uses one per shard)
+            reranker (Optional[CrossEncoderReranker]): Cross-encoder that reorders the merged candidates
+            rerank_candidates (int): Number of merged candidates given to the reranker
+            mmr_lambda (Optional[float]): Select the top k merged candidates by maximal marginal relevance with this lambda
+            mmr_candidates (int): Number of merged candidates given to maximal marginal relevance
+            rrf_k (int): Reciprocal rank fusion constant of hybrid_search
+            fusion_candidates (int): Number of candidates taken from each merged ranking before fusion
+            program_routing (bool): Only search the shards of the programs named in the query
+                                    (all shards when nothing relevant is found there)
+        """
+        self.max_workers = max_workers
+        self.executor: Optional[ThreadPoolExecutor] = None
+        self.pool_size = 0
+        self._executor_lock = threading.Lock()
+
+        self.shards: Dict[str, SearchEngine] = {}
+        self.shard_programs: Dict[str, str] = {}
+        self.latencies: Dict[str, ShardLatency] = {}
+        for name, engine in shards.items():
+            self.set_shard(name, engine)
+        self._resize_executor()
+
+        self.reranker = reranker
+        self.rerank_candidates = rerank_candidates
+        self.mmr_lambda = mmr_lambda
+        self.mmr_candidates = mmr_candidates
+        self.rrf_k = rrf_k
+        self.fusion_candidates = fusion_candidates
+        self.program_routing = program_routing
+
+    def set_shard(self, name: str, engine: SearchEngine) -> None:
+        """
+        Add a shard or replace the search engine of a rebuilt one (its latency record is kept)
+
+        Args:
+            name (str): Shard name
+            engine (SearchEngine): Search engine over the shard collection
+        """
+        self.shards[name] = engine
+        self.shard_programs[name] = get_folder_program(name)
+        self.latencies.setdefault(name, ShardLatency())
+        if self.executor is not None:
+            self._resize_executor()
+
+    def _resize_executor(self) -> None:
+        """
+        Create the search thread pool, or replace it by a larger one when shards were added
+
+        Without max_workers the pool has one thread per shard. Searches submitted
+        to a replaced pool finish on its threads.
+        """
+        workers = self.max_workers or max(len(self.shards), 1)
+        with self._executor_lock:
+            if self.executor is not None and self.pool_size >= workers:
+                return
+            previous = self.executor
+            self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="shard-search")
+            self.pool_size = workers
+
+        if previous is not None:
+            previous.shutdown(wait=False)
+
+    def close(self) -> None:
+        """
+        Stop the search threads
+        """
+        with self._executor_lock:
+            executor = self.executor
+            self.executor = None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    def _get_query_engine(self) -> Optional[SearchEngine]:
+        """
+        Return the engine that embeds queries (every shard uses the same model)
+
+        Returns:
+            Optional[SearchEngine]: First shard engine, or None without shards
+        """
+        return next(iter(self.shards.values()), None)
+
+    def _route(self, query: str) -> List[str]:
+        """
+        Return the shards a query is sent to
+
+        Args:
+            query (str): Query text
+
+        Returns:
+            List[str]: Shards of the programs named in the query plus the general shards, or all shards
+        """
+        names = list(self.shards)
+        if not self.program_routing:
+            return names
+
+        programs = detect_programs(query)
+        if not programs:
+            return names
+
+        routed = [name for name in names if self.shard_programs[name] in programs or self.shard_programs[name] == GENERAL_PROGRAM]
+        return routed or names
+
+    def _run_on_shards(self, shard_names: List[str], search: Callable[[str], Any]) -> Dict[str, Any]:
+        """
+        Run a search on several shards concurrently, recording the latency of each
+
+        Args:
+            shard_names (List[str]): Shards to search
+            search (Callable[[str], Any]): Searches one shard given its name
+
+        Returns:
+            Dict[str, Any]: Shard name -> search result (None when the search failed)
+        """
+        def run(name: str) -> Any:
+            start_time = time.perf_counter()
+            try:
+                result = search(name)
+                self.latencies[name].record(time.perf_counter() - start_time)
+                return result
+            except Exception as e:
+                logger.error(f"Error searching shard {name}: {e}")
+                self.latencies[name].record(time.perf_counter() - start_time, error=True)
+                return None
+
+        with self._executor_lock:
+            futures = {name: self.executor.submit(run, name) for name in shard_names}
+        return {name: future.result() for name, future in futures.items()}
+
+    def _fan_out(self,
+                 routes: List[List[str]],
+                 query_embeddings: List[List[float]],
+                 k: int,
+                 metadata_filter: Optional[Dict[str, Any]],
+                 score_threshold: float) -> List[List[List[Document]]]:
+        """
+        Search every shard once for all the queries routed to it
+
+        Args:
+            routes (List[List[str]]): Shards of each query
+            query_embeddings (List[List[float]]): Query vectors
+            k (int): Maximum number of results per query and shard
+            metadata_filter (Optional[Dict[str, Any]]): Metadata filters
+            score_threshold (float): Minimum similarity score
+
+        Returns:
+            List[List[List[Document]]]: Documents of each shard, for each query
+        """
+        shard_queries: Dict[str, List[int]] = {}
+        for i, route in enumerate(routes):
+            for name in route:
+                shard_queries.setdefault(name, []).append(i)
+
+        shard_results = self._run_on_shards(
+            list(shard_queries),
+            lambda name: self.shards[name].search_by_vectors(
+                [query_embeddings[i] for i in shard_queries[name]], k, metadata_filter, score_threshold
+            )
+        )
+
+        rankings = [[] for _ in routes]
+        for name, indices in shard_queries.items():
+            for i, documents in zip(indices, shard_results[name] or [[] for _ in indices]):
+                for doc in documents:
+                    doc.metadata['shard'] = name
+                rankings[i].append(documents)
+        return rankings
+
+    def _get_candidate_count(self, k: int) -> int:
+        """
+        Return how many merged results to keep so that the top k can be chosen by the reranker or MMR
+
+        Args:
+            k (int): Number of results returned to the caller
+
+        Returns:
+            int: Number of candidates to retrieve from every shard
+        """
+        candidates = k
+        if self.reranker is not None:
+            candidates = max(candidates, self.rerank_candidates)
+        if self.mmr_lambda is not None:
+            candidates = max(candidates, self.mmr_candidates)
+        return candidates
+
+    def _diversify(self, query_embedding: List[float], documents: List[Document], k: int) -> List[Document]:
+        """
+        Keep k merged candidates selected by maximal marginal relevance
+
+        Args:
+            query_embedding (List[float]): Embedding of the query
+            documents (List[Document]): Candidates with the 'shard' metadata
+            k (int): Maximum number of results
+
+        Returns:
+            List[Document]: Selected documents with the 'mmr_rank' metadata
+        """
+        if len(documents) <= 1:
+            return documents[:k]
+
+        # Candidate vectors are read from the shard that returned each candidate
+        shard_positions: Dict[str, List[int]] = {}
+        for i, doc in enumerate(documents):
+            shard_positions.setdefault(doc.metadata['shard'], []).append(i)
+
+        vectors = [None] * len(documents)
+        for name, positions in shard_positions.items():
+            shard_vectors = get_chunk_vectors(self.shards[name].vector_store, [get_document_key(documents[i]) for i in positions])
+            for i, vector in zip(positions, shard_vectors):
+                vectors[i] = vector
+
+        selected = [documents[i] for i in maximal_marginal_relevance(query_embedding, np.asarray(vectors), k, self.mmr_lambda)]
+        for rank, doc in enumerate(selected, start=1):
+            doc.metadata['mmr_rank'] = rank
+        return selected
+
+    def _select_top_k(self, query: str, query_embedding: List[float], documents: List[Document], k: int) -> List[Document]:
+        """
+        Keep the k best merged candidates: by cross-encoder score when a reranker is set,
+        then by maximal marginal relevance when mmr_lambda is set
+
+        When both are enabled, MMR chooses among the 2k candidates the reranker ranks best.
+
+        Args:
+            query (str): Query text
+            query_embedding (List[float]): Embedding of the query
+            documents (List[Document]): Merged candidates, best first
+            k (int): Maximum number of results
+
+        Returns:
+            List[Document]: Selected documents
+        """
+        if self.reranker is not None and documents:
+            documents = self.reranker.rerank(query, documents, k if self.mmr_lambda is None else 2 * k)
+        if self.mmr_lambda is not None and len(documents) > k:
+            documents = self._diversify(query_embedding, documents, k)
+        return documents[:k]
+
+    def get_query_cache_info(self) -> Dict[str, Any]:
+        """
+        Return the counters of the query embedding cache
+
+        Returns:
+            Dict[str, Any]: Size, capacity, hits, misses and hit rate
+        """
+        engine = self._get_query_engine()
+        return engine.get_query_cache_info() if engine else {}
+
+    def get_shard_stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Return the program and search latencies of every shard
+
+        Returns:
+            Dict[str, Dict[str, Any]]: Shard name -> program, searches, errors and latency percentiles
+        """
+        return {
+            name: {"program": self.shard_programs[name], **self.latencies[name].get_info()}
+            for name in self.shards
+        }
+
+    def search_many(self,
+                    queries: List[str],
+                    k: int = 4,
+                    metadata_filter: Optional[Dict[str, Any]] = None,
+                    score_threshold: float = 0.7) -> List[List[Document]]:
+        """
+        Perform similarity search for several queries over the shards
+
+        Queries are embedded in one batch and each shard is searched once for
+        all the queries routed to it.
+
+        Args:
+            queries (List[str]): Queries to be searched
+            k (int): Maximum number of results per query
+            metadata_filter (Optional[Dict[str, Any]]): Metadata filters (disables program routing)
+            score_threshold (float): Minimum similarity score
+
+        Returns:
+            List[List[Document]]: Relevant documents of each query, in the order of the queries
+        """
+        engine = self._get_query_engine()
+        if engine is None:
+            logger.error("No shard available for search")
+            return [[] for _ in queries]
+
+        if not queries:
+            return []
+
+        try:
+            query_embeddings = engine.embed_queries(queries)
+            candidates = self._get_candidate_count(k)
+            routes = [list(self.shards) if metadata_filter else self._route(query) for query in queries]
+            rankings = self._fan_out(routes, query_embeddings, candidates, metadata_filter, score_threshold)
+
+            # Queries with nothing relevant in their programs search the other shards
+            fallback_routes = [
+                [name for name in self.shards if name not in route] if not any(rankings[i]) else []
+                for i, route in enumerate(routes)
+            ]
+            if any(fallback_routes):
+                logger.info("No relevant documents in the routed shards, searching the other shards")
+                fallback_rankings = self._fan_out(fallback_routes, query_embeddings, candidates, metadata_filter, score_threshold)
+                for i, route in enumerate(fallback_routes):
+                    if route:
+                        rankings[i] = fallback_rankings[i]
+
+            return [
+                self._select_top_k(query, query_embedding, merge_top_k(query_rankings, candidates, 'similarity_score'), k)
+                for query, query_embedding, query_rankings in zip(queries, query_embeddings, rankings)
+            ]
+
+        except Exception as e:
+            logger.error(f"Error in sharded search: {e}")
+            return [[] for _ in queries]
+
+    def similarity_search(self,
+                          query: str,
+                          k: int = 4,
+                          score_threshold: float = 0.7) -> List[Document]:
+        """
+        Perform similarity search over the shards
+
+        Args:
+            query (str): Query to be searched
+            k (int): Maximum number of results
+            score_threshold (float): Minimum similarity score
+
+        Returns:
+            List[Document]: List of relevant documents, with the 'shard' metadata
+        """
+        logger.info(f"Performing sharded search for: '{query}'")
+        results = self.search_many([query], k=k, score_threshold=score_threshold)[0]
+        logger.info(f"Found {len(results)} relevant documents")
+        return results
+
+    def hybrid_search(self,
+                      query: str,
+                      metadata_filter: Optional[Dict[str, Any]] = None,
+                      k: int = 4,
+                      score_threshold: float = 0.7) -> List[Document]:
+        """
+        Perform hybrid search over the shards (similarity + BM25 keywords, fused by reciprocal rank)
+
+        The similarity and BM25 rankings of the shards are merged separately
+        before fusion. BM25 statistics are per shard, so keyword scores of
+        different shards are only roughly comparable.
+
+        Args:
+            query (str): Query to be searched
+            metadata_filter (Optional[Dict[str, Any]]): Metadata filters (disables program routing)
+            k (int): Maximum number of results
+            score_threshold (float): Minimum relevance: similarity for the similarity ranking,
+                                     keyword score for the BM25 ranking
+
+        Returns:
+            List[Document]: List of relevant documents, with the 'shard' metadata
+        """
+        engine = self._get_query_engine()
+        if engine is None:
+            logger.error("No shard available for search")
+            return []
+
+        try:
+            logger.info(f"Performing sharded hybrid search for: '{query}'")
+
+            candidates = max(self._get_candidate_count(k), self.fusion_candidates)
+            query_embedding = engine.embed_query(query)
+
+            def search(name: str):
+                shard = self.shards[name]
+                dense_results = shard.search_by_vectors([query_embedding], candidates, metadata_filter, score_threshold)[0]
+                lexical_results = shard.lexical_search(query, candidates, metadata_filter, score_threshold)
+                for doc in dense_results + lexical_results:
+                    doc.metadata['shard'] = name
+                return dense_results, lexical_results
+
+            route = list(self.shards) if metadata_filter else self._route(query)
+            shard_results = [result for result in self._run_on_shards(route, search).values() if result]
+            if not any(dense or lexical for dense, lexical in shard_results) and len(route) < len(self.shards):
+                logger.info("No relevant documents in the routed shards, searching the other shards")
+                other_shards = [name for name in self.shards if name not in route]
+                shard_results = [result for result in self._run_on_shards(other_shards, search).values() if result]
+
+            dense_ranking = merge_top_k([dense for dense, _ in shard_results], candidates, 'similarity_score')
+            lexical_ranking = merge_top_k([lexical for _, lexical in shard_results], candidates, 'bm25_score')
+            results = reciprocal_rank_fusion([dense_ranking, lexical_ranking], self.rrf_k) if lexical_ranking else dense_ranking
+            results = self._select_top_k(query, query_embedding, results, k)
+
+            logger.info(f"Found {len(results)} relevant documents")
+            return results
+
+        except Exception as e:
+            logger.error(f"Error in sharded hybrid search: {e}")
+            return []
+
+class ShardedKnowledgeBase:
+    """Class to build and serve a knowledge base split into one RAGPipeline per sefaz_documents subfolder
+
+    Every shard has its own collection, manifests and search indexes, so a
+    program can be rebuilt or updated without touching the other shards. PDFs
+    stored directly in documents_path belong to no shard and are not indexed.
+    """
+
+    def __init__(self,
+                 documents_path: str = "chatbot/app/data/sefaz_documents",
+                 collection_name: str = "sefaz_docs",
+                 persist_directory: str = "data/chroma_db",
+                 search_workers: Optional[int] = None,
+                 rerank: bool = False,
+                 reranker_params: Optional[Dict[str, Any]] = None,
+                 merge_adjacent_chunks: bool = False,
+                 **pipeline_params: Any):
+        """
+        Initialize the sharded knowledge base
+
+        Args:
+            documents_path (str): Path to the documents, one subfolder per shard
+            collection_name (str): Base name of the shard collections
+            persist_directory (str): Directory to persist the vector stores
+            search_workers (Optional[int]): Threads searching shards concurrently (None uses one per shard)
+            rerank (bool): Rerank the merged candidates with a cross-encoder
+            reranker_params (Optional[Dict[str, Any]]): Options of CrossEncoderReranker and rerank_candidates
+            merge_adjacent_chunks (bool): Merge consecutive chunks of the same page in the chatbot context
+            **pipeline_params: Other RAGPipeline options used by every shard (chunk_size, search_backend...)
+        """
+        self.documents_path = documents_path
+        self.collection_name = collection_name
+        self.persist_directory = persist_directory
+        self.search_workers = search_workers
+        self.merge_adjacent_chunks = merge_adjacent_chunks
+        self.pipeline_params = pipeline_params
+
+        reranker_params = dict(reranker_params or {})
+        self.rerank_candidates = reranker_params.pop("rerank_candidates", 30)
+        self.reranker = CrossEncoderReranker(**reranker_params) if rerank else None
+
+        self.shards: Dict[str, RAGPipeline] = {name: self._create_shard(name) for name in list_shard_names(documents_path)}
+
+        if os.path.isdir(documents_path):
+            root_pdfs = sorted(name for name in os.listdir(documents_path) if name.lower().endswith('.pdf'))
+            if root_pdfs:
+                logger.warning(f"PDFs outside a shard folder are not indexed, move them to a subfolder of {documents_path}: {root_pdfs}")
+
+        # Components that will be initialized after the shards are loaded
+        self.search_engine = None
+        self.chatbot = None
+
+        logger.info(f"Sharded knowledge base initialized with {len(self.shards)} shards: {list(self.shards)}")
+
+    def _create_shard(self, name: str) -> RAGPipeline:
+        """
+        Create the pipeline of a shard
+
+        Args:
+            name (str): Folder name of the shard
+
+        Returns:
+            RAGPipeline: Pipeline over the shard folder and its own collection
+        """
+        return RAGPipeline(
+            documents_path=os.path.join(self.documents_path, name),
+            collection_name=get_shard_collection_name(self.collection_name, name),
+            persist_directory=self.persist_directory,
+            **self.pipeline_params
+        )
+
+    def _serve_shards(self) -> bool:
+        """
+        Serve the search engines of the loaded shards, creating the sharded engine and chatbot on first use
+
+        Returns:
+            bool: True if at least one shard is served
+        """
+        engines = {name: shard.search_engine for name, shard in self.shards.items() if shard.search_engine}
+        if not engines:
+            return False
+
+        if self.search_engine is None:
+            self.search_engine = ShardedSearchEngine(
+                engines,
+                max_workers=self.search_workers,
+                reranker=self.reranker,
+                rerank_candidates=self.rerank_candidates,
+                mmr_lambda=self.pipeline_params.get("mmr_lambda"),
+                program_routing=self.pipeline_params.get("program_filter", True)
+            )
+            self.chatbot = RAGChatbot(
+                self.search_engine,
+                merge_adjacent=self.merge_adjacent_chunks,
+                chunk_overlap=self.pipeline_params.get("chunk_overlap", 200)
+            )
+        else:
+            for name, engine in engines.items():
+                self.search_engine.set_shard(name, engine)
+        return True
+
+    def build_knowledge_base(self, force_rebuild: bool = False) -> bool:
+        """
+        Builds (or loads) every shard
+
+        Shards are built one after the other, each build already uses every core
+        for embedding. Shards that fail are logged and left out of searches.
+
+        Args:
+            force_rebuild (bool): Forces rebuild even if the shard already exists
+
+        Returns:
+            bool: True if at least one shard is served
+        """
+        if not self.shards:
+            logger.error(f"No shard folders found in {self.documents_path}")
+            return False
+
+        failed = [name for name, shard in self.shards.items() if not shard.build_knowledge_base(force_rebuild)]
+        if failed:
+            logger.error(f"Shards not built: {failed}")
+        return self._serve_shards()
+
+    def load_knowledge_base(self) -> bool:
+        """
+        Loads the existing shards
+
+        Returns:
+            bool: True if at least one shard is served
+        """
+        failed = [name for name, shard in self.shards.items() if not shard.load_knowledge_base()]
+        if failed:
+            logger.error(f"Shards not loaded: {failed}")
+        return self._serve_shards()
+
+    def rebuild_shard(self, name: str, force_rebuild: bool = True) -> bool:
+        """
+        Rebuild one shard and serve it, leaving the other shards untouched
+
+        A folder created since initialization becomes a new shard.
+
+        Args:
+            name (str): Folder name of the shard
+            force_rebuild (bool): Forces rebuild even if the shard index matches its settings
+
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        if name not in self.shards:
+            if not os.path.isdir(os.path.join(self.documents_path, name)):
+                logger.error(f"Shard folder not found: {name}")
+                return False
+            self.shards[name] = self._create_shard(name)
+
+        start_time = time.perf_counter()
+        if not self.shards[name].build_knowledge_base(force_rebuild):
+            logger.error(f"Error rebuilding shard {name}")
+            return False
+
+        logger.info(f"Shard {name} rebuilt in {time.perf_counter() - start_time:.2f}s")
+        return self._serve_shards()
+
+    def update_shard(self, name: str) -> bool:
+        """
+        Update one shard incrementally from its file manifest
+
+        Args:
+            name (str): Folder name of the shard
+
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        if name not in self.shards:
+            return self.rebuild_shard(name, force_rebuild=False)
+
+        if not self.shards[name].update_knowledge_base():
+            logger.error(f"Error updating shard {name}")
+            return False
+        return self._serve_shards()
+
+    def chat(self, query: str, **kwargs) -> Dict[str, Any]:
+        """
+        Chat with the sharded knowledge base
+
+        Args:
+            query (str): User's question
+            **kwargs: Additional arguments for the chat
+
+        Returns:
+            Dict[str, Any]: Chatbot's response
+        """
+        if not self.chatbot:
+            return {
+                "response": "Error: Knowledge base not loaded. Execute build_knowledge_base() first.",
+                "sources": [],
+                "confidence": "error"
+            }
+
+        return self.chatbot.chat(query, **kwargs)
+
+    def search(self, query: str, **kwargs) -> List[Dict[str, Any]]:
+        """
+        Performs semantic search over the shards
+
+        Args:
+            query (str): Search query
+            **kwargs: Additional arguments for the search
+
+        Returns:
+            List[Dict[str, Any]]: Search results
+        """
+        if not self.search_engine:
+            logger.error("Search engine not initialized")
+            return []
+
+        return [
+            {
+                "content": doc.page_content,
+                "source": doc.metadata.get('source', 'N/A'),
+                "file_name": doc.metadata.get('file_name', 'N/A'),
+                "shard": doc.metadata.get('shard', 'N/A'),
+                "score": doc.metadata.get('similarity_score', 'N/A'),
+                "metadata": doc.metadata
+            }
+            for doc in self.search_engine.similarity_search(query, **kwargs)
+        ]
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """
+        Returns statistics of every shard, including its search latencies
+
+        Returns:
+            Dict[str, Any]: Complete statistics
+        """
+        latencies = self.search_engine.get_shard_stats() if self.search_engine else {}
+
+        shards = {}
+        for name, shard in self.shards.items():
+            vector_store_info = shard.embedding_manager.get_vector_store_info()
+            shards[name] = {
+                "active_collection": shard.active_collection,
+                "loaded": shard.search_engine is not None,
+                "document_count": vector_store_info.get("document_count", 0),
+                "search": latencies.get(name)
+            }
+
+        stats = {
+            "documents_path": self.documents_path,
+            "collection_name": self.collection_name,
+            "persist_directory": self.persist_directory,
+            "shards": shards
+        }
+
+        if self.search_engine:
+            stats["query_cache"] = self.search_engine.get_query_cache_info()
+
+        if self.reranker:
+            stats["reranker"] = self.reranker.get_info()
+
+        return stats
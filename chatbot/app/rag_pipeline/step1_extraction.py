@@ -4,23 +4,240 @@ Extraction Module - Responsável por carregar documentos de diferentes fontes
 
 from langchain_community.document_loaders import PyPDFLoader
 from langchain_core.documents import Document
+from .extraction_cache import ExtractionCache, hash_file
+from .document_metadata import get_doc_kind, get_program
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 import os
-from typing import List, Dict, Any
+import time
+from typing import List, Dict, Any, Iterator, Optional, Tuple
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Bump whenever the extraction output changes, so cached pages are invalidated
+EXTRACTOR_VERSION = "pypdf-1"
+
+def _load_pdf(file_path: str) -> Tuple[str, List[Document], float, Optional[str]]:
+    """
+    Load a single PDF file (module level so it can run in a worker process)
+    
+    Args:
+        file_path (str): Path to the PDF file
+        
+    Returns:
+        Tuple[str, List[Document], float, Optional[str]]: File path, pages, elapsed seconds and error message
+    """
+    start_time = time.perf_counter()
+    try:
+        loader = PyPDFLoader(file_path)
+        pdf_documents = loader.load()
+        return file_path, pdf_documents, time.perf_counter() - start_time, None
+    except Exception as e:
+        return file_path, [], time.perf_counter() - start_time, str(e)
+
 class DocumentExtractor:
     """Class to extract documents"""
     
-    def __init__(self, base_directory: str):
+    def __init__(self, 
+                 base_directory: str, 
+                 max_workers: Optional[int] = 1,
+                 cache_directory: Optional[str] = None):
         """
         Initialize document extractor
         
         Args:
             base_directory (str): Directory where the documents are located
+            max_workers (Optional[int]): Number of worker processes used to parse PDFs
+                (1 parses in the current process, None uses all CPU cores)
+            cache_directory (Optional[str]): Directory of the extracted pages cache (None disables it)
         """
         self.base_directory = base_directory
+        self.max_workers = max_workers if max_workers is not None else (os.cpu_count() or 1)
+        self.cache = ExtractionCache(cache_directory, EXTRACTOR_VERSION) if cache_directory else None
+        
+        # Seconds spent parsing each file in the last extraction
+        self.file_timings: Dict[str, float] = {}
+    
+    def list_pdf_paths(self) -> List[str]:
+        """
+        List all PDFs from base_directory and subdirectories in a deterministic order
+        
+        Returns:
+            List[str]: Sorted list of PDF paths
+        """
+        pdf_paths = []
+        
+        # Recursively traverse the base directory
+        for root, dirs, files in os.walk(self.base_directory):
+            dirs.sort()
+            for file_name in sorted(files):
+                if file_name.lower().endswith('.pdf'):
+                    pdf_paths.append(os.path.join(root, file_name))
+        
+        return pdf_paths
+    
+    def _add_file_metadata(self, file_path: str, pdf_documents: List[Document]) -> None:
+        """
+        Add file level metadata to the pages of a PDF
+        
+        The incentive program comes from the sefaz_documents subfolder and the
+        document kind (lei, decreto, portaria, apostila) from the file name.
+        
+        Args:
+            file_path (str): Path to the PDF file
+            pdf_documents (List[Document]): Pages extracted from the file
+        """
+        file_name = os.path.basename(file_path)
+        program = get_program(file_path, self.base_directory)
+        doc_kind = get_doc_kind(file_name)
+        for doc in pdf_documents:
+            doc.metadata.update({
+                'source': file_path,
+                'file_name': file_name,
+                'directory': os.path.dirname(file_path),
+                'document_type': 'pdf',
+                'program': program,
+                'doc_kind': doc_kind
+            })
+    
+    def _submit_pdf(self, executor: Optional[ProcessPoolExecutor], file_path: str) -> Dict[str, Any]:
+        """
+        Look up a PDF in the extraction cache and, on a miss, schedule its parsing
+        
+        Args:
+            executor (Optional[ProcessPoolExecutor]): Process pool or None to parse in this process
+            file_path (str): Path to the PDF file
+            
+        Returns:
+            Dict[str, Any]: Pending extraction (file path, hash, cached pages or future)
+        """
+        pending = {'file_path': file_path, 'file_hash': None, 'documents': None, 'future': None}
+        
+        if self.cache:
+            try:
+                pending['file_hash'] = hash_file(file_path)
+                pending['documents'] = self.cache.load(pending['file_hash'])
+            except OSError as e:
+                logger.error(f"Erro ao ler arquivo {file_path}: {e}")
+        
+        if pending['documents'] is None and executor is not None:
+            pending['future'] = executor.submit(_load_pdf, file_path)
+        
+        return pending
+    
+    def _resolve_pdf(self, pending: Dict[str, Any]) -> Tuple[str, List[Document], float, Optional[str]]:
+        """
+        Wait for a pending extraction and store newly parsed pages in the cache
+        
+        Args:
+            pending (Dict[str, Any]): Pending extraction returned by _submit_pdf
+            
+        Returns:
+            Tuple[str, List[Document], float, Optional[str]]: File path, pages, elapsed seconds and error message
+        """
+        file_path = pending['file_path']
+        
+        if pending['documents'] is not None:
+            return file_path, pending['documents'], 0.0, None
+        
+        if pending['future'] is not None:
+            try:
+                result = pending['future'].result()
+            except Exception as e:
+                # A broken worker must not lose the file, parse it here instead
+                logger.error(f"Error in worker process for {file_path}, parsing in-process: {e}")
+                result = _load_pdf(file_path)
+        else:
+            result = _load_pdf(file_path)
+        
+        file_path, pdf_documents, elapsed, error = result
+        if error is None and self.cache and pending['file_hash']:
+            self.cache.store(pending['file_hash'], pdf_documents)
+        
+        return result
+    
+    def _iter_loaded_pdfs(self, pdf_paths: List[str]) -> Iterator[Tuple[str, List[Document], float, Optional[str]]]:
+        """
+        Load PDFs sequentially or with a process pool, preserving the order of pdf_paths
+        
+        At most 2 * max_workers files are parsed ahead of the consumer, so memory stays bounded.
+        
+        Args:
+            pdf_paths (List[str]): Paths of the PDFs to load
+            
+        Returns:
+            Iterator of (file_path, pages, elapsed seconds, error message)
+        """
+        workers = min(self.max_workers, len(pdf_paths))
+        executor = None
+        
+        if workers > 1:
+            try:
+                executor = ProcessPoolExecutor(max_workers=workers)
+                logger.info(f"Extracting {len(pdf_paths)} PDFs with {workers} worker processes")
+            except Exception as e:
+                logger.error(f"Error starting worker processes, falling back to sequential: {e}")
+        
+        window = 2 * workers if executor is not None else 0
+        pending = deque()
+        
+        try:
+            for file_path in pdf_paths:
+                pending.append(self._submit_pdf(executor, file_path))
+                while len(pending) > window:
+                    yield self._resolve_pdf(pending.popleft())
+            
+            while pending:
+                yield self._resolve_pdf(pending.popleft())
+        finally:
+            if executor is not None:
+                executor.shutdown(wait=True, cancel_futures=True)
+    
+    def iter_pdf_files(self, pdf_paths: Optional[List[str]] = None) -> Iterator[Tuple[str, List[Document]]]:
+        """
+        Stream the pages of each PDF, one file at a time
+        
+        Args:
+            pdf_paths (Optional[List[str]]): PDFs to extract (defaults to every PDF in base_directory)
+            
+        Returns:
+            Iterator[Tuple[str, List[Document]]]: File path and extracted pages, in order
+        """
+        self.file_timings = {}
+        
+        if pdf_paths is None:
+            if not os.path.isdir(self.base_directory):
+                logger.error(f"Diretório base não encontrado: {self.base_directory}")
+                return
+            
+            logger.info(f"Iniciando extração de PDFs em: {self.base_directory}")
+            pdf_paths = self.list_pdf_paths()
+        
+        for file_path, pdf_documents, elapsed, error in self._iter_loaded_pdfs(pdf_paths):
+            self.file_timings[file_path] = elapsed
+            
+            if error is not None:
+                logger.error(f"Erro ao processar arquivo {file_path}: {error}")
+                continue
+            
+            # Add additional metadata
+            self._add_file_metadata(file_path, pdf_documents)
+            
+            logger.info(f"  - {len(pdf_documents)} páginas extraídas de {os.path.basename(file_path)} em {elapsed:.2f}s")
+            yield file_path, pdf_documents
+    
+    def iter_documents(self) -> Iterator[Document]:
+        """
+        Stream all supported documents, page by page
+        
+        Returns:
+            Iterator[Document]: Extracted documents
+        """
+        for _, pdf_documents in self.iter_pdf_files():
+            yield from pdf_documents
+        
+        # Add other types of documents here, like .txt, .docx, etc.
         
     def extract_pdfs(self) -> List[Document]:
         """
@@ -30,42 +247,12 @@ class DocumentExtractor:
             List[Document]: List of extracted documents
         """
         documents = []
+        start_time = time.perf_counter()
         
-        if not os.path.isdir(self.base_directory):
-            logger.error(f"Diretório base não encontrado: {self.base_directory}")
-            return documents
-            
-        logger.info(f"Iniciando extração de PDFs em: {self.base_directory}")
+        for _, pdf_documents in self.iter_pdf_files():
+            documents.extend(pdf_documents)
         
-        # Recursively traverse the base directory
-        for root, dirs, files in os.walk(self.base_directory):
-            for file_name in files:
-                if file_name.lower().endswith('.pdf'):
-                    file_path = os.path.join(root, file_name)
-                    try:
-                        logger.info(f"Processando PDF: {file_path}")
-                        
-                        # Load the PDF document
-                        loader = PyPDFLoader(file_path)
-                        pdf_documents = loader.load()
-                        
-                        # Add additional metadata
-                        for doc in pdf_documents:
-                            doc.metadata.update({
-                                'source': file_path,
-                                'file_name': file_name,
-                                'directory': root,
-                                'document_type': 'pdf'
-                            })
-                        
-                        documents.extend(pdf_documents)
-                        logger.info(f"  - {len(pdf_documents)} páginas extraídas de {file_name}")
-                        
-                    except Exception as e:
-                        logger.error(f"Erro ao processar arquivo {file_path}: {e}")
-                        continue
-        
-        logger.info(f"Total de {len(documents)} documentos extraídos")
+        logger.info(f"Total de {len(documents)} documentos extraídos em {time.perf_counter() - start_time:.2f}s")
         return documents
     
     def extract_documents(self) -> List[Document]:
@@ -91,10 +278,12 @@ if __name__ == "__main__":
     logging.basicConfig(level=logging.INFO)
     
     test_dir = "chatbot/app/data/sefaz_documents"
-    extractor = DocumentExtractor(test_dir)
+    extractor = DocumentExtractor(test_dir, max_workers=None)
     documents = extractor.extract_documents()
     
     print(f"Documentos extraídos: {len(documents)}")
+    for file_path, elapsed in sorted(extractor.file_timings.items(), key=lambda item: item[1], reverse=True):
+        print(f"  {elapsed:6.2f}s  {file_path}")
     if documents:
         print(f"Primeiro documento: {documents[0].page_content[:200]}...")
         print(f"Metadados: {documents[0].metadata}") 
\ No newline at end of file
@@ -4,11 +4,30 @@ Chunking Module - Responsible for dividing documents into smaller chunks for pro
 
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain_core.documents import Document
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterable, Iterator
+import hashlib
 import logging
 
 logger = logging.getLogger(__name__)
 
+def make_chunk_id(source: str, page: Any, text: str) -> str:
+    """
+    Derive a stable chunk ID from its source, page and content
+    
+    The same text from the same page always gets the same ID, so ingesting
+    a document twice does not create duplicate vectors.
+    
+    Args:
+        source (str): Source file of the chunk
+        page (Any): Page of the chunk in the source file
+        text (str): Content of the chunk
+        
+    Returns:
+        str: Hexadecimal chunk ID
+    """
+    text_hash = hashlib.sha256(text.encode('utf-8')).hexdigest()
+    return hashlib.sha256(f"{source}\x1f{page}\x1f{text_hash}".encode('utf-8')).hexdigest()[:32]
+
 class DocumentChunker:
     """Class to divide documents into smaller chunks"""
     
@@ -39,25 +58,16 @@ class DocumentChunker:
             is_separator_regex=False
         )
     
-    def chunk_documents(self, documents: List[Document]) -> List[Document]:
+    def iter_chunks(self, documents: Iterable[Document]) -> Iterator[Document]:
         """
-        Divide a list of documents into smaller chunks
+        Stream the chunks of a sequence of documents, one document at a time
         
         Args:
-            documents (List[Document]): List of documents to divide
+            documents (Iterable[Document]): Documents to divide (may be a generator)
             
         Returns:
-            List[Document]: List of document chunks
+            Iterator[Document]: Document chunks
         """
-        if not documents:
-            logger.warning("No documents provided for chunking")
-            return []
-        
-        logger.info(f"Starting chunking of {len(documents)} documents")
-
-        
-        all_chunks = []
-        
         for i, doc in enumerate(documents):
             try:
                 # Divide the document into chunks
@@ -66,19 +76,42 @@ class DocumentChunker:
                 # Add specific chunking metadata
                 for j, chunk in enumerate(chunks):
                     chunk.metadata.update({
-                        'chunk_id': f"{i}_{j}",
+                        'chunk_id': make_chunk_id(
+                            chunk.metadata.get('source', ''),
+                            chunk.metadata.get('page', ''),
+                            chunk.page_content
+                        ),
                         'original_document_index': i,
                         'chunk_index': j,
                         'total_chunks_in_doc': len(chunks),
                         'chunk_size': len(chunk.page_content)
                     })
                 
-                all_chunks.extend(chunks)
                 logger.info(f"  - Document {i+1}: {len(chunks)} chunks created")
                 
             except Exception as e:
                 logger.error(f"Error chunking document {i}: {e}")
                 continue
+            
+            yield from chunks
+    
+    def chunk_documents(self, documents: List[Document]) -> List[Document]:
+        """
+        Divide a list of documents into smaller chunks
+        
+        Args:
+            documents (List[Document]): List of documents to divide
+            
+        Returns:
+            List[Document]: List of document chunks
+        """
+        if not documents:
+            logger.warning("No documents provided for chunking")
+            return []
+        
+        logger.info(f"Starting chunking of {len(documents)} documents")
+        
+        all_chunks = list(self.iter_chunks(documents))
         
         logger.info(f"Total of {len(all_chunks)} chunks created")
         return all_chunks
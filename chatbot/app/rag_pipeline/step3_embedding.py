@@ -2,11 +2,16 @@
 Embedding Module - Responsible for creating embeddings and managing the vector store
 """
 # from langchain_openai import OpenAIEmbeddings
-# Free alternative to OpenAIEmbeddings
-from langchain_huggingface import HuggingFaceEmbeddings
+# Free alternative to OpenAIEmbeddings: HuggingFaceEmbeddings, loaded through .model_registry
 from langchain_chroma import Chroma
 from langchain_core.documents import Document
-from typing import List, Dict, Any, Optional
+from .embedding_cache import CachedEmbeddings, EmbeddingCache
+from .embedding_backends import LengthSortedEmbeddings, ProcessPoolEmbeddings
+from .vector_backends import get_collection_space
+from .model_registry import get_embedding_model
+from .manifest import IndexManifest
+from typing import List, Dict, Any, Callable, Iterable, Iterator, Optional
+from itertools import islice
 import os
 import logging
 from dotenv import load_dotenv
@@ -16,13 +21,53 @@ from dotenv import load_dotenv
 
 logger = logging.getLogger(__name__)
 
+# Forward batches per embedding worker in an ingestion batch, so the pool stays
+# busy when part of the batch is served by the embedding cache
+BATCHES_PER_WORKER = 4
+
+def iter_batches(items: Iterable[Any], batch_size: int) -> Iterator[List[Any]]:
+    """
+    Group an iterable in lists of at most batch_size items
+    
+    Args:
+        items (Iterable[Any]): Items to group (may be a generator)
+        batch_size (int): Maximum size of each batch
+        
+    Returns:
+        Iterator[List[Any]]: Batches of items
+    """
+    iterator = iter(items)
+    while True:
+        batch = list(islice(iterator, batch_size))
+        if not batch:
+            return
+        yield batch
+
+def get_chunk_ids(chunks: List[Document]) -> List[str]:
+    """
+    Return the vector store IDs of a batch of chunks
+    
+    Args:
+        chunks (List[Document]): Chunks created by DocumentChunker
+        
+    Returns:
+        List[str]: One ID per chunk (its content-hash chunk_id)
+    """
+    return [chunk.metadata['chunk_id'] for chunk in chunks]
+
 class EmbeddingManager:
     """Class to manage embeddings and vector store"""
     
     def __init__(self, 
                  collection_name: str = "sefaz_docs",
                  persist_directory: str = "data/chroma_db",
-                 embedding_model: str = "neuralmind/bert-base-portuguese-cased"):
+                 embedding_model: str = "neuralmind/bert-base-portuguese-cased",
+                 ingestion_batch_size: int = 256,
+                 embedding_cache_directory: Optional[str] = "data/embedding_cache",
+                 embedding_batch_size: int = 32,
+                 embedding_workers: int = 1,
+                 embedding_backend: str = "torch",
+                 distance_space: str = "cosine"):
         """
         Initialize the embedding manager
         
@@ -30,54 +75,128 @@ class EmbeddingManager:
             collection_name (str): Name of the collection in the vector store
             persist_directory (str): Directory to persist the vector store
             embedding_model (str): Embedding model to be used
+            ingestion_batch_size (int): Number of chunks embedded and written per batch (raised to
+                                        keep every embedding worker busy)
+            embedding_cache_directory (Optional[str]): Directory of the persistent embedding cache (None disables it)
+            embedding_batch_size (int): Number of texts per model forward pass
+            embedding_workers (int): Worker processes embedding chunks during builds (1 embeds in-process)
+            embedding_backend (str): "torch" (sentence-transformers) or "onnx" (int8 ONNX Runtime export)
+            distance_space (str): Distance function of new collections: "cosine", "l2" or "ip"
         """
         self.collection_name = collection_name
         self.persist_directory = persist_directory
         self.embedding_model = embedding_model
+        self.ingestion_batch_size = ingestion_batch_size
+        self.embedding_batch_size = embedding_batch_size
+        self.embedding_workers = embedding_workers
+        self.embedding_backend = embedding_backend
+        self.distance_space = distance_space
         
         # Create the persistence directory if it doesn't exist
         os.makedirs(self.persist_directory, exist_ok=True)
         
+        # Summary of the built index, read by status checks instead of opening the store
+        self.index_manifest = IndexManifest(os.path.join(self.persist_directory, f"{self.collection_name}_index.json"))
+        self.vector_store = None
+        
         # Uncomment to use OpenAI embedding model
         # try:
         #     self.embeddings = OpenAIEmbeddings(model=embedding_model)
         #     logger.info(f"Modelo de embedding inicializado: {embedding_model}")
         
-        try:
-            self.embeddings = HuggingFaceEmbeddings(
-                model_name=self.embedding_model,
-                model_kwargs={'device': 'cpu'} # Force CPU usage
+        # Models are shared by every manager of the process and loaded on first use
+        self.embeddings = None
+        if self.embedding_backend == "onnx":
+            try:
+                self.embeddings = get_embedding_model(self.embedding_model, "onnx", self.embedding_batch_size)
+                logger.info(f"ONNX int8 embedding model initialized: {self.embedding_model}")
+            except Exception as e:
+                logger.error(f"Error initializing ONNX embedding model, using torch: {e}")
+                self.embedding_backend = "torch"
+        
+        if self.embeddings is None:
+            try:
+                self.embeddings = get_embedding_model(self.embedding_model, "torch", self.embedding_batch_size)
+                logger.info(f"Local embedding model initialized: {self.embedding_model}")
+            except Exception as e:
+                logger.error(f"Error initializing embedding model: {e}")
+                raise
+        
+        # Texts of similar token length share a batch to avoid padding. sentence-transformers
+        # already length-sorts each embed_documents call, so the in-process torch model is used as is
+        self.process_pool = None
+        if self.embedding_workers > 1 and self.embedding_backend == "torch":
+            self.process_pool = ProcessPoolEmbeddings(
+                self.embeddings, self.embedding_model, self.embedding_workers, self.embedding_batch_size
             )
-            logger.info(f"Local embedding model initialized: {self.embedding_model}")
-        except Exception as e:
-            logger.error(f"Error initializing embedding model: {e}")
-            raise
+            self.embeddings = self.process_pool
+            # Each embed_documents call is one ingestion batch: it must hold work for every worker
+            min_batch_size = self.embedding_workers * self.embedding_batch_size * BATCHES_PER_WORKER
+            if self.ingestion_batch_size < min_batch_size:
+                logger.info(f"Ingestion batch size raised to {min_batch_size} for {self.embedding_workers} embedding workers")
+                self.ingestion_batch_size = min_batch_size
+        elif self.embedding_backend == "onnx":
+            self.embeddings = LengthSortedEmbeddings(self.embeddings, self.embedding_batch_size)
+        
+        # Reuse every vector already computed for the same model and text
+        self.embedding_cache = None
+        if embedding_cache_directory:
+            # Quantized vectors are slightly different, they must not share the fp32 entries
+            cache_model_name = self.embedding_model if self.embedding_backend == "torch" else f"{self.embedding_model}@onnx-int8"
+            self.embedding_cache = EmbeddingCache(embedding_cache_directory, cache_model_name)
+            self.embeddings = CachedEmbeddings(self.embeddings, self.embedding_cache)
+            logger.info(f"Embedding cache enabled with {self.embedding_cache.count()} vectors")
     
-    def create_vector_store(self, chunks: List[Document]) -> Optional[Chroma]:
+    def create_vector_store(self, 
+                            chunks: Iterable[Document], 
+                            keep_ids: Optional[Iterable[str]] = None,
+                            on_batch_committed: Optional[Callable[[int], None]] = None) -> Optional[Chroma]:
         """
         Create a new vector store with the provided chunks
         
+        Chunks are consumed in batches of ingestion_batch_size, so a generator
+        of chunks is never fully held in memory. Chunks already in the collection
+        are not embedded again, and chunks that are no longer produced are removed.
+        
         Args:
-            chunks (List[Document]): List of chunks to create embeddings
+            chunks (Iterable[Document]): Chunks to create embeddings (list or generator)
+            keep_ids (Optional[Iterable[str]]): IDs already committed by an interrupted build, kept as they are
+            on_batch_committed (Optional[Callable[[int], None]]): Called with the number of chunks of each written batch
             
         Returns:
             Optional[Chroma]: Vector store created or None if there is an error
         """
-        if not chunks:
-            logger.warning("No chunks provided to create vector store")
-            return None
-        
-        logger.info(f"Creating vector store with {len(chunks)} chunks")
+        logger.info(f"Creating vector store in batches of {self.ingestion_batch_size} chunks")
         
         try:
-            vector_store = Chroma.from_documents(
-                documents=chunks,
-                embedding=self.embeddings,
-                collection_name=self.collection_name,
-                persist_directory=self.persist_directory
-            )
+            vector_store = self._open_vector_store()
+            
+            # A collection with another distance function is recreated (unless a build is being resumed in it)
+            space = get_collection_space(vector_store)
+            if space != self.distance_space and not keep_ids and vector_store._collection.count() > 0:
+                logger.info(f"Collection '{self.collection_name}' uses the {space} distance, recreating it with {self.distance_space}")
+                if not self.delete_collection():
+                    return None
+                vector_store = self._open_vector_store()
+            
+            chunk_ids = set(self._add_chunks(vector_store, chunks, on_batch_committed))
+            chunk_ids.update(keep_ids or [])
+            
+            if not chunk_ids:
+                logger.warning("No chunks provided to create vector store")
+                return None
             
-            logger.info(f"Vector store '{self.collection_name}' created and persisted successfully")
+            # Remove chunks left over from previous builds
+            stale_chunk_ids = [
+                chunk_id for chunk_id in vector_store._collection.get(include=[])['ids']
+                if chunk_id not in chunk_ids
+            ]
+            if stale_chunk_ids:
+                logger.info(f"Removing {len(stale_chunk_ids)} stale chunks")
+                for batch in iter_batches(stale_chunk_ids, self.ingestion_batch_size):
+                    vector_store.delete(ids=batch)
+            
+            logger.info(f"Vector store '{self.collection_name}' created and persisted successfully with {len(chunk_ids)} chunks")
             
             return vector_store
             
@@ -85,21 +204,37 @@ class EmbeddingManager:
             logger.error(f"Error creating vector store: {e}")
             return None
     
+    def _open_vector_store(self) -> Chroma:
+        """
+        Return the vector store of the collection, opening it only once
+        
+        Returns:
+            Chroma: Vector store of the collection
+        """
+        if self.vector_store is None:
+            # The distance function only applies to new collections, existing ones keep theirs
+            self.vector_store = Chroma(
+                persist_directory=self.persist_directory,
+                embedding_function=self.embeddings,
+                collection_name=self.collection_name,
+                collection_metadata={"hnsw:space": self.distance_space}
+            )
+        return self.vector_store
+    
     def load_vector_store(self) -> Optional[Chroma]:
         """
-        Load an existing vector store
+        Load an existing vector store (the store is opened once and then reused)
         
         Returns:
             Optional[Chroma]: Vector store loaded or None if there is an error
         """
+        if self.vector_store is not None:
+            return self.vector_store
+        
         logger.info(f"Loading vector store from: {self.persist_directory}")
         
         try:
-            vector_store = Chroma(
-                persist_directory=self.persist_directory,
-                embedding_function=self.embeddings,
-                collection_name=self.collection_name
-            )
+            vector_store = self._open_vector_store()
             
             logger.info("Vector store loaded successfully")
             return vector_store
@@ -108,20 +243,64 @@ class EmbeddingManager:
             logger.error(f"Error loading vector store: {e}")
             return None
     
-    def update_vector_store(self, new_chunks: List[Document]) -> Optional[Chroma]:
+    def _add_chunks(self, 
+                    vector_store: Chroma, 
+                    chunks: Iterable[Document], 
+                    on_batch_committed: Optional[Callable[[int], None]] = None) -> List[str]:
+        """
+        Upsert chunks into a vector store in batches of ingestion_batch_size
+        
+        Only chunks whose ID is not in the collection yet are embedded, the
+        metadata of the others is refreshed.
+        
+        Args:
+            vector_store (Chroma): Vector store to add the chunks to
+            chunks (Iterable[Document]): Chunks to add (list or generator)
+            on_batch_committed (Optional[Callable[[int], None]]): Called with the number of chunks of each written batch
+            
+        Returns:
+            List[str]: IDs of all the chunks provided, without duplicates
+        """
+        chunk_ids = []
+        embedded_chunks = 0
+        
+        for batch in iter_batches(chunks, self.ingestion_batch_size):
+            # Chroma rejects duplicated IDs in the same call
+            unique_chunks = {}
+            for chunk_id, chunk in zip(get_chunk_ids(batch), batch):
+                unique_chunks.setdefault(chunk_id, chunk)
+            
+            batch_ids = list(unique_chunks)
+            existing_ids = set(vector_store._collection.get(ids=batch_ids, include=[])['ids'])
+            new_ids = [chunk_id for chunk_id in batch_ids if chunk_id not in existing_ids]
+            
+            if new_ids:
+                vector_store.add_documents([unique_chunks[chunk_id] for chunk_id in new_ids], ids=new_ids)
+            if existing_ids:
+                vector_store._collection.update(
+                    ids=list(existing_ids),
+                    metadatas=[unique_chunks[chunk_id].metadata for chunk_id in existing_ids]
+                )
+            
+            chunk_ids.extend(batch_ids)
+            embedded_chunks += len(new_ids)
+            logger.info(f"  - {len(chunk_ids)} chunks processed ({embedded_chunks} embedded, {len(chunk_ids) - embedded_chunks} already indexed)")
+            
+            if on_batch_committed:
+                on_batch_committed(len(batch))
+        
+        return chunk_ids
+    
+    def update_vector_store(self, new_chunks: Iterable[Document]) -> Optional[Chroma]:
         """
         Update the existing vector store with new chunks
         
         Args:
-            new_chunks (List[Document]): New chunks to add
+            new_chunks (Iterable[Document]): New chunks to add (list or generator)
             
         Returns:
             Optional[Chroma]: Updated vector store or None if there is an error
         """
-        if not new_chunks:
-            logger.warning("No new chunks provided to update")
-            return None
-        
         # Load the existing vector store
         vector_store = self.load_vector_store()
         
@@ -129,26 +308,146 @@ class EmbeddingManager:
             logger.info("Vector store not found, creating new")
             return self.create_vector_store(new_chunks)
         
-        logger.info(f"Adding {len(new_chunks)} new chunks to vector store")
-        
         try:
             # Add the new chunks
-            vector_store.add_documents(new_chunks)
+            chunk_ids = self._add_chunks(vector_store, new_chunks)
             
-            logger.info("Vector store updated successfully")
+            logger.info(f"Vector store updated successfully with {len(chunk_ids)} chunks")
             return vector_store
             
         except Exception as e:
             logger.error(f"Error updating vector store: {e}")
             return None
     
+    def delete_chunks(self, chunk_ids: List[str]) -> bool:
+        """
+        Delete chunks from the vector store by ID
+        
+        Args:
+            chunk_ids (List[str]): IDs of the chunks to delete
+            
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        if not chunk_ids:
+            return True
+        
+        vector_store = self.load_vector_store()
+        if vector_store is None:
+            return False
+        
+        try:
+            for batch in iter_batches(chunk_ids, self.ingestion_batch_size):
+                vector_store.delete(ids=batch)
+            
+            logger.info(f"Deleted {len(chunk_ids)} chunks from vector store")
+            return True
+            
+        except Exception as e:
+            logger.error(f"Error deleting chunks from vector store: {e}")
+            return False
+    
+    def delete_source(self, source: str) -> bool:
+        """
+        Delete every chunk of a source file from the vector store
+        
+        Args:
+            source (str): Value of the 'source' metadata of the chunks
+            
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        vector_store = self.load_vector_store()
+        if vector_store is None:
+            return False
+        
+        try:
+            vector_store._collection.delete(where={"source": source})
+            return True
+            
+        except Exception as e:
+            logger.error(f"Error deleting chunks of {source} from vector store: {e}")
+            return False
+    
+    def delete_collection(self) -> bool:
+        """
+        Delete the whole collection and its index manifest
+        
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        vector_store = self.load_vector_store()
+        if vector_store is None:
+            return False
+        
+        try:
+            vector_store.delete_collection()
+            self.vector_store = None
+            self.index_manifest.clear()
+            logger.info(f"Collection '{self.collection_name}' deleted")
+            return True
+            
+        except Exception as e:
+            logger.error(f"Error deleting collection '{self.collection_name}': {e}")
+            return False
+    
+    def record_index(self, **fields: Any) -> Dict[str, Any]:
+        """
+        Record the summary of the current index in the index manifest
+        
+        Args:
+            **fields: Build parameters to store with it (chunk_size, corpus_hash...)
+            
+        Returns:
+            Dict[str, Any]: Recorded summary
+        """
+        vector_store = self.load_vector_store()
+        if vector_store is None:
+            return {}
+        
+        self.index_manifest.record(
+            collection_name=self.collection_name,
+            embedding_model=self.embedding_model,
+            embedding_backend=self.embedding_backend,
+            distance_space=get_collection_space(vector_store),
+            document_count=vector_store._collection.count(),
+            **fields
+        )
+        return dict(self.index_manifest.data)
+    
+    def close(self) -> None:
+        """
+        Stop the embedding worker processes (started again if another batch is embedded)
+        """
+        if self.process_pool is not None:
+            self.process_pool.close()
+    
+    def clear_index(self) -> None:
+        """
+        Forget the recorded index summary (the vector store is left untouched)
+        """
+        self.index_manifest.clear()
+    
     def get_vector_store_info(self) -> Dict[str, Any]:
         """
         Return information about the vector store
         
+        The index manifest is read when it exists, so the store is not opened.
+        Indexes built before the manifest existed are counted once.
+        
         Returns:
             Dict[str, Any]: Information about the vector store
         """
+        if self.index_manifest.exists():
+            # Indexes recorded before the distance was configurable use the Chroma default
+            info = {"distance_space": "l2", **self.index_manifest.data}
+            info.update({
+                "status": "loaded",
+                "collection_name": self.collection_name,
+                "persist_directory": self.persist_directory
+            })
+            return info
+        
         vector_store = self.load_vector_store()
         
         if vector_store is None:
@@ -164,6 +463,7 @@ class EmbeddingManager:
                 "collection_name": self.collection_name,
                 "persist_directory": self.persist_directory,
                 "embedding_model": self.embedding_model,
+                "distance_space": get_collection_space(vector_store),
                 "document_count": count
             }
             
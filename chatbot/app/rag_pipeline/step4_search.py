@@ -2,23 +2,458 @@
 Search Module - Responsible for performing semantic searches in the vector store
 """
 
+from .query_cache import LRUCache, get_document_key, normalize_query
+from .collection_versions import CollectionPointer
+from .document_metadata import get_program_filter
+from .lexical_index import BM25Index
+from .reranker import CrossEncoderReranker
+from .vector_backends import distance_to_similarity, get_chunk_vectors, get_documents_by_metadata, get_search_space, similarity_search_by_vectors
+
 from langchain_core.documents import Document
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Callable, Optional, Tuple
+import json
 import logging
+import threading
+
+import numpy as np
 
 logger = logging.getLogger(__name__)
 
+def get_embedding_model_name(embeddings) -> str:
+    """
+    Return the name of the model behind a (possibly wrapped) embeddings object
+    
+    Args:
+        embeddings: LangChain embeddings, optionally wrapped by cache or batching layers
+        
+    Returns:
+        str: Model name, or the class name when no model name is exposed
+    """
+    current = embeddings
+    while current is not None:
+        for attribute in ('model_name', 'model'):
+            value = getattr(current, attribute, None)
+            if isinstance(value, str):
+                return value
+        current = getattr(current, 'embeddings', None)
+    return type(embeddings).__name__
+
+def reciprocal_rank_fusion(rankings: List[List[Document]], rrf_k: int = 60) -> List[Document]:
+    """
+    Fuse rankings with reciprocal rank fusion (score = sum of 1 / (rrf_k + rank))
+    
+    Args:
+        rankings (List[List[Document]]): Rankings to fuse, best first
+        rrf_k (int): Damping constant, larger values flatten the contribution of top ranks
+        
+    Returns:
+        List[Document]: Fused ranking with the 'rrf_score' metadata, best first
+    """
+    documents = {}
+    scores = {}
+    for ranking in rankings:
+        for rank, doc in enumerate(ranking, start=1):
+            key = get_document_key(doc)
+            if key in documents:
+                documents[key].metadata.update(doc.metadata)
+            else:
+                documents[key] = doc
+            scores[key] = scores.get(key, 0.0) + 1.0 / (rrf_k + rank)
+    
+    fused = sorted(documents, key=lambda key: scores[key], reverse=True)
+    for key in fused:
+        documents[key].metadata['rrf_score'] = scores[key]
+    return [documents[key] for key in fused]
+
+def get_relevance_score(doc: Document) -> Optional[float]:
+    """
+    Return the relevance of a retrieved chunk between 0 and 1
+    
+    A chunk is as relevant as its best evidence: the similarity of its embedding
+    or its keyword score (the share of the query terms it matches). The same
+    score_threshold applies to both, so chunks found only by keywords are kept
+    on the same terms as chunks found by similarity.
+    
+    Args:
+        doc (Document): Retrieved chunk
+        
+    Returns:
+        Optional[float]: Relevance, or None for a chunk without either score
+    """
+    scores = [doc.metadata[key] for key in ('similarity_score', 'keyword_score') if key in doc.metadata]
+    return max(scores) if scores else None
+
+def get_base_embeddings(embeddings):
+    """
+    Return the model behind cache, batching or worker pool wrappers
+    
+    Queries are embedded by the model directly, as the wrappers' embed_query does,
+    so they are not stored in the document cache nor sent to embedding workers.
+    
+    Args:
+        embeddings: LangChain embeddings, optionally wrapped
+        
+    Returns:
+        The innermost embeddings object
+    """
+    while getattr(embeddings, 'embeddings', None) is not None:
+        embeddings = embeddings.embeddings
+    return embeddings
+
+def embed_query_batch(embeddings, queries: List[str]) -> List[List[float]]:
+    """
+    Embed several queries, in one call when the model embeds queries like documents
+    
+    Models with query-specific prompts or encode options are called once per
+    query, so every vector is the one embed_query returns.
+    
+    Args:
+        embeddings: Model embeddings (not a cache or batching wrapper)
+        queries (List[str]): Queries to embed
+        
+    Returns:
+        List[List[float]]: Embedding of each query
+    """
+    from langchain_huggingface import HuggingFaceEmbeddings
+    
+    if hasattr(embeddings, 'embed_queries'):
+        return embeddings.embed_queries(queries)
+    if isinstance(embeddings, HuggingFaceEmbeddings) and not getattr(embeddings, 'query_encode_kwargs', None):
+        return embeddings.embed_documents(queries)
+    return [embeddings.embed_query(query) for query in queries]
+
+def maximal_marginal_relevance(query_vector: List[float],
+                               candidate_vectors: np.ndarray,
+                               k: int = 4,
+                               lambda_mult: float = 0.5) -> List[int]:
+    """
+    Select candidates that are relevant to the query but not redundant with each other
+    
+    Each step picks the candidate maximizing lambda * sim(query) - (1 - lambda) * max sim(selected),
+    with cosine similarities computed once as matrix products.
+    
+    Args:
+        query_vector (List[float]): Query embedding
+        candidate_vectors (np.ndarray): (n, dimension) candidate embeddings
+        k (int): Number of candidates to select
+        lambda_mult (float): 1 ranks by relevance only, 0 by diversity only
+        
+    Returns:
+        List[int]: Indexes of the selected candidates, in selection order
+    """
+    vectors = np.asarray(candidate_vectors, dtype=np.float32)
+    if not len(vectors) or k <= 0:
+        return []
+    
+    vectors = vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+    query = np.asarray(query_vector, dtype=np.float32)
+    query = query / max(float(np.linalg.norm(query)), 1e-12)
+    
+    relevance = vectors @ query
+    similarity = vectors @ vectors.T
+    
+    selected = [int(np.argmax(relevance))]
+    max_similarity = similarity[selected[0]].copy()
+    available = np.ones(len(vectors), dtype=bool)
+    available[selected[0]] = False
+    
+    while len(selected) < min(k, len(vectors)):
+        scores = lambda_mult * relevance - (1 - lambda_mult) * max_similarity
+        scores[~available] = -np.inf
+        best = int(np.argmax(scores))
+        selected.append(best)
+        available[best] = False
+        np.maximum(max_similarity, similarity[best], out=max_similarity)
+    
+    return selected
+
 class SearchEngine:
     """Class to perform semantic searches in the vector store"""
     
-    def __init__(self, vector_store):
+    def __init__(self, 
+                 vector_store, 
+                 query_cache_size: int = 1024,
+                 collection_pointer: Optional[CollectionPointer] = None,
+                 vector_store_loader: Optional[Callable[[str], Any]] = None,
+                 lexical_index: Optional[BM25Index] = None,
+                 rrf_k: int = 60,
+                 fusion_candidates: int = 20,
+                 reranker: Optional[CrossEncoderReranker] = None,
+                 rerank_candidates: int = 30,
+                 mmr_lambda: Optional[float] = None,
+                 mmr_candidates: int = 20,
+                 program_filter: bool = True):
         """
         Initialize the search engine
         
         Args:
             vector_store: Loaded vector store (Chroma)
+            query_cache_size (int): Maximum number of query embeddings kept in memory
+            collection_pointer (Optional[CollectionPointer]): Pointer to the live collection version,
+                                                              followed when another build flips it
+            vector_store_loader (Optional[Callable[[str], Any]]): Loads the vector store of a collection name
+            lexical_index (Optional[BM25Index]): BM25 index of the same chunks, enables lexical fusion in hybrid_search
+            rrf_k (int): Reciprocal rank fusion constant
+            fusion_candidates (int): Number of candidates taken from each ranking before fusion
+            reranker (Optional[CrossEncoderReranker]): Cross-encoder that reorders the candidates before the top k is kept
+            rerank_candidates (int): Number of candidates retrieved for the reranker
+            mmr_lambda (Optional[float]): Select the top k by maximal marginal relevance with this lambda
+                                          (1 = relevance only, 0 = diversity only, None disables it)
+            mmr_candidates (int): Number of candidates retrieved for maximal marginal relevance
+            program_filter (bool): Restrict searches to the incentive programs named in the query,
+                                   searching the whole corpus when nothing relevant is found there
         """
         self.vector_store = vector_store
+        self.collection_pointer = collection_pointer
+        self.vector_store_loader = vector_store_loader
+        self.active_collection = collection_pointer.read() if collection_pointer else None
+        self._pointer_mtime = collection_pointer.get_mtime() if collection_pointer else None
+        self._refresh_lock = threading.Lock()
+        self.embeddings = getattr(vector_store, 'embeddings', None) if vector_store else None
+        self.embedding_model_name = get_embedding_model_name(self.embeddings) if self.embeddings else None
+        self.query_cache = LRUCache(query_cache_size)
+        self.lexical_index = lexical_index
+        self.rrf_k = rrf_k
+        self.fusion_candidates = fusion_candidates
+        self.reranker = reranker
+        self.rerank_candidates = rerank_candidates
+        self.mmr_lambda = mmr_lambda
+        self.mmr_candidates = mmr_candidates
+        self.program_filter = program_filter
+    
+    def embed_query(self, query: str) -> List[float]:
+        """
+        Embed a query, reusing the embedding of an equivalent previous query
+        
+        Args:
+            query (str): Query to embed
+            
+        Returns:
+            List[float]: Embedding of the query
+        """
+        normalized_query = normalize_query(query)
+        key = (self.embedding_model_name, normalized_query)
+        
+        embedding = self.query_cache.get(key)
+        if embedding is None:
+            embedding = self.embeddings.embed_query(normalized_query)
+            self.query_cache.put(key, embedding)
+        
+        return embedding
+    
+    def embed_queries(self, queries: List[str]) -> List[List[float]]:
+        """
+        Embed several queries, running one batched forward pass for the ones not cached
+        
+        Vectors are computed on the query path of the model, like embed_query, so
+        both methods can share the query cache.
+        
+        Args:
+            queries (List[str]): Queries to embed
+            
+        Returns:
+            List[List[float]]: Embedding of each query
+        """
+        normalized_queries = [normalize_query(query) for query in queries]
+        keys = [(self.embedding_model_name, normalized_query) for normalized_query in normalized_queries]
+        embeddings = [self.query_cache.get(key) for key in keys]
+        
+        # Each distinct missing query is embedded once
+        missing = list(dict.fromkeys(
+            normalized_queries[i] for i, embedding in enumerate(embeddings) if embedding is None
+        ))
+        if missing:
+            computed = dict(zip(missing, embed_query_batch(get_base_embeddings(self.embeddings), missing)))
+            for i, embedding in enumerate(embeddings):
+                if embedding is None:
+                    embeddings[i] = computed[normalized_queries[i]]
+                    self.query_cache.put(keys[i], embeddings[i])
+        
+        return embeddings
+    
+    def refresh_vector_store(self) -> bool:
+        """
+        Switch to the collection version the pointer designates if it was flipped
+        
+        Only a stat of the pointer file is done when nothing changed.
+        
+        Returns:
+            bool: True if the search engine switched to another collection
+        """
+        if self.collection_pointer is None or self.vector_store_loader is None:
+            return False
+        
+        pointer_mtime = self.collection_pointer.get_mtime()
+        if pointer_mtime == self._pointer_mtime:
+            return False
+        
+        with self._refresh_lock:
+            if pointer_mtime == self._pointer_mtime:
+                return False
+            
+            self._pointer_mtime = pointer_mtime
+            collection_name = self.collection_pointer.read()
+            if not collection_name or collection_name == self.active_collection:
+                return False
+            
+            vector_store = self.vector_store_loader(collection_name)
+            if vector_store is None:
+                logger.error(f"Could not load collection '{collection_name}', keeping '{self.active_collection}'")
+                return False
+            
+            logger.info(f"Search engine switched to collection '{collection_name}'")
+            self.vector_store = vector_store
+            self.active_collection = collection_name
+            return True
+    
+    def _filter_by_similarity(self, 
+                              results: List[Tuple[Document, float]], 
+                              score_threshold: float) -> List[Document]:
+        """
+        Convert the distances of a search into similarities and keep the documents above the threshold
+        
+        The conversion follows the distance function of the searched store
+        (1 - d for cosine and inner product, 1 / (1 + d) for L2).
+        
+        Args:
+            results (List[Tuple[Document, float]]): Documents and distances, lower is more similar
+            score_threshold (float): Minimum similarity between 0 and 1
+            
+        Returns:
+            List[Document]: Documents with the 'similarity_score' and 'distance' metadata
+        """
+        space = get_search_space(self.vector_store)
+        
+        filtered_results = []
+        for doc, distance in results:
+            similarity = distance_to_similarity(distance, space)
+            if similarity >= score_threshold:
+                doc.metadata['similarity_score'] = similarity
+                doc.metadata['distance'] = distance
+                filtered_results.append(doc)
+        return filtered_results
+    
+    def _get_candidate_count(self, k: int) -> int:
+        """
+        Return how many results to retrieve so that the top k can be chosen by the reranker or MMR
+        
+        Args:
+            k (int): Number of results returned to the caller
+            
+        Returns:
+            int: Number of candidates to retrieve
+        """
+        candidates = k
+        if self.reranker is not None:
+            candidates = max(candidates, self.rerank_candidates)
+        if self.mmr_lambda is not None:
+            candidates = max(candidates, self.mmr_candidates)
+        return candidates
+    
+    def _diversify(self, 
+                   query_embedding: List[float], 
+                   documents: List[Document], 
+                   k: int, 
+                   lambda_mult: float) -> List[Document]:
+        """
+        Keep k candidates selected by maximal marginal relevance
+        
+        Args:
+            query_embedding (List[float]): Embedding of the query
+            documents (List[Document]): Candidates
+            k (int): Maximum number of results
+            lambda_mult (float): Relevance/diversity trade-off
+            
+        Returns:
+            List[Document]: Selected documents with the 'mmr_rank' metadata
+        """
+        if len(documents) <= 1:
+            return documents[:k]
+        
+        vectors = get_chunk_vectors(self.vector_store, [get_document_key(doc) for doc in documents])
+        selected = [documents[i] for i in maximal_marginal_relevance(query_embedding, vectors, k, lambda_mult)]
+        for rank, doc in enumerate(selected, start=1):
+            doc.metadata['mmr_rank'] = rank
+        return selected
+    
+    def _select_top_k(self, 
+                      query: str, 
+                      query_embedding: List[float], 
+                      documents: List[Document], 
+                      k: int) -> List[Document]:
+        """
+        Keep the k best candidates: by cross-encoder score when a reranker is set,
+        then by maximal marginal relevance when mmr_lambda is set
+        
+        When both are enabled, MMR chooses among the 2k candidates the reranker ranks best.
+        
+        Args:
+            query (str): Query that retrieved the candidates
+            query_embedding (List[float]): Embedding of the query
+            documents (List[Document]): Candidates in retrieval order
+            k (int): Maximum number of results
+            
+        Returns:
+            List[Document]: Top k documents
+        """
+        if self.reranker is not None and documents:
+            documents = self.reranker.rerank(query, documents, k if self.mmr_lambda is None else 2 * k)
+        if self.mmr_lambda is not None and len(documents) > k:
+            documents = self._diversify(query_embedding, documents, k, self.mmr_lambda)
+        return documents[:k]
+    
+    def _detect_metadata_filter(self, query: str) -> Optional[Dict[str, Any]]:
+        """
+        Return the program filter of a query when program detection is enabled
+        
+        Args:
+            query (str): Query text
+            
+        Returns:
+            Optional[Dict[str, Any]]: Metadata filter, or None to search the whole corpus
+        """
+        if not self.program_filter:
+            return None
+        
+        metadata_filter = get_program_filter(query)
+        if metadata_filter:
+            logger.info(f"Restricting search to programs {metadata_filter['program']['$in']}")
+        return metadata_filter
+    
+    def _vector_search(self, 
+                       query_embedding: List[float], 
+                       k: int, 
+                       metadata_filter: Optional[Dict[str, Any]] = None) -> List[Tuple[Document, float]]:
+        """
+        Search the vector store, applying the metadata filter before scoring
+        
+        Args:
+            query_embedding (List[float]): Query vector
+            k (int): Number of candidates
+            metadata_filter (Optional[Dict[str, Any]]): Metadata filters
+            
+        Returns:
+            List[Tuple[Document, float]]: Documents and distances
+        """
+        if metadata_filter:
+            return self.vector_store.similarity_search_by_vector_with_relevance_scores(
+                query_embedding, 
+                k=k,
+                filter=metadata_filter
+            )
+        return self.vector_store.similarity_search_by_vector_with_relevance_scores(
+            query_embedding, 
+            k=k
+        )
+    
+    def get_query_cache_info(self) -> Dict[str, Any]:
+        """
+        Return the query embedding cache counters
+        
+        Returns:
+            Dict[str, Any]: Size, capacity, hits, misses and hit rate
+        """
+        return self.query_cache.get_info()
     
     def similarity_search(self, 
                         query: str, 
@@ -35,6 +470,8 @@ class SearchEngine:
         Returns:
             List[Document]: List of relevant documents
         """
+        self.refresh_vector_store()
+        
         if not self.vector_store:
             logger.error("Vector store not available for search")
             return []
@@ -42,18 +479,21 @@ class SearchEngine:
         try:
             logger.info(f"Performing search for: '{query}'")
             
-            # Perform similarity search
-            results = self.vector_store.similarity_search_with_score(
-                query, 
-                k=k
-            )
+            # Perform similarity search, restricted to the programs named in the query
+            query_embedding = self.embed_query(query)
+            candidates = self._get_candidate_count(k)
+            metadata_filter = self._detect_metadata_filter(query)
+            results = self._vector_search(query_embedding, candidates, metadata_filter)
             
             # Filter by score threshold
-            filtered_results = []
-            for doc, score in results:
-                if score >= score_threshold:
-                    doc.metadata['similarity_score'] = score
-                    filtered_results.append(doc)
+            filtered_results = self._filter_by_similarity(results, score_threshold)
+            
+            if metadata_filter and not filtered_results:
+                logger.info("No relevant documents in the detected programs, searching the whole corpus")
+                results = self._vector_search(query_embedding, candidates)
+                filtered_results = self._filter_by_similarity(results, score_threshold)
+            
+            filtered_results = self._select_top_k(query, query_embedding, filtered_results, k)
             
             logger.info(f"Found {len(filtered_results)} relevant documents")
             return filtered_results
@@ -62,39 +502,259 @@ class SearchEngine:
             logger.error(f"Error in similarity search: {e}")
             return []
     
-    def search_by_metadata(self, 
-                          metadata_filter: Dict[str, Any], 
-                          k: int = 10) -> List[Document]:
+    def search_many(self, 
+                    queries: List[str], 
+                    k: int = 4, 
+                    metadata_filter: Optional[Dict[str, Any]] = None,
+                    score_threshold: float = 0.7) -> List[List[Document]]:
         """
-        Search documents by metadata filters
+        Perform similarity search for several queries at once
+        
+        Queries are embedded in one batch and searched in one request to the
+        vector store (one matrix product for the in-process indexes) per
+        metadata filter.
         
         Args:
-            metadata_filter (Dict[str, Any]): Metadata filters
-            k (int): Maximum number of results
+            queries (List[str]): Queries to be searched
+            k (int): Maximum number of results per query
+            metadata_filter (Optional[Dict[str, Any]]): Metadata filters (by default each query is
+                                                        restricted to the programs it names)
+            score_threshold (float): Minimum similarity score
             
         Returns:
-            List[Document]: List of documents that meet the filters
+            List[List[Document]]: Relevant documents of each query, in the order of the queries
         """
+        self.refresh_vector_store()
+        
         if not self.vector_store:
             logger.error("Vector store not available for search")
+            return [[] for _ in queries]
+        
+        if not queries:
             return []
         
         try:
-            logger.info(f"Searching by metadata: {metadata_filter}")
+            logger.info(f"Performing batched search for {len(queries)} queries")
             
-            # Search with metadata filters
-            results = self.vector_store.similarity_search(
-                "",  # Empty query for metadata-only search
-                k=k,
-                filter=metadata_filter
+            query_embeddings = self.embed_queries(queries)
+            candidates = self._get_candidate_count(k)
+            if metadata_filter:
+                query_filters = [metadata_filter] * len(queries)
+            else:
+                query_filters = [self._detect_metadata_filter(query) for query in queries]
+            
+            # Queries sharing a filter are searched together
+            groups = {}
+            for i, query_filter in enumerate(query_filters):
+                groups.setdefault(json.dumps(query_filter, sort_keys=True), []).append(i)
+            
+            filtered_results = [None] * len(queries)
+            for indices in groups.values():
+                results = similarity_search_by_vectors(
+                    self.vector_store, 
+                    [query_embeddings[i] for i in indices], 
+                    k=candidates, 
+                    filter=query_filters[indices[0]]
+                )
+                for i, query_results in zip(indices, results):
+                    # Filter by score threshold
+                    filtered_results[i] = self._filter_by_similarity(query_results, score_threshold)
+            
+            # Queries with nothing relevant in their detected programs search the whole corpus
+            if not metadata_filter:
+                fallback = [i for i, query_filter in enumerate(query_filters) if query_filter and not filtered_results[i]]
+                if fallback:
+                    results = similarity_search_by_vectors(
+                        self.vector_store, 
+                        [query_embeddings[i] for i in fallback], 
+                        k=candidates
+                    )
+                    for i, query_results in zip(fallback, results):
+                        filtered_results[i] = self._filter_by_similarity(query_results, score_threshold)
+            
+            all_results = [
+                self._select_top_k(query, query_embedding, query_results, k)
+                for query, query_embedding, query_results in zip(queries, query_embeddings, filtered_results)
+            ]
+            
+            logger.info(f"Found {sum(len(documents) for documents in all_results)} relevant documents for {len(queries)} queries")
+            return all_results
+            
+        except Exception as e:
+            logger.error(f"Error in batched search: {e}")
+            return [[] for _ in queries]
+    
+    def search_by_vectors(self, 
+                          query_embeddings: List[List[float]], 
+                          k: int = 4, 
+                          metadata_filter: Optional[Dict[str, Any]] = None,
+                          score_threshold: float = 0.7) -> List[List[Document]]:
+        """
+        Perform similarity search for query vectors embedded by the caller
+        
+        Only the vector search and the similarity threshold are applied (no
+        reranking or MMR), so results of several engines can be merged by score.
+        
+        Args:
+            query_embeddings (List[List[float]]): Query vectors
+            k (int): Maximum number of results per query
+            metadata_filter (Optional[Dict[str, Any]]): Metadata filters
+            score_threshold (float): Minimum similarity score
+            
+        Returns:
+            List[List[Document]]: Relevant documents of each query, best first
+        """
+        self.refresh_vector_store()
+        
+        if not self.vector_store:
+            logger.error("Vector store not available for search")
+            return [[] for _ in query_embeddings]
+        
+        try:
+            results = similarity_search_by_vectors(self.vector_store, query_embeddings, k=k, filter=metadata_filter)
+            return [self._filter_by_similarity(query_results, score_threshold) for query_results in results]
+            
+        except Exception as e:
+            logger.error(f"Error in vector search: {e}")
+            return [[] for _ in query_embeddings]
+    
+    def browse_by_metadata(self, 
+                           metadata_filter: Optional[Dict[str, Any]] = None, 
+                           limit: int = 100, 
+                           offset: int = 0, 
+                           fields: Optional[List[str]] = None, 
+                           include_content: bool = True) -> Dict[str, Any]:
+        """
+        Page through the chunks matching metadata filters, without embedding or vector search
+        
+        Args:
+            metadata_filter (Optional[Dict[str, Any]]): Metadata filters (None lists every chunk)
+            limit (int): Maximum number of chunks in the page
+            offset (int): Number of matching chunks to skip
+            fields (Optional[List[str]]): Metadata fields to return (None returns all of them)
+            include_content (bool): Return the chunk texts (empty page_content otherwise)
+            
+        Returns:
+            Dict[str, Any]: Documents of the page, offset, limit and next_offset (None on the last page)
+        """
+        self.refresh_vector_store()
+        
+        page = {"documents": [], "offset": offset, "limit": limit, "next_offset": None}
+        if not self.vector_store:
+            logger.error("Vector store not available for search")
+            return page
+        
+        try:
+            # One extra chunk tells whether another page follows
+            documents = get_documents_by_metadata(
+                self.vector_store, 
+                where=metadata_filter, 
+                limit=limit + 1, 
+                offset=offset, 
+                include_content=include_content
             )
             
-            logger.info(f"Found {len(results)} documents with the specified filters")
-            return results
+            if len(documents) > limit:
+                documents = documents[:limit]
+                page["next_offset"] = offset + limit
+            
+            if fields is not None:
+                for doc in documents:
+                    doc.metadata = {field: doc.metadata[field] for field in fields if field in doc.metadata}
+            
+            page["documents"] = documents
+            return page
             
         except Exception as e:
-            logger.error(f"Error in metadata search: {e}")
+            logger.error(f"Error browsing by metadata: {e}")
+            return page
+    
+    def search_by_metadata(self, 
+                          metadata_filter: Dict[str, Any], 
+                          k: int = 10) -> List[Document]:
+        """
+        Search documents by metadata filters
+        
+        Args:
+            metadata_filter (Dict[str, Any]): Metadata filters
+            k (int): Maximum number of results
+            
+        Returns:
+            List[Document]: List of documents that meet the filters
+        """
+        logger.info(f"Searching by metadata: {metadata_filter}")
+        
+        results = self.browse_by_metadata(metadata_filter, limit=k)["documents"]
+        
+        logger.info(f"Found {len(results)} documents with the specified filters")
+        return results
+    
+    def lexical_search(self, 
+                       query: str, 
+                       k: int = 4, 
+                       metadata_filter: Optional[Dict[str, Any]] = None,
+                       score_threshold: Optional[float] = None) -> List[Document]:
+        """
+        Perform BM25 keyword search
+        
+        Args:
+            query (str): Query to be searched
+            k (int): Maximum number of results
+            metadata_filter (Optional[Dict[str, Any]]): Metadata filters
+            score_threshold (Optional[float]): Minimum keyword score between 0 and 1 (None keeps every match)
+            
+        Returns:
+            List[Document]: List of documents with the 'bm25_score' and 'keyword_score' metadata
+        """
+        # One reference for the whole search: a collection switch replaces the index
+        lexical_index = self.lexical_index
+        if lexical_index is None:
             return []
+        
+        query = normalize_query(query)
+        reference_score = lexical_index.get_reference_score(query)
+        
+        results = []
+        for doc, score in lexical_index.similarity_search_with_score(query, k=k, filter=metadata_filter):
+            keyword_score = min(1.0, score / reference_score) if reference_score > 0 else 0.0
+            if score_threshold is not None and keyword_score < score_threshold:
+                continue
+            doc.metadata['bm25_score'] = score
+            doc.metadata['keyword_score'] = keyword_score
+            results.append(doc)
+        return results
+    
+    def _retrieve_fused(self, 
+                        query: str, 
+                        query_embedding: List[float], 
+                        candidates: int, 
+                        metadata_filter: Optional[Dict[str, Any]], 
+                        score_threshold: float) -> List[Document]:
+        """
+        Return the relevant candidates of the similarity and BM25 rankings, fused by reciprocal rank
+        
+        Each ranking is cut at score_threshold (similarity and keyword score
+        respectively) before fusion, so every candidate passes get_relevance_score.
+        
+        Args:
+            query (str): Query text
+            query_embedding (List[float]): Query vector
+            candidates (int): Number of candidates taken from each ranking
+            metadata_filter (Optional[Dict[str, Any]]): Metadata filters
+            score_threshold (float): Minimum similarity or keyword score
+            
+        Returns:
+            List[Document]: Candidates, best first
+        """
+        results = self._vector_search(query_embedding, candidates, metadata_filter)
+        
+        # Filter by score threshold
+        filtered_results = self._filter_by_similarity(results, score_threshold)
+        
+        if self.lexical_index is not None:
+            lexical_results = self.lexical_search(query, candidates, metadata_filter, score_threshold)
+            filtered_results = reciprocal_rank_fusion([filtered_results, lexical_results], self.rrf_k)
+        return filtered_results
     
     def hybrid_search(self, 
                      query: str, 
@@ -102,17 +762,23 @@ class SearchEngine:
                      k: int = 4, 
                      score_threshold: float = 0.7) -> List[Document]:
         """
-        Perform hybrid search (similarity + metadata)
+        Perform hybrid search (similarity + BM25 keywords, fused by reciprocal rank, + metadata)
+        
+        Without a lexical index only the similarity ranking is used.
         
         Args:
             query (str): Query to be searched
-            metadata_filter (Optional[Dict[str, Any]]): Metadata filters
+            metadata_filter (Optional[Dict[str, Any]]): Metadata filters (by default the search is
+                                                        restricted to the programs named in the query)
             k (int): Maximum number of results
-            score_threshold (float): Minimum similarity score
+            score_threshold (float): Minimum relevance: similarity for the similarity ranking,
+                                     keyword score for the BM25 ranking
             
         Returns:
             List[Document]: List of relevant documents
         """
+        self.refresh_vector_store()
+        
         if not self.vector_store:
             logger.error("Vector store not available for search")
             return []
@@ -120,25 +786,21 @@ class SearchEngine:
         try:
             logger.info(f"Performing hybrid search for: '{query}'")
             
+            # Take more candidates than needed when the rankings are fused or reranked
+            candidates = self._get_candidate_count(k)
+            if self.lexical_index is not None:
+                candidates = max(candidates, self.fusion_candidates)
+            
             # Hybrid search
-            if metadata_filter:
-                results = self.vector_store.similarity_search_with_score(
-                    query, 
-                    k=k,
-                    filter=metadata_filter
-                )
-            else:
-                results = self.vector_store.similarity_search_with_score(
-                    query, 
-                    k=k
-                )
+            query_embedding = self.embed_query(query)
+            detected_filter = None if metadata_filter else self._detect_metadata_filter(query)
+            filtered_results = self._retrieve_fused(query, query_embedding, candidates, 
+                                                    metadata_filter or detected_filter, score_threshold)
             
-            # Filter by score threshold
-            filtered_results = []
-            for doc, score in results:
-                if score >= score_threshold:
-                    doc.metadata['similarity_score'] = score
-                    filtered_results.append(doc)
+            if detected_filter and not filtered_results:
+                logger.info("No relevant documents in the detected programs, searching the whole corpus")
+                filtered_results = self._retrieve_fused(query, query_embedding, candidates, None, score_threshold)
+            filtered_results = self._select_top_k(query, query_embedding, filtered_results, k)
             
             logger.info(f"Found {len(filtered_results)} relevant documents")
             return filtered_results
@@ -2,6 +2,8 @@
 Chat Module - Responsible for integrating search with AI model to generate responses
 """
 
+from .step4_search import get_relevance_score
+
 from openai import OpenAI
 from langchain_core.documents import Document
 from typing import List, Dict, Any, Optional
@@ -15,6 +17,88 @@ load_dotenv()
 
 logger = logging.getLogger(__name__)
 
+# Shortest suffix/prefix match treated as chunk overlap rather than a coincidence
+MIN_OVERLAP_LENGTH = 10
+
+def strip_overlap(previous_text: str, text: str, max_overlap: int = 200) -> str:
+    """
+    Remove from a chunk the beginning it repeats from the end of the previous chunk
+    
+    Args:
+        previous_text (str): Text of the previous chunk of the page
+        text (str): Text of the next chunk
+        max_overlap (int): Longest overlap to look for (the chunker overlap)
+        
+    Returns:
+        str: Text of the next chunk without the repeated part
+    """
+    for size in range(min(max_overlap, len(previous_text), len(text)), MIN_OVERLAP_LENGTH - 1, -1):
+        if previous_text.endswith(text[:size]):
+            return text[size:]
+    return text
+
+def merge_adjacent_chunks(documents: List[Document], max_overlap: int = 200) -> List[Document]:
+    """
+    Merge the retrieved chunks that follow each other on the same page, without their overlap
+    
+    A merged document takes the position and the metadata of its best ranked chunk.
+    
+    Args:
+        documents (List[Document]): Retrieved chunks, best first
+        max_overlap (int): Overlap between consecutive chunks used by the chunker
+        
+    Returns:
+        List[Document]: Documents with consecutive chunks merged, best first
+    """
+    groups = {}
+    for rank, doc in enumerate(documents):
+        page_key = (doc.metadata.get('source'), doc.metadata.get('page'))
+        groups.setdefault(page_key, []).append((rank, doc))
+    
+    merged = []
+    for page_documents in groups.values():
+        # Split the chunks of the page into runs of consecutive chunk_index
+        runs = []
+        for rank, doc in sorted(page_documents, key=lambda item: item[1].metadata.get('chunk_index', -1)):
+            chunk_index = doc.metadata.get('chunk_index')
+            if (runs and isinstance(chunk_index, int)
+                    and runs[-1][-1][1].metadata.get('chunk_index') == chunk_index - 1):
+                runs[-1].append((rank, doc))
+            else:
+                runs.append([(rank, doc)])
+        
+        for run in runs:
+            if len(run) == 1:
+                merged.append(run[0])
+                continue
+            
+            text = run[0][1].page_content
+            for _, doc in run[1:]:
+                text += strip_overlap(text, doc.page_content, max_overlap)
+            
+            best_rank, best_doc = min(run, key=lambda item: item[0])
+            metadata = dict(best_doc.metadata)
+            metadata['merged_chunks'] = len(run)
+            merged.append((best_rank, Document(page_content=text, metadata=metadata)))
+    
+    return [doc for _, doc in sorted(merged, key=lambda item: item[0])]
+
+def get_average_relevance(documents: List[Document]) -> Optional[float]:
+    """
+    Return the average relevance of the retrieved documents
+    
+    Relevance is the best of the similarity and keyword scores (get_relevance_score),
+    so documents found only by keywords count as well.
+    
+    Args:
+        documents (List[Document]): Retrieved documents
+        
+    Returns:
+        Optional[float]: Average relevance between 0 and 1, or None if no document was scored
+    """
+    scores = [score for score in map(get_relevance_score, documents) if score is not None]
+    return sum(scores) / len(scores) if scores else None
+
 class RAGChatbot:
     """Class responsible for integrating RAG with AI model for chat"""
     
@@ -22,7 +106,9 @@ class RAGChatbot:
                  search_engine,
                  model: str = "gpt-4o-mini",
                  max_tokens: int = 1000,
-                 temperature: float = 0.7):
+                 temperature: float = 0.7,
+                 merge_adjacent: bool = False,
+                 chunk_overlap: int = 200):
         """
         Initialize the RAG chatbot
         
@@ -31,11 +117,15 @@ class RAGChatbot:
             model (str): AI model to be used
             max_tokens (int): Maximum number of tokens in the response
             temperature (float): Temperature for response generation
+            merge_adjacent (bool): Merge consecutive chunks of the same page and strip their overlap in the context
+            chunk_overlap (int): Overlap between consecutive chunks used by the chunker
         """
         self.search_engine = search_engine
         self.model = model
         self.max_tokens = max_tokens
         self.temperature = temperature
+        self.merge_adjacent = merge_adjacent
+        self.chunk_overlap = chunk_overlap
         
         # Initialize OpenAI client
         api_key = os.getenv("OPENAI_API_KEY")
@@ -58,11 +148,16 @@ class RAGChatbot:
         if not documents:
             return ""
         
+        if self.merge_adjacent:
+            documents = merge_adjacent_chunks(documents, self.chunk_overlap)
+        
         context_parts = []
         for i, doc in enumerate(documents):
             # Add document information
             source = doc.metadata.get('source', 'Unknown source')
-            score = doc.metadata.get('similarity_score', 'N/A')
+            score = get_relevance_score(doc)
+            if score is None:
+                score = 'N/A'
             
             context_parts.append(f"Document {i+1} (Score: {score}):")
             context_parts.append(f"Source: {source}")
@@ -176,7 +271,7 @@ Por favor, com base APENAS no contexto acima, crie uma questão de múltipla esc
         Args:
             query (str): User's question
             k (int): Number of documents to search
-            score_threshold (float): Minimum similarity score
+            score_threshold (float): Minimum relevance (similarity or keyword score)
             
         Returns:
             Dict[str, Any]: Response with detailed information
@@ -187,15 +282,17 @@ Por favor, com base APENAS no contexto acima, crie uma questão de múltipla esc
             
             logger.info(f"Processing question: '{normalized_query}'")
             
-            # Search relevant documents
-            relevant_docs = self.search_engine.similarity_search(
+            # Search relevant documents (keywords are fused in when a lexical index is loaded)
+            relevant_docs = self.search_engine.hybrid_search(
                 normalized_query, 
                 k=k, 
                 score_threshold=score_threshold
             )
             
-            if not relevant_docs:
-                logger.warning("No relevant documents found")
+            # Nothing cleared the relevance threshold: answer without paying for an LLM call
+            avg_score = get_average_relevance(relevant_docs)
+            if avg_score is None:
+                logger.warning("No relevant documents found, skipping the LLM call")
                 return {
                     "response": "Sorry, I couldn't find relevant information about your question in the available documentation.",
                     "sources": [],
@@ -229,15 +326,15 @@ Por favor, com base APENAS no contexto acima, crie uma questão de múltipla esc
             # Prepare source information
             sources = []
             for doc in relevant_docs:
+                score = get_relevance_score(doc)
                 source_info = {
                     "source": doc.metadata.get('source', 'Unknown source'),
                     "file_name": doc.metadata.get('file_name', 'N/A'),
-                    "score": doc.metadata.get('similarity_score', 'N/A')
+                    "score": score if score is not None else 'N/A'
                 }
                 sources.append(source_info)
             
             # Determine confidence level
-            avg_score = sum([doc.metadata.get('similarity_score', 0) for doc in relevant_docs]) / len(relevant_docs)
             confidence = "high" if avg_score > 0.8 else "medium" if avg_score > 0.6 else "low"
             
             result = {
@@ -263,7 +360,8 @@ Por favor, com base APENAS no contexto acima, crie uma questão de múltipla esc
     def generate_multiple_choice_question(self, 
                                         topic: str, 
                                         k: int = 4, 
-                                        score_threshold: float = 0.7) -> Dict[str, Any]:
+                                        score_threshold: float = 0.7,
+                                        relevant_docs: Optional[List[Document]] = None) -> Dict[str, Any]:
         """
         Generate a multiple choice question based on the given topic
         
@@ -271,6 +369,7 @@ Por favor, com base APENAS no contexto acima, crie uma questão de múltipla esc
             topic (str): Topic to generate question about
             k (int): Number of documents to search
             score_threshold (float): Minimum similarity score
+            relevant_docs (Optional[List[Document]]): Documents already retrieved for the topic (skips the search)
             
         Returns:
             Dict[str, Any]: Generated question with options and answer
@@ -281,14 +380,17 @@ Por favor, com base APENAS no contexto acima, crie uma questão de múltipla esc
             
             logger.info(f"Generating multiple choice question for topic: '{normalized_topic}'")
             
-            # Search relevant documents
-            relevant_docs = self.search_engine.similarity_search(
-                normalized_topic, 
-                k=k, 
-                score_threshold=score_threshold
-            )
-            
-            if not relevant_docs:
+            # Search relevant documents unless they were prefetched
+            if relevant_docs is None:
+                relevant_docs = self.search_engine.similarity_search(
+                    normalized_topic, 
+                    k=k, 
+                    score_threshold=score_threshold
+                )
+            
+            # Nothing cleared the relevance threshold: skip the LLM call
+            avg_score = get_average_relevance(relevant_docs)
+            if avg_score is None:
                 logger.warning("No relevant documents found for question generation")
                 return {
                     "error": "Não foi possível encontrar informações relevantes sobre o tópico solicitado.",
@@ -380,15 +482,15 @@ Por favor, com base APENAS no contexto acima, crie uma questão de múltipla esc
             # Prepare source information
             sources = []
             for doc in relevant_docs:
+                score = get_relevance_score(doc)
                 source_info = {
                     "source": doc.metadata.get('source', 'Unknown source'),
                     "file_name": doc.metadata.get('file_name', 'N/A'),
-                    "score": doc.metadata.get('similarity_score', 'N/A')
+                    "score": score if score is not None else 'N/A'
                 }
                 sources.append(source_info)
             
             # Determine confidence level
-            avg_score = sum([doc.metadata.get('similarity_score', 0) for doc in relevant_docs]) / len(relevant_docs)
             confidence = "high" if avg_score > 0.8 else "medium" if avg_score > 0.6 else "low"
             
             result = {
@@ -440,10 +542,16 @@ Por favor, com base APENAS no contexto acima, crie uma questão de múltipla esc
             "topics": topics
         }
         
+        # Retrieve the documents of every topic in one batched search
+        normalized_topics = [unicodedata.normalize('NFC', topic) for topic in topics]
+        documents_by_topic = self.search_engine.search_many(normalized_topics, k=k, score_threshold=score_threshold)
+        
         for i, topic in enumerate(topics):
             logger.info(f"Generating question {i+1}/{len(topics)} for topic: {topic}")
             
-            question_result = self.generate_multiple_choice_question(topic, k, score_threshold)
+            question_result = self.generate_multiple_choice_question(
+                topic, k, score_threshold, relevant_docs=documents_by_topic[i]
+            )
             
             if "error" in question_result:
                 quiz_set["failed_questions"] += 1
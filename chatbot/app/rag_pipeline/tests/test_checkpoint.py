@@ -0,0 +1,73 @@
+"""
+Tests of the build checkpoint used to resume interrupted builds
+"""
+
+from rag_pipeline import checkpoint
+from rag_pipeline.checkpoint import BuildCheckpoint, BuildProgress
+
+import os
+
+import pytest
+
+SETTINGS = {"embedding_model": "neuralmind/bert-base-portuguese-cased", "chunk_size": 1500, "chunk_overlap": 200}
+
+@pytest.fixture
+def documents(tmp_path):
+    paths = []
+    for name in ("lei.pdf", "decreto.pdf"):
+        path = tmp_path / name
+        path.write_bytes(b"%PDF-1.4 " + name.encode())
+        paths.append(str(path))
+    return paths
+
+def test_restarted_build_resumes_the_committed_files(tmp_path, documents):
+    checkpoint_path = str(tmp_path / "build_checkpoint.json")
+    build = BuildCheckpoint(checkpoint_path)
+    build.start("sefaz_docs-v1", SETTINGS)
+    build.mark_files({documents[0]: ["chunk-a", "chunk-b"]})
+
+    restarted = BuildCheckpoint(checkpoint_path)
+
+    assert restarted.exists()
+    assert restarted.resume(dict(SETTINGS)) == "sefaz_docs-v1"
+    assert restarted.get_completed_files() == {documents[0]: ["chunk-a", "chunk-b"]}
+
+def test_files_changed_since_the_checkpoint_are_processed_again(tmp_path, documents):
+    build = BuildCheckpoint(str(tmp_path / "build_checkpoint.json"))
+    build.start("sefaz_docs-v1", SETTINGS)
+    build.mark_files({path: [f"chunk-{i}"] for i, path in enumerate(documents)})
+
+    with open(documents[0], "ab") as file:
+        file.write(b" alterado")
+    os.remove(documents[1])
+
+    assert build.get_completed_files() == {}
+
+def test_checkpoint_of_other_settings_is_not_resumed(tmp_path):
+    build = BuildCheckpoint(str(tmp_path / "build_checkpoint.json"))
+    build.start("sefaz_docs-v1", SETTINGS)
+
+    assert build.resume({**SETTINGS, "chunk_size": 1000}) is None
+
+def test_cleared_checkpoint_means_no_pending_build(tmp_path):
+    checkpoint_path = tmp_path / "build_checkpoint.json"
+    build = BuildCheckpoint(str(checkpoint_path))
+    build.start("sefaz_docs-v1", SETTINGS)
+
+    build.clear()
+
+    assert not checkpoint_path.exists()
+    assert not BuildCheckpoint(str(checkpoint_path)).exists()
+    assert build.resume(SETTINGS) is None
+
+def test_progress_estimates_the_remaining_time_from_bytes(monkeypatch):
+    monkeypatch.setattr(checkpoint.time, "perf_counter", lambda: 100.0)
+    progress = BuildProgress(total_files=4, total_bytes=1000)
+
+    progress.update(chunks=50, files=1, size=250)
+    monkeypatch.setattr(checkpoint.time, "perf_counter", lambda: 110.0)
+    info = progress.get_info()
+
+    assert info["chunks_per_second"] == 5.0
+    assert info["eta_seconds"] == 30.0
+    assert (info["files_done"], info["total_files"]) == (1, 4)
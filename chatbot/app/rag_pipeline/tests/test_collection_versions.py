@@ -0,0 +1,74 @@
+"""
+Tests of the live collection pointer used by blue/green builds
+"""
+
+from rag_pipeline import collection_versions
+from rag_pipeline.collection_versions import CollectionPointer, make_version_name
+from rag_pipeline.step4_search import SearchEngine
+
+import os
+
+def test_activate_swaps_the_live_version_and_retires_the_previous_one(tmp_path):
+    pointer = CollectionPointer(str(tmp_path), "sefaz_docs")
+    assert pointer.read() is None
+
+    # The first flip retires the unversioned collection built in place
+    assert pointer.activate("sefaz_docs-v1", previous="sefaz_docs") == "sefaz_docs"
+    assert pointer.activate("sefaz_docs-v2") == "sefaz_docs-v1"
+
+    assert CollectionPointer(str(tmp_path), "sefaz_docs").read() == "sefaz_docs-v2"
+    assert pointer.get_expired_versions(grace_seconds=0) == ["sefaz_docs", "sefaz_docs-v1"]
+    assert [path.name for path in tmp_path.iterdir()] == [os.path.basename(pointer.pointer_path)]
+
+def test_reactivated_version_is_no_longer_retired(tmp_path):
+    pointer = CollectionPointer(str(tmp_path), "sefaz_docs")
+    pointer.activate("sefaz_docs-v1")
+    pointer.activate("sefaz_docs-v2")
+
+    pointer.activate("sefaz_docs-v1")
+
+    assert pointer.read() == "sefaz_docs-v1"
+    assert pointer.get_expired_versions(grace_seconds=0) == ["sefaz_docs-v2"]
+
+def test_retired_versions_expire_after_the_grace_period(tmp_path, monkeypatch):
+    pointer = CollectionPointer(str(tmp_path), "sefaz_docs")
+    monkeypatch.setattr(collection_versions.time, "time", lambda: 1000.0)
+    pointer.activate("sefaz_docs-v1")
+    pointer.activate("sefaz_docs-v2")
+
+    monkeypatch.setattr(collection_versions.time, "time", lambda: 1000.0 + 3599)
+    assert pointer.get_expired_versions(grace_seconds=3600) == []
+
+    monkeypatch.setattr(collection_versions.time, "time", lambda: 1000.0 + 3600)
+    assert pointer.get_expired_versions(grace_seconds=3600) == ["sefaz_docs-v1"]
+
+    pointer.forget("sefaz_docs-v1")
+    assert pointer.get_expired_versions(grace_seconds=0) == []
+
+def test_invalid_pointer_file_is_an_empty_pointer(tmp_path):
+    pointer = CollectionPointer(str(tmp_path), "sefaz_docs")
+    (tmp_path / "sefaz_docs_current.json").write_text("{", encoding="utf-8")
+
+    assert pointer.read() is None
+
+def test_version_names_extend_the_logical_name():
+    assert make_version_name("sefaz_docs").startswith("sefaz_docs-v")
+
+def test_search_engine_follows_a_flipped_pointer(tmp_path):
+    pointer = CollectionPointer(str(tmp_path), "sefaz_docs")
+    loaded = []
+
+    def load_collection(collection_name):
+        loaded.append(collection_name)
+        return f"store of {collection_name}"
+
+    engine = SearchEngine("store of sefaz_docs", collection_pointer=pointer, vector_store_loader=load_collection)
+    assert not engine.refresh_vector_store()
+
+    pointer.activate("sefaz_docs-v1", previous="sefaz_docs")
+    assert engine.refresh_vector_store()
+    assert (engine.vector_store, engine.active_collection) == ("store of sefaz_docs-v1", "sefaz_docs-v1")
+
+    # Unchanged pointer: only a stat, the loader is not called again
+    assert not engine.refresh_vector_store()
+    assert loaded == ["sefaz_docs-v1"]
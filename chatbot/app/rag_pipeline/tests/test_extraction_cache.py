@@ -0,0 +1,44 @@
+"""
+Tests of the extracted page cache
+"""
+
+from rag_pipeline.extraction_cache import ExtractionCache, hash_file
+
+from langchain_core.documents import Document
+
+import gzip
+import hashlib
+
+PAGES = [
+    Document(page_content="Decreto nº 44.650, de 30 de junho de 2017", metadata={"page": 0, "file_name": "Decreto 44.650.pdf"}),
+    Document(page_content="Art. 1º Fica instituído o crédito presumido", metadata={"page": 1, "file_name": "Decreto 44.650.pdf"})
+]
+
+def test_hash_file_is_the_sha256_of_the_content(tmp_path):
+    file_path = tmp_path / "documento.pdf"
+    file_path.write_bytes(b"%PDF-1.4 conteudo")
+
+    assert hash_file(str(file_path), block_size=4) == hashlib.sha256(b"%PDF-1.4 conteudo").hexdigest()
+
+def test_stored_pages_are_loaded_back(tmp_path):
+    cache = ExtractionCache(str(tmp_path), extractor_version="1")
+
+    assert cache.load("abc") is None
+    cache.store("abc", PAGES)
+    loaded = ExtractionCache(str(tmp_path), extractor_version="1").load("abc")
+
+    assert [(doc.page_content, doc.metadata) for doc in loaded] == [(doc.page_content, doc.metadata) for doc in PAGES]
+
+def test_other_extractor_version_misses(tmp_path):
+    ExtractionCache(str(tmp_path), extractor_version="1").store("abc", PAGES)
+
+    assert ExtractionCache(str(tmp_path), extractor_version="2").load("abc") is None
+
+def test_corrupt_entry_is_a_miss(tmp_path):
+    cache = ExtractionCache(str(tmp_path), extractor_version="1")
+    cache.store("abc", PAGES)
+    key = cache.get_key("abc")
+    with gzip.open(tmp_path / key[:2] / f"{key}.jsonl.gz", 'wt', encoding='utf-8') as file:
+        file.write("{not json\n")
+
+    assert cache.load("abc") is None
@@ -0,0 +1,85 @@
+"""
+Tests of the BM25 keyword index and its Portuguese tokenizer
+"""
+
+from rag_pipeline.lexical_index import BM25Index, tokenize
+from rag_pipeline.text_utils import fold_accents
+
+from collections import Counter
+
+import math
+
+import pytest
+
+TEXTS = [
+    "A Lei 15.865 institui o Fundo Estadual de Equilíbrio Fiscal.",
+    "O crédito presumido do PRODEPE é calculado sobre o saldo devedor do ICMS.",
+    "Os incentivos do PRODEPE dependem da isenção prevista no decreto.",
+    "A portaria define os códigos de lançamento do incentivo fiscal.",
+    "O saldo devedor do ICMS é apurado mensalmente."
+]
+
+# Enough chunks for rare terms to be scored sparsely and common ones densely
+LARGE_TEXTS = TEXTS + [f"Documento complementar número {i} do anexo." for i in range(40)]
+
+def make_index(texts=TEXTS, **options) -> BM25Index:
+    index = BM25Index(**options)
+    index.add([f"chunk-{i}" for i in range(len(texts))], texts, [{"program": "FEEF" if i == 0 else "PRODEPE"} for i in range(len(texts))])
+    return index
+
+def reference_scores(query: str, texts=TEXTS, k1: float = 1.5, b: float = 0.75) -> list:
+    """Okapi BM25 computed directly from the definition"""
+    documents = [Counter(tokenize(text)) for text in texts]
+    average_length = sum(sum(document.values()) for document in documents) / len(documents)
+    scores = []
+    for document in documents:
+        length = sum(document.values())
+        score = 0.0
+        for term, query_frequency in Counter(tokenize(query)).items():
+            document_frequency = sum(1 for other in documents if term in other)
+            idf = math.log(1 + (len(documents) - document_frequency + 0.5) / (document_frequency + 0.5))
+            frequency = document[term]
+            score += query_frequency * idf * frequency * (k1 + 1) / (frequency + k1 * (1 - b + b * length / average_length))
+        scores.append(score)
+    return scores
+
+def test_fold_accents_lowercases_and_removes_accents():
+    assert fold_accents("Isenção do ICMS") == "isencao do icms"
+    assert fold_accents("Art. 5º") == "art. 5o"
+    assert fold_accents("PRODEPE") == "prodepe"
+
+def test_tokenize_matches_spellings_of_the_same_term():
+    assert tokenize("Lei 15.865") == tokenize("lei 15865")
+    assert tokenize("incentivos") == tokenize("incentivo")
+    assert tokenize("isenção") == tokenize("ISENCAO")
+    assert tokenize("o saldo de ICMS") == tokenize("saldo ICMS")
+
+@pytest.mark.parametrize("texts", [TEXTS, LARGE_TEXTS], ids=["dense", "sparse"])
+@pytest.mark.parametrize("query", ["saldo devedor do ICMS", "incentivo fiscal do PRODEPE", "lei 15865", "lei 15865 documento"])
+def test_scores_follow_okapi_bm25(texts, query):
+    index = make_index(texts)
+    expected = reference_scores(query, texts)
+
+    results = index.search(query, k=len(texts))
+
+    scores = dict(results)
+    assert sorted(scores) == [row for row, score in enumerate(expected) if score > 0]
+    assert [scores[row] for row in sorted(scores)] == pytest.approx([expected[row] for row in sorted(scores)], rel=1e-5)
+    assert [score for _, score in results] == sorted(scores.values(), reverse=True)
+
+def test_reference_score_is_reached_by_an_average_chunk_with_every_term():
+    index = make_index(k1=1.2, b=1.0)
+
+    assert index.get_reference_score("saldo devedor") == pytest.approx(index._get_idf("sald") + index._get_idf("devedor"))
+    assert index.get_reference_score("de o a") == 0
+
+def test_filter_and_updates_change_the_results():
+    index = make_index()
+
+    assert [row for row, _ in index.search("fiscal", k=5, filter={"program": "FEEF"})] == [0]
+
+    index.delete(["chunk-0"])
+    index.add(["chunk-3"], ["Portaria sem termos em comum."], [{"program": "PRODEPE"}])
+
+    assert index.search("fiscal", k=5) == []
+    assert index.count() == 4
@@ -0,0 +1,53 @@
+"""
+Tests of the ONNX embedding backend against the torch model it is exported from
+"""
+
+import os
+
+import numpy as np
+import pytest
+
+MODEL_NAME = os.environ.get("RAG_EMBEDDING_MODEL", "neuralmind/bert-base-portuguese-cased")
+
+SENTENCES = [
+    "O que é ICMS?",
+    "Quais são os incentivos fiscais do PRODEPE?",
+    "O crédito presumido é calculado sobre o saldo devedor do imposto.",
+    "A Lei 15.865 institui o Fundo Estadual de Equilíbrio Fiscal (FEEF) no Estado de Pernambuco."
+]
+
+@pytest.fixture(scope="module")
+def torch_vectors() -> np.ndarray:
+    pytest.importorskip("onnxruntime")
+    from huggingface_hub import try_to_load_from_cache
+    from langchain_huggingface import HuggingFaceEmbeddings
+
+    # Only models already downloaded (the backend image pre-downloads the default one)
+    if not isinstance(try_to_load_from_cache(MODEL_NAME, "config.json"), str):
+        pytest.skip(f"Embedding model {MODEL_NAME} not in the local HuggingFace cache")
+
+    try:
+        embeddings = HuggingFaceEmbeddings(model_name=MODEL_NAME, model_kwargs={'device': 'cpu'})
+    except Exception as e:
+        pytest.skip(f"Embedding model {MODEL_NAME} not available: {e}")
+    return np.asarray(embeddings.embed_documents(SENTENCES), dtype=np.float32)
+
+@pytest.fixture(scope="module")
+def onnx_cache_directory(tmp_path_factory) -> str:
+    return str(tmp_path_factory.mktemp("onnx_models"))
+
+def cosine_similarities(reference: np.ndarray, candidate: np.ndarray) -> np.ndarray:
+    return (reference * candidate).sum(axis=1) / (np.linalg.norm(reference, axis=1) * np.linalg.norm(candidate, axis=1))
+
+@pytest.mark.parametrize("quantize, min_cosine", [(False, 0.999), (True, 0.98)])
+def test_onnx_embeddings_match_the_torch_model(torch_vectors, onnx_cache_directory, quantize, min_cosine):
+    from rag_pipeline.embedding_backends import OnnxEmbeddings
+
+    embeddings = OnnxEmbeddings(MODEL_NAME, cache_directory=onnx_cache_directory, quantize=quantize)
+
+    documents = np.asarray(embeddings.embed_documents(SENTENCES), dtype=np.float32)
+    query = np.asarray([embeddings.embed_query(SENTENCES[0])], dtype=np.float32)
+
+    assert documents.shape == torch_vectors.shape
+    assert cosine_similarities(torch_vectors, documents).min() >= min_cosine
+    assert cosine_similarities(torch_vectors[:1], query).min() >= min_cosine
@@ -0,0 +1,42 @@
+"""
+Tests of the query embedding cache
+"""
+
+from rag_pipeline.query_cache import LRUCache, normalize_query
+
+def test_least_recently_used_entry_is_evicted():
+    cache = LRUCache(max_size=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.get_info()["size"] == 2
+
+def test_counters_track_hits_and_misses():
+    cache = LRUCache(max_size=4)
+    cache.put("a", 1)
+
+    cache.get("a")
+    cache.get("a")
+    cache.get("b")
+
+    assert cache.get_info() == {"size": 1, "max_size": 4, "hits": 2, "misses": 1, "hit_rate": 2 / 3}
+
+    cache.clear()
+    assert cache.get_info() == {"size": 0, "max_size": 4, "hits": 0, "misses": 0, "hit_rate": 0.0}
+
+def test_zero_size_cache_stores_nothing():
+    cache = LRUCache(max_size=0)
+    cache.put("a", 1)
+
+    assert cache.get("a") is None
+
+def test_equivalent_queries_share_a_key():
+    decomposed = "O que e\u0301 ICMS?"
+
+    assert normalize_query(f"  {decomposed}\n") == normalize_query("O que é  ICMS?") == "O que é ICMS?"
@@ -0,0 +1,80 @@
+"""
+Tests of the shared pipeline registry
+"""
+
+from rag_pipeline import registry
+
+import pytest
+import threading
+
+class FakePipeline:
+    builds = []
+    succeed = True
+    release = None
+
+    def __init__(self, documents_path, collection_name, persist_directory, **kwargs):
+        self.documents_path = documents_path
+        self.build_progress = None
+
+    def build_knowledge_base(self, force_rebuild=False, blue_green=None):
+        FakePipeline.builds.append(force_rebuild)
+        if FakePipeline.release is not None:
+            FakePipeline.release.wait(5)
+        return FakePipeline.succeed
+
+@pytest.fixture(autouse=True)
+def fake_pipeline(monkeypatch):
+    monkeypatch.setattr(registry, "RAGPipeline", FakePipeline)
+    FakePipeline.builds = []
+    FakePipeline.succeed = True
+    FakePipeline.release = None
+    registry.clear_pipelines()
+    yield
+    registry.clear_pipelines()
+
+def test_pipeline_is_initialized_once_and_shared():
+    pipeline = registry.get_pipeline(documents_path="docs", wait=True)
+
+    assert isinstance(pipeline, FakePipeline)
+    assert registry.get_pipeline(documents_path="docs") is pipeline
+    assert registry.get_pipeline_status(documents_path="docs") == {"status": "ready"}
+    assert FakePipeline.builds == [False]
+
+def test_failed_initialization_is_retried_after_the_backoff(monkeypatch):
+    FakePipeline.succeed = False
+
+    assert registry.get_pipeline(documents_path="docs", wait=True) is None
+    assert registry.get_pipeline(documents_path="docs", wait=True) is None
+    status = registry.get_pipeline_status(documents_path="docs")
+    assert status["status"] == "failed" and status["retry_in"] > 0
+    assert FakePipeline.builds == [False]
+
+    FakePipeline.succeed = True
+    monkeypatch.setattr(registry, "RETRY_SECONDS", 0)
+    assert registry.get_pipeline(documents_path="docs", wait=True) is not None
+    assert registry.get_pipeline_status(documents_path="docs") == {"status": "ready"}
+    assert FakePipeline.builds == [False, False]
+
+def test_rebuild_clears_a_failed_initialization():
+    FakePipeline.succeed = False
+    assert registry.get_pipeline(documents_path="docs", wait=True) is None
+
+    FakePipeline.succeed = True
+    assert registry.rebuild_pipeline(documents_path="docs")
+    assert registry.get_pipeline(documents_path="docs") is not None
+    assert FakePipeline.builds == [False, True]
+
+def test_rebuild_runs_in_the_background():
+    FakePipeline.release = threading.Event()
+
+    assert registry.start_rebuild_pipeline(documents_path="docs")
+    assert not registry.start_rebuild_pipeline(documents_path="docs")
+    status = registry.get_pipeline_status(documents_path="docs")
+    assert status["status"] == "rebuilding" and status["rebuild"] == "running"
+
+    thread = registry._rebuild_threads[("docs", "sefaz_docs", "data/chroma_db")]
+    FakePipeline.release.set()
+    thread.join(5)
+
+    assert registry.get_pipeline_status(documents_path="docs") == {"status": "ready", "rebuild": "succeeded"}
+    assert FakePipeline.builds == [True]
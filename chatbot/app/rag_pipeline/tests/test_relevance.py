@@ -0,0 +1,92 @@
+"""
+Tests of the relevance rule shared by hybrid search and the chatbot gate
+"""
+
+from rag_pipeline.lexical_index import BM25Index
+from rag_pipeline.step4_search import SearchEngine, get_relevance_score
+from rag_pipeline.step5_chat import RAGChatbot
+from rag_pipeline.vector_backends import NumpyVectorIndex
+
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from typing import List
+
+import numpy as np
+import pytest
+
+TEXTS = [
+    "A Lei 15.865 institui o Fundo Estadual de Equilíbrio Fiscal.",
+    "O crédito presumido é calculado sobre o saldo devedor do ICMS.",
+    "A portaria define os códigos de lançamento do incentivo."
+]
+
+class OrthogonalEmbeddings(Embeddings):
+    """Embeds every query orthogonally to every chunk, so no chunk is similar to any query"""
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [[0.0, 1.0, 0.0] for _ in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return [1.0, 0.0, 0.0]
+
+class FakeCompletions:
+    """Records the calls to the chat completions API"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def create(self, **kwargs):
+        self.calls += 1
+        message = type("Message", (), {"content": "resposta"})()
+        choice = type("Choice", (), {"message": message})()
+        return type("Response", (), {"choices": [choice]})()
+
+@pytest.fixture
+def search_engine() -> SearchEngine:
+    ids = [f"chunk-{i}" for i in range(len(TEXTS))]
+    metadatas = [{"source": f"doc-{i}.pdf"} for i in range(len(TEXTS))]
+    vectors = np.asarray(OrthogonalEmbeddings().embed_documents(TEXTS), dtype=np.float32)
+    vector_store = NumpyVectorIndex(vectors, ids, TEXTS, metadatas, embeddings=OrthogonalEmbeddings(), space="cosine")
+
+    lexical_index = BM25Index()
+    lexical_index.add(ids, TEXTS, [dict(metadata) for metadata in metadatas])
+    return SearchEngine(vector_store, lexical_index=lexical_index)
+
+@pytest.fixture
+def chatbot(search_engine, monkeypatch) -> RAGChatbot:
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    chatbot = RAGChatbot(search_engine)
+    completions = FakeCompletions()
+    chatbot.client = type("Client", (), {"chat": type("Chat", (), {"completions": completions})()})()
+    chatbot.completions = completions
+    return chatbot
+
+def test_relevance_is_best_of_similarity_and_keyword_scores():
+    assert get_relevance_score(Document(page_content="", metadata={"similarity_score": 0.4, "keyword_score": 0.9})) == 0.9
+    assert get_relevance_score(Document(page_content="", metadata={"keyword_score": 0.8})) == 0.8
+    assert get_relevance_score(Document(page_content="")) is None
+
+def test_keyword_score_of_a_full_match_is_close_to_one(search_engine):
+    results = search_engine.lexical_search("Lei 15.865", k=3)
+
+    assert results[0].metadata["source"] == "doc-0.pdf"
+    assert 0.7 <= results[0].metadata["keyword_score"] <= 1.0
+
+def test_hybrid_search_cuts_both_rankings_at_the_threshold(search_engine):
+    results = search_engine.hybrid_search("Lei 15.865", k=4, score_threshold=0.7)
+
+    assert [doc.metadata["source"] for doc in results] == ["doc-0.pdf"]
+    assert all(get_relevance_score(doc) >= 0.7 for doc in results)
+
+def test_chat_answers_when_the_only_hit_is_lexical(chatbot):
+    result = chatbot.chat("Lei 15.865", score_threshold=0.7)
+
+    assert chatbot.completions.calls == 1
+    assert [source["source"] for source in result["sources"]] == ["doc-0.pdf"]
+    assert result["avg_score"] >= 0.7
+
+def test_chat_skips_the_llm_without_relevant_documents(chatbot):
+    result = chatbot.chat("Qual é a alíquota do imposto de renda?", score_threshold=0.7)
+
+    assert chatbot.completions.calls == 0
+    assert result["sources"] == []
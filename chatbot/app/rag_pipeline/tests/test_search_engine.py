@@ -0,0 +1,66 @@
+"""
+Tests of SearchEngine query embeddings and rank fusion
+"""
+
+from rag_pipeline.step4_search import SearchEngine, reciprocal_rank_fusion
+from rag_pipeline.vector_backends import NumpyVectorIndex
+
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from typing import List
+
+import numpy as np
+import pytest
+
+class PromptedEmbeddings(Embeddings):
+    """Embeds queries and documents differently, like models with a query prompt"""
+
+    def __init__(self):
+        self.query_calls = 0
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [[0.0, 1.0] for _ in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        self.query_calls += 1
+        return [1.0, float(len(text))]
+
+def make_search_engine(embeddings: Embeddings) -> SearchEngine:
+    vector_store = NumpyVectorIndex(
+        np.asarray([[1.0, 0.0]], dtype=np.float32), ["chunk-0"], ["texto"], [{"source": "doc-0.pdf"}],
+        embeddings=embeddings, space="cosine"
+    )
+    return SearchEngine(vector_store, program_filter=False)
+
+def test_batched_queries_use_the_query_path():
+    embeddings = PromptedEmbeddings()
+    engine = make_search_engine(embeddings)
+
+    batched = engine.embed_queries(["O que é ICMS?", "O  que é ICMS? ", "FEEF"])
+
+    reference = PromptedEmbeddings()
+    assert batched == [reference.embed_query("O que é ICMS?"), reference.embed_query("O que é ICMS?"), reference.embed_query("FEEF")]
+    # Equivalent queries are embedded once and the cache is shared with embed_query
+    assert embeddings.query_calls == 2
+    assert engine.embed_query("FEEF") == batched[2]
+    assert embeddings.query_calls == 2
+
+def make_document(chunk_id: str, **metadata) -> Document:
+    return Document(page_content=f"texto {chunk_id}", metadata={"chunk_id": chunk_id, **metadata})
+
+def test_rank_fusion_sums_reciprocal_ranks():
+    dense = [make_document("a", similarity_score=0.9), make_document("b", similarity_score=0.8)]
+    lexical = [make_document("b", bm25_score=7.0), make_document("c", bm25_score=3.0)]
+
+    fused = reciprocal_rank_fusion([dense, lexical], rrf_k=60)
+
+    assert [doc.metadata["chunk_id"] for doc in fused] == ["b", "a", "c"]
+    assert fused[0].metadata["rrf_score"] == pytest.approx(1 / 62 + 1 / 61)
+    assert fused[1].metadata["rrf_score"] == pytest.approx(1 / 61)
+    # A chunk found by both rankings keeps the scores of both
+    assert (fused[0].metadata["similarity_score"], fused[0].metadata["bm25_score"]) == (0.8, 7.0)
+
+def test_rank_fusion_of_one_ranking_keeps_its_order():
+    ranking = [make_document(chunk_id) for chunk_id in "xyz"]
+
+    assert [doc.metadata["chunk_id"] for doc in reciprocal_rank_fusion([ranking, []])] == ["x", "y", "z"]
@@ -0,0 +1,74 @@
+"""
+Tests of the sharded search engine
+"""
+
+from rag_pipeline.sharding import ShardedSearchEngine
+from rag_pipeline.step4_search import SearchEngine
+from rag_pipeline.vector_backends import NumpyVectorIndex
+
+from langchain_core.embeddings import Embeddings
+from typing import List
+
+import numpy as np
+import pytest
+
+class FixedQueryEmbeddings(Embeddings):
+    """Embeds every text as the first axis"""
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [[1.0, 0.0] for _ in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return [1.0, 0.0]
+
+def make_shard(name: str, vectors: List[List[float]]) -> SearchEngine:
+    ids = [f"{name}-{i}" for i in range(len(vectors))]
+    vector_store = NumpyVectorIndex(
+        np.asarray(vectors, dtype=np.float32), ids, ids, [{"source": f"{chunk_id}.pdf"} for chunk_id in ids],
+        embeddings=FixedQueryEmbeddings(), space="cosine"
+    )
+    return SearchEngine(vector_store, program_filter=False)
+
+@pytest.fixture
+def shards():
+    # Shard "feef" holds two near duplicates of the query, shard "prodepe" a different chunk
+    return {
+        "feef": make_shard("feef", [[1.0, 0.0], [1.0, 0.01]]),
+        "prodepe": make_shard("prodepe", [[0.8, 0.6]])
+    }
+
+def test_merged_results_are_ranked_by_similarity(shards):
+    engine = ShardedSearchEngine(shards, program_routing=False)
+
+    results = engine.similarity_search("consulta", k=2, score_threshold=0.0)
+
+    assert [doc.id for doc in results] == ["feef-0", "feef-1"]
+    assert [doc.metadata["shard"] for doc in results] == ["feef", "feef"]
+    engine.close()
+
+def test_mmr_selects_across_shards(shards):
+    engine = ShardedSearchEngine(shards, mmr_lambda=0.3, program_routing=False)
+
+    results = engine.similarity_search("consulta", k=2, score_threshold=0.0)
+
+    assert [doc.id for doc in results] == ["feef-0", "prodepe-0"]
+    assert [doc.metadata["mmr_rank"] for doc in results] == [1, 2]
+    engine.close()
+
+def test_thread_pool_grows_with_the_shards(shards):
+    engine = ShardedSearchEngine({"feef": shards["feef"]}, program_routing=False)
+    assert engine.pool_size == 1
+
+    engine.set_shard("prodepe", shards["prodepe"])
+
+    assert engine.pool_size == 2
+    assert len(engine.similarity_search("consulta", k=3, score_threshold=0.0)) == 3
+    engine.close()
+
+def test_close_can_be_called_twice(shards):
+    engine = ShardedSearchEngine(shards, program_routing=False)
+
+    engine.close()
+    engine.close()
+
+    assert engine.executor is None
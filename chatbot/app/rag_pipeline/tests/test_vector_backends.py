@@ -0,0 +1,72 @@
+"""
+Tests of the in-process vector indexes
+"""
+
+from rag_pipeline.vector_backends import InProcessVectorIndex, NumpyVectorIndex, get_documents_by_metadata
+
+import numpy as np
+import pytest
+
+def make_index(space: str = "cosine") -> NumpyVectorIndex:
+    vectors = np.asarray([[1.0, 0.0], [0.0, 1.0], [1.0, 1.0]], dtype=np.float32)
+    ids = ["a", "b", "c"]
+    texts = ["alfa", "beta", "gama"]
+    metadatas = [{"program": "FEEF"}, {"program": "PRODEPE"}, {"program": "FEEF"}]
+    return NumpyVectorIndex(vectors, ids, texts, metadatas, space=space)
+
+def test_incomplete_backend_fails_at_instantiation():
+    class SearchOnlyIndex(InProcessVectorIndex):
+        def search_by_vector(self, embedding, k=4, filter=None):
+            return []
+
+    with pytest.raises(TypeError):
+        SearchOnlyIndex([], [], [])
+
+def test_numpy_index_ranks_by_cosine_distance():
+    index = make_index()
+
+    results = index.similarity_search_by_vector_with_relevance_scores([1.0, 0.0], k=3)
+
+    assert [doc.id for doc, _ in results] == ["a", "c", "b"]
+    assert results[0][1] == pytest.approx(0.0, abs=1e-6)
+
+def test_numpy_index_applies_the_filter_before_ranking():
+    index = make_index()
+
+    results = index.similarity_search_by_vector_with_relevance_scores([0.0, 1.0], k=3, filter={"program": "FEEF"})
+
+    assert [doc.id for doc, _ in results] == ["c", "a"]
+
+def test_metadata_browse_pages_in_insertion_order():
+    index = make_index()
+
+    first = get_documents_by_metadata(index, {"program": "FEEF"}, limit=1)
+    second = get_documents_by_metadata(index, {"program": "FEEF"}, limit=1, offset=1)
+
+    assert [doc.id for doc in first + second] == ["a", "c"]
+    assert get_documents_by_metadata(index, include_content=False)[0].page_content == ""
+
+@pytest.mark.parametrize("space", ["cosine", "l2", "ip"])
+def test_hnsw_restrictive_filter_matches_an_exact_search(space):
+    pytest.importorskip("hnswlib")
+    from rag_pipeline.vector_backends import HnswVectorIndex
+
+    rng = np.random.default_rng(0)
+    vectors = rng.normal(size=(200, 8)).astype(np.float32)
+    metadatas = [{"program": "FEEF" if i % 50 == 0 else "PRODEPE"} for i in range(200)]
+    index = HnswVectorIndex(dimension=8, space=space, ef_search=8)
+    index.add([f"id-{i}" for i in range(200)], [str(i) for i in range(200)], metadatas, vectors)
+    queries = rng.normal(size=(3, 8)).astype(np.float32)
+
+    filtered = index.search_by_vectors(queries, k=10, filter={"program": "FEEF"})
+
+    assert all(sorted(row for row, _ in results) == [0, 50, 100, 150] for results in filtered)
+    assert index.index.ef == 8
+
+    # With a candidate list covering the index the graph search is exact too
+    index.set_ef_search(200)
+    unfiltered = index.search_by_vectors(queries, k=5)
+    exact = index._search_rows(queries, index.get_rows(), 5)
+
+    assert [[row for row, _ in results] for results in unfiltered] == [[row for row, _ in results] for results in exact]
+    assert np.allclose([d for results in unfiltered for _, d in results], [d for results in exact for _, d in results], atol=1e-4)
@@ -0,0 +1,21 @@
+"""
+Text Utils Module - Responsible for the text normalization shared by search and metadata
+"""
+
+import unicodedata
+
+def fold_accents(text: str) -> str:
+    """
+    Lowercase a text and remove its accents (ordinal signs become letters: 5º -> 5o)
+
+    Args:
+        text (str): Text to fold
+
+    Returns:
+        str: Folded text
+    """
+    text = text.lower()
+    if text.isascii():
+        return text
+    decomposed = unicodedata.normalize('NFKD', text)
+    return ''.join(char for char in decomposed if not unicodedata.combining(char))
@@ -0,0 +1,1110 @@
+"""
+Vector Backends Module - Responsible for in-process vector indexes that SearchEngine can query instead of Chroma
+"""
+
+from langchain_core.documents import Document
+from .query_cache import LRUCache
+
+from abc import ABC, abstractmethod
+from typing import List, Dict, Any, Optional, Tuple
+import json
+import logging
+import os
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+def get_collection_space(vector_store) -> str:
+    """
+    Return the distance function of a Chroma collection
+
+    Args:
+        vector_store: Chroma vector store
+
+    Returns:
+        str: "l2" (Chroma default, squared euclidean), "cosine" or "ip"
+    """
+    collection = vector_store._collection
+    space = (collection.metadata or {}).get("hnsw:space")
+    if space is None:
+        configuration = getattr(collection, "configuration", None) or {}
+        space = (configuration.get("hnsw") or {}).get("space")
+    return space or "l2"
+
+def distance_to_similarity(distance: float, space: str) -> float:
+    """
+    Convert a distance returned by a search into a similarity between 0 and 1
+
+    Args:
+        distance (float): Distance reported for the distance function
+        space (str): "cosine" (1 - cos), "ip" (1 - dot product) or "l2" (squared euclidean)
+
+    Returns:
+        float: Similarity, higher is more similar (1 for identical vectors)
+    """
+    if space in ("cosine", "ip"):
+        similarity = 1.0 - distance
+    else:
+        similarity = 1.0 / (1.0 + distance)
+    return min(max(similarity, 0.0), 1.0)
+
+def get_search_space(vector_store) -> str:
+    """
+    Return the distance function of a Chroma store or an in-process index
+
+    Args:
+        vector_store: Chroma vector store or InProcessVectorIndex
+
+    Returns:
+        str: "l2", "cosine" or "ip"
+    """
+    if isinstance(vector_store, InProcessVectorIndex):
+        return vector_store.space
+    return get_collection_space(vector_store)
+
+def matches_filter(metadata: Dict[str, Any], where: Dict[str, Any]) -> bool:
+    """
+    Evaluate a Chroma style metadata filter on the metadata of one chunk
+
+    Supports plain equality, $eq, $ne, $gt, $gte, $lt, $lte, $in, $nin, $and and $or.
+
+    Args:
+        metadata (Dict[str, Any]): Metadata of the chunk
+        where (Dict[str, Any]): Filter, e.g. {"source": "a.pdf"} or {"$and": [...]}
+
+    Returns:
+        bool: True if the chunk passes the filter
+    """
+    for key, condition in where.items():
+        if key == "$and":
+            if not all(matches_filter(metadata, clause) for clause in condition):
+                return False
+        elif key == "$or":
+            if not any(matches_filter(metadata, clause) for clause in condition):
+                return False
+        elif isinstance(condition, dict):
+            value = metadata.get(key)
+            for operator, operand in condition.items():
+                if operator == "$eq" and value != operand:
+                    return False
+                if operator == "$ne" and value == operand:
+                    return False
+                if operator == "$in" and value not in operand:
+                    return False
+                if operator == "$nin" and value in operand:
+                    return False
+                if operator in ("$gt", "$gte", "$lt", "$lte"):
+                    if value is None:
+                        return False
+                    if operator == "$gt" and not value > operand:
+                        return False
+                    if operator == "$gte" and not value >= operand:
+                        return False
+                    if operator == "$lt" and not value < operand:
+                        return False
+                    if operator == "$lte" and not value <= operand:
+                        return False
+        elif metadata.get(key) != condition:
+            return False
+    return True
+
+def read_chroma_records(vector_store,
+                        ids: Optional[List[str]] = None,
+                        batch_size: int = 1000) -> Tuple[List[str], List[str], List[Dict[str, Any]], np.ndarray]:
+    """
+    Read the vectors, texts and metadata of a Chroma collection
+
+    Args:
+        vector_store: Chroma vector store
+        ids (Optional[List[str]]): Chunks to read (defaults to the whole collection)
+        batch_size (int): Number of rows read per request
+
+    Returns:
+        Tuple[List[str], List[str], List[Dict[str, Any]], np.ndarray]: IDs, texts, metadata and (n, dimension) vectors
+    """
+    collection = vector_store._collection
+    include = ["embeddings", "documents", "metadatas"]
+
+    results = []
+    if ids is None:
+        for offset in range(0, collection.count(), batch_size):
+            results.append(collection.get(include=include, limit=batch_size, offset=offset))
+    else:
+        for start in range(0, len(ids), batch_size):
+            results.append(collection.get(ids=ids[start:start + batch_size], include=include))
+
+    record_ids, texts, metadatas, vectors = [], [], [], []
+    for result in results:
+        record_ids.extend(result["ids"])
+        texts.extend(result["documents"])
+        metadatas.extend(metadata or {} for metadata in result["metadatas"])
+        if len(result["ids"]):
+            vectors.append(np.asarray(result["embeddings"], dtype=np.float32))
+
+    matrix = np.concatenate(vectors) if vectors else np.zeros((0, 0), dtype=np.float32)
+    return record_ids, texts, metadatas, matrix
+
+def get_chunk_vectors(vector_store, ids: List[str]) -> np.ndarray:
+    """
+    Return the vectors of chunks from a Chroma store or an in-process index
+
+    Args:
+        vector_store: Chroma vector store or InProcessVectorIndex
+        ids (List[str]): Chunk IDs
+
+    Returns:
+        np.ndarray: (len(ids), dimension) vectors in the order of ids
+    """
+    if isinstance(vector_store, InProcessVectorIndex):
+        return vector_store.get_vectors(ids)
+
+    result = vector_store._collection.get(ids=ids, include=["embeddings"])
+    positions = {chunk_id: i for i, chunk_id in enumerate(result["ids"])}
+    matrix = np.asarray(result["embeddings"], dtype=np.float32)
+    return matrix[[positions[chunk_id] for chunk_id in ids]]
+
+def similarity_search_by_vectors(vector_store,
+                                 embeddings: List[List[float]],
+                                 k: int = 4,
+                                 filter: Optional[Dict[str, Any]] = None) -> List[List[Tuple[Document, float]]]:
+    """
+    Search several query vectors at once in a Chroma store or an in-process index
+
+    Chroma answers every query in one request; in-process indexes in one batched search.
+
+    Args:
+        vector_store: Chroma vector store or InProcessVectorIndex
+        embeddings (List[List[float]]): Query vectors
+        k (int): Maximum number of results per query
+        filter (Optional[Dict[str, Any]]): Chroma style metadata filter
+
+    Returns:
+        List[List[Tuple[Document, float]]]: Chunks and distances of each query, lower is more similar
+    """
+    if isinstance(vector_store, InProcessVectorIndex):
+        return vector_store.similarity_search_by_vectors_with_relevance_scores(embeddings, k, filter)
+
+    if not len(embeddings):
+        return []
+
+    collection = vector_store._collection
+    k = min(k, collection.count())
+    if k <= 0:
+        return [[] for _ in embeddings]
+
+    result = collection.query(
+        query_embeddings=[list(map(float, embedding)) for embedding in embeddings],
+        n_results=k,
+        where=filter or None,
+        include=["documents", "metadatas", "distances"]
+    )
+    return [
+        [
+            (Document(page_content=text, metadata=metadata or {}, id=chunk_id), distance)
+            for chunk_id, text, metadata, distance in zip(ids, texts, metadatas, distances)
+        ]
+        for ids, texts, metadatas, distances in zip(
+            result["ids"], result["documents"], result["metadatas"], result["distances"]
+        )
+    ]
+
+def get_documents_by_metadata(vector_store,
+                              where: Optional[Dict[str, Any]] = None,
+                              limit: Optional[int] = None,
+                              offset: int = 0,
+                              include_content: bool = True) -> List[Document]:
+    """
+    Read chunks by metadata from a Chroma store or an in-process index, without any vector search
+
+    Chunks are returned in insertion order, so offset/limit pages are stable
+    while the index is not modified.
+
+    Args:
+        vector_store: Chroma vector store or InProcessVectorIndex
+        where (Optional[Dict[str, Any]]): Chroma style metadata filter (None reads every chunk)
+        limit (Optional[int]): Maximum number of chunks (None reads to the end)
+        offset (int): Number of matching chunks to skip
+        include_content (bool): Read the chunk texts (empty page_content otherwise)
+
+    Returns:
+        List[Document]: Matching chunks, with their ID
+    """
+    if isinstance(vector_store, InProcessVectorIndex):
+        rows = vector_store.get_rows(where)[offset:None if limit is None else offset + limit]
+        return [
+            Document(
+                page_content=vector_store.texts[row] if include_content else "",
+                metadata=dict(vector_store.metadatas[row]),
+                id=vector_store.ids[row]
+            )
+            for row in rows
+        ]
+
+    result = vector_store._collection.get(
+        where=where or None,
+        limit=limit,
+        offset=offset,
+        include=["metadatas", "documents"] if include_content else ["metadatas"]
+    )
+    texts = result["documents"] if include_content else [""] * len(result["ids"])
+    return [
+        Document(page_content=text, metadata=metadata or {}, id=chunk_id)
+        for chunk_id, text, metadata in zip(result["ids"], texts, result["metadatas"])
+    ]
+
+def write_json_atomic(path: str, data: Any) -> None:
+    """
+    Write a JSON file through a temporary file and os.replace
+
+    Args:
+        path (str): Destination path
+        data (Any): JSON serializable data
+    """
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'w', encoding='utf-8') as file:
+        json.dump(data, file, ensure_ascii=False)
+    os.replace(temp_path, path)
+
+class InProcessVectorIndex(ABC):
+    """Base class of the vector indexes mirroring a Chroma collection in the search process
+
+    Subclasses implement search_by_vector, get_vectors, from_chroma, save and load. The
+    search methods have the same contract as the Chroma ones SearchEngine
+    calls, so an index can replace the Chroma store transparently.
+    """
+
+    # Short name used in log messages
+    kind = "in-process"
+
+    def __init__(self,
+                 ids: List[str],
+                 texts: List[str],
+                 metadatas: List[Dict[str, Any]],
+                 embeddings=None,
+                 space: str = "l2"):
+        """
+        Initialize the records of the index
+
+        Args:
+            ids (List[str]): Chunk ID of each row
+            texts (List[str]): Text of each row
+            metadatas (List[Dict[str, Any]]): Metadata of each row
+            embeddings: Embeddings used to embed text queries
+            space (str): Distance function: "l2", "cosine" or "ip"
+        """
+        self.ids = ids
+        self.texts = texts
+        self.metadatas = metadatas
+        self.embeddings = embeddings
+        self.space = space
+        self.rows: Dict[str, int] = {chunk_id: row for row, chunk_id in enumerate(ids)}
+        self.version = None
+        self.directory = None
+        self._filter_masks = LRUCache(64)
+
+    @classmethod
+    @abstractmethod
+    def from_chroma(cls, vector_store, **options: Any) -> "InProcessVectorIndex":
+        """
+        Build the index from the content of a Chroma collection
+
+        Args:
+            vector_store: Chroma vector store
+            **options: Options of the index class
+
+        Returns:
+            InProcessVectorIndex: Index with the content of the collection
+        """
+
+    @classmethod
+    @abstractmethod
+    def load(cls, directory: str, embeddings=None, **options: Any) -> Optional["InProcessVectorIndex"]:
+        """
+        Load a persisted index
+
+        Args:
+            directory (str): Directory of the index files
+            embeddings: Embeddings used to embed text queries
+            **options: Options of the index class
+
+        Returns:
+            Optional[InProcessVectorIndex]: Loaded index or None if it is absent, incomplete or built with other options
+        """
+
+    @abstractmethod
+    def save(self, directory: str, version: Optional[str] = None) -> None:
+        """
+        Persist the index, writing info.json last to mark the files as complete
+
+        Args:
+            directory (str): Directory of the index files
+            version (Optional[str]): Version of the source index, checked by load_if_current
+        """
+
+    @abstractmethod
+    def search_by_vector(self,
+                         embedding: List[float],
+                         k: int = 4,
+                         filter: Optional[Dict[str, Any]] = None) -> List[Tuple[int, float]]:
+        """
+        Return the rows nearest to a query vector
+
+        Args:
+            embedding (List[float]): Query vector
+            k (int): Maximum number of results
+            filter (Optional[Dict[str, Any]]): Chroma style metadata filter
+
+        Returns:
+            List[Tuple[int, float]]: (row, distance) pairs sorted by increasing distance
+        """
+
+    def search_by_vectors(self,
+                          embeddings: List[List[float]],
+                          k: int = 4,
+                          filter: Optional[Dict[str, Any]] = None) -> List[List[Tuple[int, float]]]:
+        """
+        Return the rows nearest to each of several query vectors
+
+        Args:
+            embeddings (List[List[float]]): Query vectors
+            k (int): Maximum number of results per query
+            filter (Optional[Dict[str, Any]]): Chroma style metadata filter
+
+        Returns:
+            List[List[Tuple[int, float]]]: (row, distance) pairs of each query sorted by increasing distance
+        """
+        return [self.search_by_vector(embedding, k, filter) for embedding in embeddings]
+
+    @abstractmethod
+    def get_vectors(self, ids: List[str]) -> np.ndarray:
+        """
+        Return the vectors of chunks
+
+        Args:
+            ids (List[str]): Chunk IDs (must be in the index)
+
+        Returns:
+            np.ndarray: (len(ids), dimension) vectors, possibly normalized
+        """
+
+    @classmethod
+    def load_if_current(cls,
+                        vector_store,
+                        directory: str,
+                        version: Optional[str],
+                        **options: Any) -> "InProcessVectorIndex":
+        """
+        Load the persisted index if it matches the source version, otherwise rebuild and save it
+
+        Args:
+            vector_store: Chroma vector store the index mirrors
+            directory (str): Directory of the index files
+            version (Optional[str]): Version of the source index (None always rebuilds)
+            **options: Options of the index class
+
+        Returns:
+            InProcessVectorIndex: Index with the content of the collection
+        """
+        if version is not None:
+            index = cls.load(directory, vector_store.embeddings, **options)
+            if index is not None and index.version == version:
+                logger.info(f"{cls.kind} index loaded from {directory} with {index.count()} vectors")
+                return index
+
+        index = cls.from_chroma(vector_store, **options)
+        index.save(directory, version)
+        return index
+
+    def count(self) -> int:
+        """
+        Return the number of vectors in the index
+
+        Returns:
+            int: Number of vectors
+        """
+        return len(self.ids)
+
+    def get_rows(self, where: Optional[Dict[str, Any]] = None) -> np.ndarray:
+        """
+        Return the rows of the chunks in the index, in insertion order
+
+        Args:
+            where (Optional[Dict[str, Any]]): Chroma style metadata filter
+
+        Returns:
+            np.ndarray: Rows passing the filter
+        """
+        if where:
+            return np.flatnonzero(self._get_filter_mask(where))
+        return np.arange(len(self.ids))
+
+    def _get_filter_mask(self, where: Dict[str, Any]) -> np.ndarray:
+        """
+        Return the rows that pass a metadata filter (masks are cached per filter)
+
+        Args:
+            where (Dict[str, Any]): Chroma style metadata filter
+
+        Returns:
+            np.ndarray: Boolean mask over the rows
+        """
+        key = json.dumps(where, sort_keys=True, default=str)
+        mask = self._filter_masks.get(key)
+        if mask is None:
+            mask = np.fromiter((matches_filter(metadata, where) for metadata in self.metadatas), dtype=bool, count=len(self.metadatas))
+            self._filter_masks.put(key, mask)
+        return mask
+
+    def _make_document(self, row: int) -> Document:
+        """
+        Build the document of a row (metadata is copied, callers may annotate it)
+
+        Args:
+            row (int): Row of the index
+
+        Returns:
+            Document: Chunk of the row
+        """
+        return Document(page_content=self.texts[row], metadata=dict(self.metadatas[row]), id=self.ids[row])
+
+    def similarity_search_by_vector_with_relevance_scores(self,
+                                                         embedding: List[float],
+                                                         k: int = 4,
+                                                         filter: Optional[Dict[str, Any]] = None,
+                                                         **kwargs: Any) -> List[Tuple[Document, float]]:
+        """
+        Return the chunks nearest to a query vector with their distance (same contract as Chroma)
+
+        Args:
+            embedding (List[float]): Query vector
+            k (int): Maximum number of results
+            filter (Optional[Dict[str, Any]]): Chroma style metadata filter
+
+        Returns:
+            List[Tuple[Document, float]]: Chunks and distances, lower is more similar
+        """
+        return [(self._make_document(row), distance) for row, distance in self.search_by_vector(embedding, k, filter)]
+
+    def similarity_search_by_vectors_with_relevance_scores(self,
+                                                          embeddings: List[List[float]],
+                                                          k: int = 4,
+                                                          filter: Optional[Dict[str, Any]] = None) -> List[List[Tuple[Document, float]]]:
+        """
+        Return the chunks nearest to each of several query vectors with their distance
+
+        Args:
+            embeddings (List[List[float]]): Query vectors
+            k (int): Maximum number of results per query
+            filter (Optional[Dict[str, Any]]): Chroma style metadata filter
+
+        Returns:
+            List[List[Tuple[Document, float]]]: Chunks and distances of each query, lower is more similar
+        """
+        return [
+            [(self._make_document(row), distance) for row, distance in results]
+            for results in self.search_by_vectors(embeddings, k, filter)
+        ]
+
+    def similarity_search_with_score(self,
+                                     query: str,
+                                     k: int = 4,
+                                     filter: Optional[Dict[str, Any]] = None,
+                                     **kwargs: Any) -> List[Tuple[Document, float]]:
+        """
+        Return the chunks nearest to a text query with their distance
+
+        Args:
+            query (str): Query text
+            k (int): Maximum number of results
+            filter (Optional[Dict[str, Any]]): Chroma style metadata filter
+
+        Returns:
+            List[Tuple[Document, float]]: Chunks and distances, lower is more similar
+        """
+        return self.similarity_search_by_vector_with_relevance_scores(self.embeddings.embed_query(query), k, filter)
+
+    def similarity_search(self,
+                          query: str,
+                          k: int = 4,
+                          filter: Optional[Dict[str, Any]] = None,
+                          **kwargs: Any) -> List[Document]:
+        """
+        Return the chunks nearest to a text query
+
+        Args:
+            query (str): Query text
+            k (int): Maximum number of results
+            filter (Optional[Dict[str, Any]]): Chroma style metadata filter
+
+        Returns:
+            List[Document]: Chunks sorted by similarity
+        """
+        return [doc for doc, _ in self.similarity_search_with_score(query, k, filter)]
+
+class NumpyVectorIndex(InProcessVectorIndex):
+    """Exact in-memory vector index answering top-k with one matrix-vector product
+
+    Vectors are stored L2-normalized in a contiguous float32 matrix (optionally
+    memory-mapped from disk) with their norms and a parallel list of texts and
+    metadata. Scores follow the distance function of the source collection, so
+    the index is a drop-in replacement of the Chroma store for SearchEngine.
+    """
+
+    kind = "NumPy"
+
+    def __init__(self,
+                 vectors: np.ndarray,
+                 ids: List[str],
+                 texts: List[str],
+                 metadatas: List[Dict[str, Any]],
+                 embeddings=None,
+                 space: str = "l2",
+                 norms: Optional[np.ndarray] = None):
+        """
+        Initialize the index
+
+        Args:
+            vectors (np.ndarray): (n, dimension) vectors, normalized unless norms is given
+            ids (List[str]): Chunk ID of each row
+            texts (List[str]): Text of each row
+            metadatas (List[Dict[str, Any]]): Metadata of each row
+            embeddings: Embeddings used to embed text queries
+            space (str): Distance function: "l2", "cosine" or "ip"
+            norms (Optional[np.ndarray]): Norm of each original vector when vectors are already normalized
+        """
+        if norms is None:
+            vectors = np.asarray(vectors, dtype=np.float32)
+            norms = np.linalg.norm(vectors, axis=1).astype(np.float32) if len(vectors) else np.zeros(0, dtype=np.float32)
+            vectors = vectors / np.maximum(norms, 1e-12)[:, None] if len(vectors) else vectors
+
+        super().__init__(ids, texts, metadatas, embeddings, space)
+        self.vectors = vectors
+        self.norms = norms
+        self.squared_norms = norms ** 2
+
+    @classmethod
+    def from_chroma(cls, vector_store, **options: Any) -> "NumpyVectorIndex":
+        """
+        Copy the vectors, texts and metadata of a Chroma collection
+
+        Args:
+            vector_store: Chroma vector store
+            **options: Unused, accepted for compatibility with load_if_current
+
+        Returns:
+            NumpyVectorIndex: Index with the content of the collection
+        """
+        ids, texts, metadatas, matrix = read_chroma_records(vector_store)
+        logger.info(f"NumPy index built from collection '{vector_store._collection.name}' with {len(ids)} vectors")
+        return cls(matrix, ids, texts, metadatas, vector_store.embeddings, get_collection_space(vector_store))
+
+    def get_vectors(self, ids: List[str]) -> np.ndarray:
+        """
+        Return the normalized vectors of chunks
+
+        Args:
+            ids (List[str]): Chunk IDs (must be in the index)
+
+        Returns:
+            np.ndarray: (len(ids), dimension) normalized vectors
+        """
+        return np.asarray(self.vectors[[self.rows[chunk_id] for chunk_id in ids]])
+
+    def save(self, directory: str, version: Optional[str] = None) -> None:
+        """
+        Persist the index so that it can be memory-mapped later
+
+        info.json is written last and marks the files as complete.
+
+        Args:
+            directory (str): Directory of the index files
+            version (Optional[str]): Version of the source index, checked by load_if_current
+        """
+        os.makedirs(directory, exist_ok=True)
+
+        info_path = os.path.join(directory, "info.json")
+        if os.path.exists(info_path):
+            os.remove(info_path)
+
+        # Files are replaced, never rewritten in place, since readers may have them memory-mapped
+        for name, array in (("vectors.npy", self.vectors), ("norms.npy", self.norms)):
+            temp_path = os.path.join(directory, f"{name}.tmp")
+            with open(temp_path, 'wb') as file:
+                np.save(file, np.ascontiguousarray(array, dtype=np.float32))
+            os.replace(temp_path, os.path.join(directory, name))
+
+        write_json_atomic(
+            os.path.join(directory, "records.json"),
+            {"ids": self.ids, "texts": self.texts, "metadatas": self.metadatas}
+        )
+        write_json_atomic(info_path, {"count": len(self.ids), "space": self.space, "version": version})
+        self.directory = directory
+        self.version = version
+
+    @classmethod
+    def load(cls, directory: str, embeddings=None, mmap: bool = True, **options: Any) -> Optional["NumpyVectorIndex"]:
+        """
+        Load a persisted index
+
+        Args:
+            directory (str): Directory of the index files
+            embeddings: Embeddings used to embed text queries
+            mmap (bool): Memory-map the vectors instead of reading them in memory
+
+        Returns:
+            Optional[NumpyVectorIndex]: Loaded index or None if it is absent or incomplete
+        """
+        info_path = os.path.join(directory, "info.json")
+        if not os.path.exists(info_path):
+            return None
+
+        try:
+            with open(info_path, 'r', encoding='utf-8') as file:
+                info = json.load(file)
+            with open(os.path.join(directory, "records.json"), 'r', encoding='utf-8') as file:
+                records = json.load(file)
+
+            mmap_mode = 'r' if mmap else None
+            index = cls(
+                np.load(os.path.join(directory, "vectors.npy"), mmap_mode=mmap_mode),
+                records["ids"], records["texts"], records["metadatas"],
+                embeddings, info["space"],
+                norms=np.load(os.path.join(directory, "norms.npy"))
+            )
+            index.version = info.get("version")
+            index.directory = directory
+            return index
+
+        except Exception as e:
+            logger.error(f"Error loading NumPy index from {directory}: {e}")
+            return None
+
+    def search_by_vector(self,
+                         embedding: List[float],
+                         k: int = 4,
+                         filter: Optional[Dict[str, Any]] = None) -> List[Tuple[int, float]]:
+        """
+        Return the rows nearest to a query vector
+
+        Args:
+            embedding (List[float]): Query vector
+            k (int): Maximum number of results
+            filter (Optional[Dict[str, Any]]): Chroma style metadata filter
+
+        Returns:
+            List[Tuple[int, float]]: (row, distance) pairs sorted by increasing distance
+        """
+        return self.search_by_vectors([embedding], k, filter)[0]
+
+    def search_by_vectors(self,
+                          embeddings: List[List[float]],
+                          k: int = 4,
+                          filter: Optional[Dict[str, Any]] = None) -> List[List[Tuple[int, float]]]:
+        """
+        Return the rows nearest to each of several query vectors with one matrix product
+
+        Args:
+            embeddings (List[List[float]]): Query vectors
+            k (int): Maximum number of results per query
+            filter (Optional[Dict[str, Any]]): Chroma style metadata filter
+
+        Returns:
+            List[List[Tuple[int, float]]]: (row, distance) pairs of each query sorted by increasing distance
+        """
+        if not self.ids or k <= 0 or not len(embeddings):
+            return [[] for _ in embeddings]
+
+        queries = np.asarray(embeddings, dtype=np.float32)
+        query_norms = np.linalg.norm(queries, axis=1)
+        similarities = (queries / np.maximum(query_norms, 1e-12)[:, None]) @ self.vectors.T
+
+        if self.space == "cosine":
+            distances = 1.0 - similarities
+        elif self.space == "ip":
+            distances = 1.0 - similarities * self.norms * query_norms[:, None]
+        else:
+            # Squared euclidean distance, as reported by Chroma
+            distances = (self.squared_norms + (query_norms ** 2)[:, None]
+                         - 2.0 * query_norms[:, None] * similarities * self.norms)
+
+        if filter:
+            candidates = np.flatnonzero(self._get_filter_mask(filter))
+            distances = distances[:, candidates]
+        else:
+            candidates = None
+
+        k = min(k, distances.shape[1])
+        if k == 0:
+            return [[] for _ in embeddings]
+
+        top = np.argpartition(distances, k - 1, axis=1)[:, :k]
+        top_distances = np.take_along_axis(distances, top, axis=1)
+        order = np.argsort(top_distances, axis=1)
+        top = np.take_along_axis(top, order, axis=1)
+        top_distances = np.take_along_axis(top_distances, order, axis=1)
+        rows = candidates[top] if candidates is not None else top
+
+        return [
+            [(int(row), float(distance)) for row, distance in zip(query_rows, query_distances)]
+            for query_rows, query_distances in zip(rows, top_distances)
+        ]
+
+class HnswVectorIndex(InProcessVectorIndex):
+    """Approximate nearest-neighbour index over a Chroma collection using hnswlib
+
+    M and ef_construction fix the graph quality at build time, ef_search trades
+    latency for recall at query time. Rows are hnswlib labels; deleted chunks
+    are only marked as deleted so the index can follow incremental updates.
+    add and delete must not run while the index is searched: pipelines update a
+    copy loaded from disk and swap it in. Requires the optional hnswlib package.
+    """
+
+    kind = "HNSW"
+
+    def __init__(self,
+                 dimension: int,
+                 space: str = "l2",
+                 M: int = 16,
+                 ef_construction: int = 200,
+                 ef_search: int = 64,
+                 max_elements: int = 1024,
+                 embeddings=None):
+        """
+        Initialize an empty index
+
+        Args:
+            dimension (int): Dimension of the vectors
+            space (str): Distance function: "l2", "cosine" or "ip"
+            M (int): Number of links per node of the graph
+            ef_construction (int): Size of the candidate list while building
+            ef_search (int): Size of the candidate list while searching
+            max_elements (int): Initial capacity (grown automatically)
+            embeddings: Embeddings used to embed text queries
+        """
+        import hnswlib
+
+        super().__init__([], [], [], embeddings, space)
+        self.dimension = dimension
+        self.M = M
+        self.ef_construction = ef_construction
+        self.ef_search = ef_search
+        self.deleted = set()
+
+        self.index = hnswlib.Index(space=space, dim=dimension)
+        self.index.init_index(max_elements=max(max_elements, 1), ef_construction=ef_construction, M=M)
+        self.index.set_ef(ef_search)
+
+    @classmethod
+    def from_chroma(cls,
+                    vector_store,
+                    M: int = 16,
+                    ef_construction: int = 200,
+                    ef_search: int = 64,
+                    **options: Any) -> "HnswVectorIndex":
+        """
+        Build the index from the content of a Chroma collection
+
+        Args:
+            vector_store: Chroma vector store
+            M (int): Number of links per node of the graph
+            ef_construction (int): Size of the candidate list while building
+            ef_search (int): Size of the candidate list while searching
+
+        Returns:
+            HnswVectorIndex: Index with the content of the collection
+        """
+        ids, texts, metadatas, matrix = read_chroma_records(vector_store)
+        dimension = matrix.shape[1] if len(ids) else len(vector_store.embeddings.embed_query("dimension"))
+
+        index = cls(dimension, get_collection_space(vector_store), M, ef_construction, ef_search,
+                    max_elements=len(ids), embeddings=vector_store.embeddings)
+        index.add(ids, texts, metadatas, matrix)
+        logger.info(f"HNSW index built from collection '{vector_store._collection.name}' with {len(ids)} vectors")
+        return index
+
+    def add(self, ids: List[str], texts: List[str], metadatas: List[Dict[str, Any]], vectors: np.ndarray) -> None:
+        """
+        Add chunks, replacing the vector and metadata of chunks already in the index
+
+        Args:
+            ids (List[str]): Chunk IDs
+            texts (List[str]): Chunk texts
+            metadatas (List[Dict[str, Any]]): Chunk metadata
+            vectors (np.ndarray): (n, dimension) vectors
+        """
+        if not ids:
+            return
+
+        labels = []
+        for chunk_id, text, metadata in zip(ids, texts, metadatas):
+            row = self.rows.get(chunk_id)
+            if row is None:
+                row = len(self.ids)
+                self.rows[chunk_id] = row
+                self.ids.append(chunk_id)
+                self.texts.append(text)
+                self.metadatas.append(metadata)
+            else:
+                self.texts[row] = text
+                self.metadatas[row] = metadata
+                if row in self.deleted:
+                    self.index.unmark_deleted(row)
+                    self.deleted.discard(row)
+            labels.append(row)
+
+        if len(self.ids) > self.index.get_max_elements():
+            self.index.resize_index(max(len(self.ids), 2 * self.index.get_max_elements()))
+
+        self.index.add_items(np.asarray(vectors, dtype=np.float32), np.asarray(labels))
+        self._filter_masks.clear()
+
+    def add_from_chroma(self, vector_store, ids: List[str]) -> None:
+        """
+        Copy chunks of a Chroma collection into the index
+
+        Args:
+            vector_store: Chroma vector store
+            ids (List[str]): Chunks to copy
+        """
+        record_ids, texts, metadatas, matrix = read_chroma_records(vector_store, ids)
+        self.add(record_ids, texts, metadatas, matrix)
+
+    def delete(self, ids: List[str]) -> None:
+        """
+        Mark chunks as deleted so that searches skip them
+
+        Args:
+            ids (List[str]): Chunk IDs
+        """
+        for chunk_id in ids:
+            row = self.rows.get(chunk_id)
+            if row is not None and row not in self.deleted:
+                self.index.mark_deleted(row)
+                self.deleted.add(row)
+
+    def get_rows(self, where: Optional[Dict[str, Any]] = None) -> np.ndarray:
+        """
+        Return the rows of the chunks in the index, in insertion order (deleted chunks are skipped)
+
+        Args:
+            where (Optional[Dict[str, Any]]): Chroma style metadata filter
+
+        Returns:
+            np.ndarray: Rows passing the filter
+        """
+        rows = super().get_rows(where)
+        if self.deleted:
+            rows = rows[~np.isin(rows, list(self.deleted))]
+        return rows
+
+    def get_vectors(self, ids: List[str]) -> np.ndarray:
+        """
+        Return the vectors of chunks as stored by hnswlib (normalized for the "cosine" space)
+
+        Args:
+            ids (List[str]): Chunk IDs (must be in the index)
+
+        Returns:
+            np.ndarray: (len(ids), dimension) vectors
+        """
+        return np.asarray(self.index.get_items([self.rows[chunk_id] for chunk_id in ids]), dtype=np.float32)
+
+    def set_ef_search(self, ef_search: int) -> None:
+        """
+        Change the size of the candidate list used while searching
+
+        Args:
+            ef_search (int): Higher values improve recall and increase latency
+        """
+        self.ef_search = ef_search
+        self.index.set_ef(ef_search)
+
+    def count(self) -> int:
+        """
+        Return the number of searchable vectors in the index
+
+        Returns:
+            int: Number of vectors not marked as deleted
+        """
+        return len(self.ids) - len(self.deleted)
+
+    def save(self, directory: str, version: Optional[str] = None) -> None:
+        """
+        Persist the index, writing info.json last to mark the files as complete
+
+        Args:
+            directory (str): Directory of the index files
+            version (Optional[str]): Version of the source index, checked by load_if_current
+        """
+        os.makedirs(directory, exist_ok=True)
+
+        info_path = os.path.join(directory, "info.json")
+        if os.path.exists(info_path):
+            os.remove(info_path)
+
+        temp_path = os.path.join(directory, "index.bin.tmp")
+        self.index.save_index(temp_path)
+        os.replace(temp_path, os.path.join(directory, "index.bin"))
+
+        write_json_atomic(
+            os.path.join(directory, "records.json"),
+            {"ids": self.ids, "texts": self.texts, "metadatas": self.metadatas, "deleted": sorted(self.deleted)}
+        )
+        write_json_atomic(info_path, {
+            "count": self.count(),
+            "space": self.space,
+            "dimension": self.dimension,
+            "M": self.M,
+            "ef_construction": self.ef_construction,
+            "version": version
+        })
+        self.directory = directory
+        self.version = version
+
+    @classmethod
+    def load(cls,
+             directory: str,
+             embeddings=None,
+             M: int = 16,
+             ef_construction: int = 200,
+             ef_search: int = 64,
+             **options: Any) -> Optional["HnswVectorIndex"]:
+        """
+        Load a persisted index built with the same M and ef_construction
+
+        Args:
+            directory (str): Directory of the index files
+            embeddings: Embeddings used to embed text queries
+            M (int): Expected number of links per node
+            ef_construction (int): Expected size of the candidate list while building
+            ef_search (int): Size of the candidate list while searching
+
+        Returns:
+            Optional[HnswVectorIndex]: Loaded index or None if it is absent, incomplete or built with other options
+        """
+        info_path = os.path.join(directory, "info.json")
+        if not os.path.exists(info_path):
+            return None
+
+        try:
+            with open(info_path, 'r', encoding='utf-8') as file:
+                info = json.load(file)
+            if info["M"] != M or info["ef_construction"] != ef_construction:
+                logger.info(f"HNSW index in {directory} was built with other parameters, rebuilding")
+                return None
+
+            with open(os.path.join(directory, "records.json"), 'r', encoding='utf-8') as file:
+                records = json.load(file)
+
+            import hnswlib
+
+            index = cls(info["dimension"], info["space"], M, ef_construction, ef_search, embeddings=embeddings)
+            index.index = hnswlib.Index(space=info["space"], dim=info["dimension"])
+            index.index.load_index(os.path.join(directory, "index.bin"), max_elements=len(records["ids"]))
+            index.index.set_ef(ef_search)
+            index.ids = records["ids"]
+            index.texts = records["texts"]
+            index.metadatas = records["metadatas"]
+            index.deleted = set(records["deleted"])
+            index.rows = {chunk_id: row for row, chunk_id in enumerate(index.ids)}
+            index.version = info.get("version")
+            index.directory = directory
+            return index
+
+        except Exception as e:
+            logger.error(f"Error loading HNSW index from {directory}: {e}")
+            return None
+
+    def search_by_vector(self,
+                         embedding: List[float],
+                         k: int = 4,
+                         filter: Optional[Dict[str, Any]] = None) -> List[Tuple[int, float]]:
+        """
+        Return the rows nearest to a query vector
+
+        Args:
+            embedding (List[float]): Query vector
+            k (int): Maximum number of results
+            filter (Optional[Dict[str, Any]]): Chroma style metadata filter
+
+        Returns:
+            List[Tuple[int, float]]: (row, distance) pairs sorted by increasing distance
+        """
+        return self.search_by_vectors([embedding], k, filter)[0]
+
+    def search_by_vectors(self,
+                          embeddings: List[List[float]],
+                          k: int = 4,
+                          filter: Optional[Dict[str, Any]] = None) -> List[List[Tuple[int, float]]]:
+        """
+        Return the rows nearest to each of several query vectors with one batched hnswlib query
+
+        Args:
+            embeddings (List[List[float]]): Query vectors
+            k (int): Maximum number of results per query
+            filter (Optional[Dict[str, Any]]): Chroma style metadata filter
+
+        Returns:
+            List[List[Tuple[int, float]]]: (row, distance) pairs of each query sorted by increasing distance
+        """
+        k = min(k, self.count())
+        if k <= 0 or not len(embeddings):
+            return [[] for _ in embeddings]
+
+        queries = np.asarray(embeddings, dtype=np.float32).reshape(len(embeddings), -1)
+        label_filter = None
+        if filter:
+            mask = self._get_filter_mask(filter)
+            candidates = self.get_rows(filter)
+            k = min(k, len(candidates))
+            if k <= 0:
+                return [[] for _ in embeddings]
+            # Few candidates are cheaper to scan than to find in the graph
+            if len(candidates) <= self.ef_search:
+                return self._search_rows(queries, candidates, k)
+            label_filter = lambda label: bool(mask[label])
+
+        try:
+            labels, distances = self.index.knn_query(queries, k=k, filter=label_filter)
+        except RuntimeError:
+            # Restrictive filters can leave fewer than k candidates within ef_search.
+            # The index is shared by concurrent searches, so ef is not raised here
+            if label_filter is None:
+                raise
+            return self._search_rows(queries, candidates, k)
+
+        return [
+            [(int(row), float(distance)) for row, distance in zip(query_labels, query_distances)]
+            for query_labels, query_distances in zip(labels, distances)
+        ]
+
+    def _search_rows(self, queries: np.ndarray, rows: np.ndarray, k: int) -> List[List[Tuple[int, float]]]:
+        """
+        Return the k rows nearest to each query by an exact scan of the given rows
+
+        Distances follow the hnswlib convention of the index space.
+
+        Args:
+            queries (np.ndarray): (n, dimension) query vectors
+            rows (np.ndarray): Candidate rows
+            k (int): Maximum number of results per query
+
+        Returns:
+            List[List[Tuple[int, float]]]: (row, distance) pairs of each query sorted by increasing distance
+        """
+        vectors = np.asarray(self.index.get_items(rows), dtype=np.float32)
+        if self.space == "cosine":
+            queries = queries / np.maximum(np.linalg.norm(queries, axis=1), 1e-12)[:, None]
+        products = queries @ vectors.T
+
+        if self.space == "l2":
+            distances = (queries ** 2).sum(axis=1)[:, None] + (vectors ** 2).sum(axis=1) - 2.0 * products
+        else:
+            distances = 1.0 - products
+
+        order = np.argsort(distances, axis=1, kind="stable")[:, :k]
+        return [
+            [(int(rows[column]), float(query_distances[column])) for column in query_order]
+            for query_order, query_distances in zip(order, distances)
+        ]